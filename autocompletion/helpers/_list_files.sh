@@ -1,13 +1,5 @@
-## CONFIG SETUP ##
+## LIST FILES ##
 
-__config_setup.sh
-
-## END CONFIG SETUP ##
-
-ITEM_TYPE="FILE"
-
-## INVOKE DATA FUNCTION ##
-
-__list_data.sh
-
-## INVOKE DATA FUNCTION ##
\ No newline at end of file
+# Served from a per-project cache by the plugins python env, see icav2_cli_plugins/utils/completion_helpers.py
+"${ICAV2_CLI_PLUGINS_HOME}/pyenv/bin/python3" -m icav2_cli_plugins.utils.completion_helpers \
+  complete "files" "${CURRENT_WORD-}" "$(tput cols 2>/dev/null || echo 120)" 2>/dev/null
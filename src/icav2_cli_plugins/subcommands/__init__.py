@@ -48,6 +48,7 @@ from wrapica.user import (
 
 # Get utils
 from ..utils import is_uuid_format
+from ..utils.concurrency_helpers import run_concurrently
 from ..utils.errors import InvalidArgumentError
 from ..utils.logger import get_logger
 from ..utils.typing_helpers import (
@@ -296,12 +297,20 @@ class DocOptArg:
             if not self.is_list:
                 logger.error(f"Argument '{arg_key}' is a list but the arg type is not a list")
                 raise InvalidArgumentError
-            external_arg_values = list(
-                map(
+            # Projects are looked up independently of one another, so resolve a list of projects concurrently
+            # (other magicals such as data toggle the log level while resolving so are resolved one at a time)
+            if isclass(self.arg_type) and issubclass(self.arg_type, Project):
+                external_arg_values = run_concurrently(
                     lambda value_iter: self.coerce_magical_value(arg_key, value_iter),
                     arg_value
                 )
-            )
+            else:
+                external_arg_values = list(
+                    map(
+                        lambda value_iter: self.coerce_magical_value(arg_key, value_iter),
+                        arg_value
+                    )
+                )
         elif arg_value is not None and isinstance(arg_value, str):
             external_arg_values = self.coerce_magical_value(arg_key, arg_value)
         elif arg_value is not None and isinstance(arg_value, bool):
@@ -22,10 +22,12 @@ Plugin Commands:
     list                        List bundles
     add-data                    Add data to a bundle
     add-pipeline                Add pipeline to a bundle
+    apply                       Sync a bundle's pipelines and data to a bundle yaml file
     release                     Release a bundle
     add-bundle-to-project       Add a released bundle to a project
     remove-bundle-from-project  Remove a bundle from a project
     deprecate                   Deprecate a bundle
+    lifecycle                   Release or deprecate many bundles at once
 
 
 Flags:
@@ -57,12 +59,16 @@ Use "icav2 bundles [command] --help" for more information about a command.
             from .bundles_add_data import BundlesAddData as subcommand
         elif cmd == "add-pipeline":
             from .bundles_add_pipeline import BundlesAddPipeline as subcommand
+        elif cmd == "apply":
+            from .bundles_apply import BundlesApply as subcommand
         elif cmd == "add-bundle-to-project":
             from .bundles_add_to_project import BundlesAddToProject as subcommand
         elif cmd == "remove-bundle-from-project":
             from .bundles_remove_from_project import BundlesRemoveFromProject as subcommand
         elif cmd == "deprecate":
             from .bundles_deprecate import BundlesDeprecate as subcommand
+        elif cmd == "lifecycle":
+            from .bundles_lifecycle import BundlesLifecycle as subcommand
         else:
             print(self.__doc__)
             print(f"Could not find cmd \"{cmd}\". Please refer to usage above")
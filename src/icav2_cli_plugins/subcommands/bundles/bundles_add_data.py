@@ -9,16 +9,15 @@ from typing import List, Optional
 
 # Wrapica imports
 from wrapica.enums import BundleStatus
-from wrapica.project import check_project_has_data_sharing_enabled
 from wrapica.data import Data
-from wrapica.bundle import (
-    Bundle,
-    add_data_to_bundle
-)
+from wrapica.bundle import Bundle
 from wrapica.region import Region
 
 # Utils
 from ...utils import is_interactive
+from ...utils.bundle_helpers import (
+    deduplicate_by_id, get_project_ids_without_data_sharing, link_items_to_bundle
+)
 from ...utils.errors import InvalidArgumentError
 from ...utils.logger import get_logger
 
@@ -34,9 +33,11 @@ class BundlesAddData(Command):
     icav2 bundles add-data help
     icav2 bundles add-data <bundle_id_or_name>
                            (--data=<data_id_or_uri>)...
+                           [--max-workers=<max_workers>]
     icav2 bundles add-data (--cli-input-yaml=<file>)
                            [--bundle=<bundle_id_or_name>]
                            [--data=<data_id_or_uri>]...
+                           [--max-workers=<max_workers>]
 
 Description:
     Add data to a bundle
@@ -50,6 +51,9 @@ Description:
       - icav2://playground/path-to-file/
       - icav2://playground/path-to-folder/
 
+    Data items are added to the bundle concurrently, rate-limited calls are retried with backoff.
+    Duplicate data items are only added once.
+    The exit code is non-zero if any data item could not be added to the bundle.
 
 Options:
   --bundle=<bundle_id_or_name>          Required, the bundle id (or bundle name) to add the data to
@@ -59,9 +63,9 @@ Options:
   --data=<data_id_or_uri>               Required, the data to add to the bundle, can also be specified in the yaml file.
                                         This option can be specified multiple times if multiple data items are to be added
                                         to the bundle. Use the 'data' key in the yaml file.
+  --max-workers=<max_workers>           Optional, the number of data items to add to the bundle at once (default 8)
 
- --cli-input-yaml=<file>               Optional, path to input yaml file (see yaml example above)
-
+  --cli-input-yaml=<file>               Optional, path to input yaml file (see yaml example above)
 
 
 Environment variables:
@@ -74,6 +78,7 @@ Example:
 
     bundle_obj: Bundle
     data_obj_list: List[Data]
+    max_workers: Optional[int]
 
     def __init__(self, command_argv):
         # CLI ARGS
@@ -83,7 +88,10 @@ Example:
             ),
             "data_obj_list": DocOptArg(
                 cli_arg_keys=["data"]
-            )
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"]
+            ),
         }
 
         # Additional parameters
@@ -93,13 +101,21 @@ Example:
         super().__init__(command_argv)
 
     def __call__(self):
-        data_obj: Data
-        for data_obj in self.data_obj_list:
-            # Add data to the bundle
-            add_data_to_bundle(
-                bundle_id=self.bundle_obj.id,
-                data_id=data_obj.id
-            )
+        failed_data_ids = link_items_to_bundle(
+            bundle_id=self.bundle_obj.id,
+            item_ids=list(
+                map(
+                    lambda data_iter: data_iter.id,
+                    self.data_obj_list
+                )
+            ),
+            item_type="data",
+            max_workers=self.max_workers
+        )
+
+        if len(failed_data_ids) > 0:
+            logger.error(f"Could not add {len(failed_data_ids)} of {len(self.data_obj_list)} data items to the bundle")
+            sys.exit(1)
 
     def check_args(self):
         # Set the bundle region
@@ -110,6 +126,9 @@ Example:
             logger.error("Please specify one or more data items")
             raise InvalidArgumentError
 
+        # Only add each data item once
+        self.data_obj_list = deduplicate_by_id(self.data_obj_list)
+
         # Check bundle status
         if BundleStatus[self.bundle_obj.status] == BundleStatus.RELEASED and is_interactive():
             logger.warning("Bundle is already released, are you sure you wish to add data to it?")
@@ -136,24 +155,34 @@ Example:
             )
         )
 
-        has_errors = False
-        for project_id in project_list:
-            if not check_project_has_data_sharing_enabled(project_id):
-                logger.error(
-                    f"Cannot add data to bundle {self.bundle_obj.id}"
-                    f"as the project {project_id} does not have data sharing enabled"
-                )
-                has_errors = True
-        if has_errors:
+        project_ids_without_data_sharing = get_project_ids_without_data_sharing(
+            project_list,
+            max_workers=self.max_workers
+        )
+
+        for project_id in project_ids_without_data_sharing:
+            logger.error(
+                f"Cannot add data to bundle {self.bundle_obj.id} "
+                f"as the project {project_id} does not have data sharing enabled"
+            )
+        if len(project_ids_without_data_sharing) > 0:
             raise ValueError
 
     def check_data_region_matches_bundle_region(self):
         # Check if the data region matches the bundle region
+        # Report every mismatched data item rather than stopping at the first
+        mismatched_data_obj_list = list(
+            filter(
+                lambda data_iter: data_iter.details.region.id != self.bundle_region.id,
+                self.data_obj_list
+            )
+        )
+
         data_obj: Data
-        for data_obj in self.data_obj_list:
-            if data_obj.details.region.id != self.bundle_region.id:
-                logger.error(
-                    f"Cannot add data to bundle"
-                    f"as the data region {data_obj.details.region.city_name} does not match the bundle region {self.bundle_region.city_name}"
-                )
-                raise ValueError
+        for data_obj in mismatched_data_obj_list:
+            logger.error(
+                f"Cannot add data {data_obj.id} to bundle "
+                f"as the data region {data_obj.details.region.city_name} does not match the bundle region {self.bundle_region.city_name}"
+            )
+        if len(mismatched_data_obj_list) > 0:
+            raise ValueError
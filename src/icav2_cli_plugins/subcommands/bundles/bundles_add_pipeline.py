@@ -9,10 +9,7 @@ from typing import List, Optional
 
 
 # Wrapica imports
-from wrapica.bundle import (
-    Bundle,
-    add_pipeline_to_bundle
-)
+from wrapica.bundle import Bundle
 from wrapica.enums import PipelineStatus, BundleStatus
 from wrapica.pipelines import (
     PipelineType
@@ -20,6 +17,7 @@ from wrapica.pipelines import (
 
 # Utils
 from ...utils import is_interactive
+from ...utils.bundle_helpers import deduplicate_by_id, link_items_to_bundle
 from ...utils.logger import get_logger
 
 # Local
@@ -33,9 +31,11 @@ class BundlesAddPipeline(Command):
     icav2 bundles add-pipeline help
     icav2 bundles add-pipeline <bundle_id_or_name>
                                (--pipeline=<pipeline_id_or_code>...)
+                               [--max-workers=<max_workers>]
     icav2 bundles add-pipeline (--cli-input-yaml=<file>)
                                [--bundle=<bundle_id_or_name>]
                                [--pipeline=<pipeline_id_or_code>]...
+                               [--max-workers=<max_workers>]
 
 Description:
     Add a released pipeline to a bundle
@@ -45,6 +45,10 @@ Description:
     pipelines:
       - my_pipeline_code_or_id
 
+    Pipelines are added to the bundle concurrently, rate-limited calls are retried with backoff.
+    Duplicate pipelines are only added once.
+    The exit code is non-zero if any pipeline could not be added to the bundle.
+
 Options:
   --bundle=<bundle_id_or_name>          Required, the bundle id (or bundle name) to add the pipeline to
                                         Use as a positional parameter when not using the yaml file,
@@ -53,6 +57,7 @@ Options:
   --pipeline=<pipeline_id_or_code>      Required, the pipeline id or code to add to the bundle,
                                         can be specified either on the command line or through the input yaml file.
                                         When specified in the yaml file, the key should be 'pipelines'
+  --max-workers=<max_workers>           Optional, the number of pipelines to add to the bundle at once (default 8)
 
   --cli-input-yaml=<file>               Optional, path to input yaml file (see yaml example above)
 
@@ -66,6 +71,7 @@ Example:
 
     bundle_obj: Optional[Bundle]
     pipeline_obj_list: List[PipelineType]
+    max_workers: Optional[int]
 
     def __init__(self, command_argv):
         # CLI ARGS
@@ -76,20 +82,35 @@ Example:
             "pipeline_obj_list": DocOptArg(
                 cli_arg_keys=["pipeline"],
                 yaml_arg_keys=["pipelines"],
-            )
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
         }
 
         super().__init__(command_argv)
 
     def __call__(self):
-        for pipeline in self.pipeline_obj_list:
-            # Add pipeline to the bundle
-            add_pipeline_to_bundle(
-                bundle_id=self.bundle_obj.id,
-                pipeline_id=pipeline.id
-            )
+        failed_pipeline_ids = link_items_to_bundle(
+            bundle_id=self.bundle_obj.id,
+            item_ids=list(
+                map(
+                    lambda pipeline_iter: pipeline_iter.id,
+                    self.pipeline_obj_list
+                )
+            ),
+            item_type="pipeline",
+            max_workers=self.max_workers
+        )
+
+        if len(failed_pipeline_ids) > 0:
+            logger.error(f"Could not add {len(failed_pipeline_ids)} of {len(self.pipeline_obj_list)} pipelines to the bundle")
+            sys.exit(1)
 
     def check_args(self):
+        # Only add each pipeline once
+        self.pipeline_obj_list = deduplicate_by_id(self.pipeline_obj_list)
+
         # Check bundle status
         if (
                 BundleStatus(self.bundle_obj.status) == BundleStatus.RELEASED
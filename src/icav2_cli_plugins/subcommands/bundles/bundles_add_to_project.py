@@ -4,12 +4,15 @@
 Add a bundle to a project
 """
 # Standard imports
-from typing import List, Optional
+import re
+import sys
+from typing import List, Optional, Union, Pattern, Dict
 
 # Wrapica imports
 from wrapica.bundle import (
     Bundle,
-    link_bundle_to_project
+    link_bundle_to_project,
+    list_bundles_in_project
 )
 from wrapica.project import (
     Project
@@ -20,6 +23,9 @@ from wrapica.region import (
 from wrapica.enums import BundleStatus
 
 # Utils
+from ...utils.bundle_helpers import get_bundle_projects, print_bundle_project_results
+from ...utils.concurrency_helpers import run_concurrently_as_completed, call_with_retries
+from ...utils.errors import InvalidArgumentError
 from ...utils.logger import get_logger
 
 # Local imports
@@ -32,10 +38,13 @@ class BundlesAddToProject(Command):
     """Usage:
     icav2 bundles add-bundle-to-project help
     icav2 bundles add-bundle-to-project <bundle_id_or_name>
-                                        (--project=<project_name_or_id>)...
+                                        ((--project=<project_name_or_id>)... | --project-name-regex=<regex>)
+                                        [--max-workers=<max_workers>]
     icav2 bundles add-bundle-to-project (--cli-input-yaml=<file>)
                                         [--bundle=<bundle_id_or_name>]
                                         [--project=<project_name_or_id>]...
+                                        [--project-name-regex=<regex>]
+                                        [--max-workers=<max_workers>]
 
 
 Description:
@@ -50,8 +59,15 @@ Description:
 
     If you have only one project to link to, you wish to may specify the project on the commandline instead.
 
+    Use --project-name-regex to add the bundle to every project (in the same region as the bundle)
+    whose name matches the regex.
+
     In order to add a bundle to a project, you will need admin access to the project.
 
+    The bundle is linked to the projects concurrently, a table of the result for each project is written to stdout.
+    Projects the bundle is already linked to are skipped.
+    The exit code is non-zero if the bundle could not be linked to any of the projects.
+
 
 Options:
   --bundle=<bundle_id_or_name>          Required, the bundle id (or bundle name) to be linked to the project(s)
@@ -61,6 +77,8 @@ Options:
   --project=<project_name_or_id>        Optional, the project to add the bundle to.  This option can be specified
                                         multiple times to add the bundle to multiple projects.
                                         When using the yaml file use the 'projects' key.
+  --project-name-regex=<regex>          Optional, add the bundle to all projects whose name fully matches this regex
+  --max-workers=<max_workers>           Optional, the number of projects to link the bundle to at once (default 8)
 
   --cli-input-yaml=<file>               Optional, path to input yaml file (see yaml example above)
 
@@ -71,10 +89,13 @@ Environment variables:
 Example:
     icav2 bundles add-bundle-to-project bundle1234 --project my-project
     icav2 bundles add-bundle-to-project --cli-input-yaml /path/to/input.yaml
+    icav2 bundles add-bundle-to-project bundle1234 --project-name-regex 'production-.*'
     """
 
     bundle_obj: Bundle
-    project_obj_list: List[Project]
+    project_obj_list: Optional[List[Project]]
+    project_name_regex: Optional[Union[str, Pattern]]
+    max_workers: Optional[int]
 
     def __init__(self, command_argv):
         # CLI ARGS
@@ -85,7 +106,13 @@ Example:
             "project_obj_list": DocOptArg(
                 cli_arg_keys=["project"],
                 yaml_arg_keys=["projects"]
-            )
+            ),
+            "project_name_regex": DocOptArg(
+                cli_arg_keys=["--project-name-regex"],
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
         }
 
         # Additional parameters
@@ -94,12 +121,73 @@ Example:
         super().__init__(command_argv)
 
     def __call__(self):
-        for project_iter in self.project_obj_list:
-            logger.info(f"Linking bundle {self.bundle_obj.id} to project {project_iter.id}")
-            link_bundle_to_project(project_iter.id, self.bundle_obj.id)
-            logger.info(f"Successfully linked bundle {self.bundle_obj.id} to project {project_iter.id}")
+        bundle_project_results: List[Dict] = []
+
+        project_iter: Project
+        for project_iter, is_linked, exc in run_concurrently_as_completed(
+            self.add_bundle_to_project,
+            self.project_obj_list,
+            max_workers=self.max_workers
+        ):
+            if exc is not None:
+                logger.warning(f"Could not link bundle {self.bundle_obj.id} to project {project_iter.id}: {exc}")
+                result = "failed"
+            elif not is_linked:
+                logger.info(f"Bundle {self.bundle_obj.id} is already in project {project_iter.id}, skipping this project")
+                result = "skipped"
+            else:
+                logger.info(f"Successfully linked bundle {self.bundle_obj.id} to project {project_iter.id}")
+                result = "linked"
+            bundle_project_results.append(
+                {
+                    "project_id": project_iter.id,
+                    "project_name": project_iter.name,
+                    "result": result,
+                    "error": str(exc) if exc is not None else ""
+                }
+            )
+
+        print_bundle_project_results(bundle_project_results)
+
+        if any(map(lambda result_iter: result_iter["result"] == "failed", bundle_project_results)):
+            sys.exit(1)
+
+    def add_bundle_to_project(self, project_obj: Project) -> bool:
+        """
+        Link the bundle to the project if the bundle is not already in the project
+        :param project_obj:
+        :return: False if the bundle is already in the project
+        """
+        if any(
+            map(
+                lambda bundle_iter: bundle_iter.id == self.bundle_obj.id,
+                call_with_retries(
+                    lambda: list_bundles_in_project(project_id=project_obj.id)
+                )
+            )
+        ):
+            return False
+
+        # Linking a bundle is not idempotent, a 5xx may still have linked it,
+        # so we only retry when we've been explicitly rate limited
+        call_with_retries(
+            lambda: link_bundle_to_project(project_obj.id, self.bundle_obj.id),
+            retryable_status_codes=[429]
+        )
+        return True
 
     def check_args(self):
+        # Collect the explicit projects and those matching the regex
+        if self.project_name_regex is not None:
+            self.project_name_regex = re.compile(self.project_name_regex)
+        self.project_obj_list = get_bundle_projects(
+            self.bundle_obj,
+            project_obj_list=self.project_obj_list,
+            project_name_regex=self.project_name_regex
+        )
+        if len(self.project_obj_list) == 0:
+            logger.error("Please specify one or more projects to add the bundle to")
+            raise InvalidArgumentError
 
         # Set the bundle region
         self.bundle_region = self.bundle_obj.region
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+
+"""
+Sync a bundle's pipelines and data to those listed in a bundle yaml file
+"""
+
+# Standard imports
+import json
+import sys
+from pathlib import Path, PurePosixPath
+from typing import Optional, List, Dict, Set, Tuple
+
+# Wrapica imports
+from wrapica.bundle import Bundle, coerce_bundle_id_or_name_to_bundle_obj, list_pipelines_in_bundle
+from wrapica.data import Data, coerce_data_id_path_or_icav2_uri_to_data_obj
+from wrapica.enums import BundleStatus
+from wrapica.pipelines import coerce_pipeline_id_or_code_to_pipeline_obj
+
+# Utils
+from ...utils import is_interactive, is_uuid_format, is_uri_format
+from ...utils.bundle_helpers import (
+    read_input_yaml_file, get_bundle_all_data, link_items_to_bundle
+)
+from ...utils.concurrency_helpers import run_concurrently, call_with_retries
+from ...utils.errors import InvalidArgumentError
+from ...utils.logger import get_logger
+
+# Local
+from .. import Command, DocOptArg
+
+# Set logger
+logger = get_logger()
+
+
+class BundlesApply(Command):
+    """Usage:
+    icav2 bundles apply help
+    icav2 bundles apply <bundle_yaml>
+                        [--bundle=<bundle_id_or_name>]
+                        [--no-remove]
+                        [--dry-run]
+                        [--max-workers=<max_workers>]
+
+Description:
+    Sync the pipelines and data of a bundle to those listed in a bundle yaml file.
+
+    The bundle yaml file has the same layout as the output of 'icav2 bundles get --yaml', i.e.
+    id: <bundle_id_or_name>
+    pipelines:
+      - <pipeline_id_or_code>
+      ...
+    data:
+      - <data_id_or_uri>
+      ...
+
+    Any other keys in the yaml (region, tenant, metadata etc) are ignored.
+
+    The live pipelines and data of the bundle are compared against the yaml,
+    pipelines and data missing from the bundle are added and pipelines and data not in the yaml are removed.
+    Data within a folder listed in the yaml is kept, data listed in the yaml that is already linked
+    through its parent folder is not added again.
+    Removing a folder also removes its contents (unlinking a folder alone leaves its contents in the bundle).
+    Only the changes required are made, these are made concurrently and rate-limited calls are retried with backoff.
+
+    The changes are written to stdout as json, use --dry-run to only show the changes.
+    The exit code is non-zero if any change could not be made.
+
+Options:
+  <bundle_yaml>                      Required, path to the bundle yaml file
+  --bundle=<bundle_id_or_name>       Optional, the bundle to sync, overrides the 'id' key of the yaml file
+  --no-remove                        Optional, only add pipelines and data, do not remove anything from the bundle
+  --dry-run                          Optional, show the changes that would be made without making them
+  --max-workers=<max_workers>        Optional, the number of changes to make at once (default 8)
+
+Environment variables:
+    ICAV2_BASE_URL           Optional, default set as https://ica.illumina.com/ica/rest
+
+Example:
+    icav2 bundles apply bundle.yaml --dry-run
+    icav2 bundles apply bundle.yaml --bundle my_staging_bundle
+    """
+
+    bundle_yaml: Path
+    bundle_obj: Optional[Bundle]
+    no_remove: Optional[bool]
+    dry_run: Optional[bool]
+    max_workers: Optional[int]
+
+    def __init__(self, command_argv):
+        # CLI ARGS
+        self._docopt_type_args = {
+            "bundle_yaml": DocOptArg(
+                cli_arg_keys=["bundle_yaml"],
+            ),
+            "bundle_obj": DocOptArg(
+                cli_arg_keys=["--bundle"],
+            ),
+            "no_remove": DocOptArg(
+                cli_arg_keys=["--no-remove"],
+            ),
+            "dry_run": DocOptArg(
+                cli_arg_keys=["--dry-run"],
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
+        }
+
+        # Additional parameters
+        self.desired_pipeline_ids: Optional[List[str]] = None
+        self.desired_data_ids: Optional[List[str]] = None
+
+        super().__init__(command_argv)
+
+    def __call__(self):
+        # Compare the bundle yaml against the live bundle
+        bundle_diff = self.get_bundle_diff()
+
+        print(json.dumps(bundle_diff, indent=2))
+
+        if self.dry_run:
+            return
+
+        failed_item_ids = []
+        for action_str, item_type, item_ids in [
+            ("add", "pipeline", bundle_diff["add"]["pipelines"]),
+            ("add", "data", bundle_diff["add"]["data"]),
+            ("remove", "pipeline", bundle_diff["remove"]["pipelines"]),
+            ("remove", "data", bundle_diff["remove"]["data"]),
+        ]:
+            if len(item_ids) == 0:
+                continue
+            failed_item_ids.extend(
+                link_items_to_bundle(
+                    bundle_id=self.bundle_obj.id,
+                    item_ids=item_ids,
+                    item_type=item_type,
+                    max_workers=self.max_workers,
+                    unlink=(action_str == "remove")
+                )
+            )
+
+        if len(failed_item_ids) > 0:
+            logger.error(f"Could not apply {len(failed_item_ids)} changes to bundle {self.bundle_obj.id}")
+            sys.exit(1)
+
+    def get_bundle_diff(self) -> Dict:
+        """
+        Get the pipelines and data to add to and remove from the bundle.
+        Data is compared against every data item in the bundle, not just the top level data,
+        since linking a folder links its contents and unlinking a folder does not unlink them
+        :return:
+        """
+        # get_bundle_all_data retries each page itself
+        live_pipeline_objs, live_data_list = run_concurrently(
+            lambda list_func_iter: list_func_iter(),
+            [
+                lambda: call_with_retries(lambda: list_pipelines_in_bundle(self.bundle_obj.id)),
+                lambda: get_bundle_all_data(self.bundle_obj, use_cache=False)
+            ]
+        )
+
+        live_pipeline_ids = set(
+            map(
+                lambda pipeline_iter: pipeline_iter.pipeline.id,
+                live_pipeline_objs
+            )
+        )
+        live_data_by_id: Dict[str, Dict] = dict(
+            map(
+                lambda data_iter: (data_iter["data_id"], data_iter),
+                live_data_list
+            )
+        )
+
+        desired_data_ids = set(self.desired_data_ids)
+
+        bundle_diff = {
+            "bundle": self.bundle_obj.id,
+            "add": {
+                "pipelines": sorted(set(self.desired_pipeline_ids) - live_pipeline_ids),
+                "data": sorted(desired_data_ids - set(live_data_by_id.keys())),
+            },
+            "remove": {
+                "pipelines": [],
+                "data": [],
+            }
+        }
+
+        if not self.no_remove:
+            desired_folder_paths = self.get_desired_folder_paths(live_data_by_id, bundle_diff["add"]["data"])
+            bundle_diff["remove"]["pipelines"] = sorted(live_pipeline_ids - set(self.desired_pipeline_ids))
+            bundle_diff["remove"]["data"] = sorted(
+                map(
+                    lambda data_iter: data_iter["data_id"],
+                    filter(
+                        lambda data_iter: (
+                            data_iter["data_id"] not in desired_data_ids and
+                            not self.is_in_folder(data_iter["project_id"], data_iter["path"], desired_folder_paths)
+                        ),
+                        live_data_list
+                    )
+                )
+            )
+
+        logger.info(
+            f"Bundle {self.bundle_obj.id} requires "
+            f"{len(bundle_diff['add']['pipelines'])} pipelines and {len(bundle_diff['add']['data'])} data items to be added, "
+            f"{len(bundle_diff['remove']['pipelines'])} pipelines and {len(bundle_diff['remove']['data'])} data items to be removed"
+        )
+
+        return bundle_diff
+
+    def get_desired_folder_paths(self, live_data_by_id: Dict[str, Dict], data_ids_to_add: List[str]) -> Set[Tuple[str, str]]:
+        """
+        Get the (project id, path) of each folder in the yaml, the contents of these folders are kept in the bundle.
+        Paths of data already in the bundle are known, data to be added is looked up concurrently
+        :param live_data_by_id:
+        :param data_ids_to_add:
+        :return:
+        """
+        desired_data_paths: List[Tuple[str, str]] = list(
+            map(
+                lambda data_id_iter: (
+                    live_data_by_id[data_id_iter]["project_id"],
+                    live_data_by_id[data_id_iter]["path"]
+                ),
+                filter(
+                    lambda data_id_iter: data_id_iter in live_data_by_id,
+                    self.desired_data_ids
+                )
+            )
+        )
+
+        data_objs_to_add: List[Data] = run_concurrently(
+            lambda data_id_iter: call_with_retries(lambda: coerce_data_id_path_or_icav2_uri_to_data_obj(data_id_iter)),
+            data_ids_to_add,
+            max_workers=self.max_workers
+        )
+        desired_data_paths.extend(
+            map(
+                lambda data_obj_iter: (data_obj_iter.details.owning_project_id, data_obj_iter.details.path),
+                data_objs_to_add
+            )
+        )
+
+        # Folder paths end with a '/'
+        return set(
+            filter(
+                lambda project_id_and_path_iter: project_id_and_path_iter[1].endswith("/"),
+                desired_data_paths
+            )
+        )
+
+    @staticmethod
+    def is_in_folder(project_id: str, path: str, folder_paths: Set[Tuple[str, str]]) -> bool:
+        """
+        Data is in a folder if any of its parent folders (in the same project) is in folder_paths
+        :param project_id:
+        :param path:
+        :param folder_paths:
+        :return:
+        """
+        return any(
+            map(
+                lambda parent_iter: (project_id, str(parent_iter).rstrip("/") + "/") in folder_paths,
+                PurePosixPath(path).parents
+            )
+        )
+
+    def check_args(self):
+        if not self.bundle_yaml.is_file():
+            logger.error(f"Could not find bundle yaml file at {self.bundle_yaml}")
+            raise InvalidArgumentError
+
+        bundle_yaml_dict = read_input_yaml_file(self.bundle_yaml)
+        if bundle_yaml_dict is None:
+            bundle_yaml_dict = {}
+
+        # Get the bundle
+        if self.bundle_obj is None:
+            if bundle_yaml_dict.get("id", None) is None:
+                logger.error("Please specify the bundle with either the 'id' key of the yaml file or --bundle")
+                raise InvalidArgumentError
+            self.bundle_obj = coerce_bundle_id_or_name_to_bundle_obj(bundle_yaml_dict["id"])
+
+        # Check bundle status
+        if (
+                BundleStatus(self.bundle_obj.status) == BundleStatus.RELEASED
+                and not self.dry_run
+                and is_interactive()
+        ):
+            logger.warning("Bundle is already released, are you sure you wish to modify it?")
+            continue_or_exit = input("Continue? (y/n): ")
+            if continue_or_exit.lower() != "y":
+                sys.exit(0)
+
+        # Resolve pipeline codes and data uris to ids
+        self.desired_pipeline_ids = self.resolve_ids(
+            bundle_yaml_dict.get("pipelines", None) or [],
+            is_id_func=is_uuid_format,
+            coerce_func=coerce_pipeline_id_or_code_to_pipeline_obj
+        )
+        self.desired_data_ids = self.resolve_ids(
+            bundle_yaml_dict.get("data", None) or [],
+            is_id_func=lambda data_str_iter: not is_uri_format(data_str_iter),
+            coerce_func=coerce_data_id_path_or_icav2_uri_to_data_obj
+        )
+
+    def resolve_ids(self, values: List[str], is_id_func, coerce_func) -> List[str]:
+        """
+        Resolve pipeline codes or data uris to their ids concurrently, ids are used as is
+        :param values:
+        :param is_id_func:
+        :param coerce_func:
+        :return:
+        """
+        values = list(dict.fromkeys(map(str, values)))
+        values_to_coerce = list(filter(lambda value_iter: not is_id_func(value_iter), values))
+
+        try:
+            coerced_ids = dict(
+                zip(
+                    values_to_coerce,
+                    map(
+                        lambda obj_iter: obj_iter.id,
+                        run_concurrently(
+                            lambda value_iter: call_with_retries(lambda: coerce_func(value_iter)),
+                            values_to_coerce,
+                            max_workers=self.max_workers
+                        )
+                    )
+                )
+            )
+        except ValueError as exc:
+            logger.error(f"Could not resolve all entries of {self.bundle_yaml}: {exc}")
+            raise InvalidArgumentError
+
+        return list(
+            dict.fromkeys(
+                map(
+                    lambda value_iter: coerced_ids.get(value_iter, value_iter),
+                    values
+                )
+            )
+        )
@@ -6,19 +6,22 @@ List the existing bundles
 # Standard imports
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Dict
 import json
-from ruamel.yaml import YAML
+from ruamel.yaml import YAML, CommentedSeq
 
 # Wrapica imports
 from wrapica.bundle import (
     Bundle
 )
+from wrapica.project import list_projects, Project
 
 # Utils
 from ...utils.bundle_helpers import (
-    bundle_to_yaml_obj, bundle_to_dict
+    bundle_to_yaml_obj, bundle_to_dict, get_bundle_all_data
 )
+from ...utils.concurrency_helpers import call_with_retries
+from ...utils.index_helpers import iter_project_index_entries, project_index_entry_has_bundle
 from ...utils.logger import get_logger
 
 # Local
@@ -34,6 +37,11 @@ class BundlesGet(Command):
     icav2 bundles get <bundle_id_or_name>
                       (--json | --yaml)
                       [--include-metadata]
+                      [--include-projects]
+                      [--live]
+                      [--max-workers=<max_workers>]
+                      [--include-all-data]
+                      [--no-cache]
                       [--output-path <path_to_file>]
 
 Description:
@@ -52,15 +60,35 @@ Description:
       short_description: <bundle_short_description>
       version: <bundle_version>
       version_description: <bundle_version_description>
+    projects:  (Only included when --include-projects is set)
+      - <project_id>  # Project name
+      ...
+    all_data:  (Only included when --include-all-data is set)
+      - <data_id>  # Data uri
+      ...
+
+    The 'data' attribute only lists the top level data of the bundle, i.e. folders are listed but not their contents.
+    Use --include-all-data to also list every data item in the bundle under 'all_data'.
+    The full data list of a released bundle is cached locally, use --no-cache to collect the data list again.
+
+    The projects a bundle is linked to are read from the local tenant index (see 'icav2 tenants index build') where possible,
+    only projects not yet in the index, or last scanned more than ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_MINUTES (default 10) minutes ago,
+    are scanned, use --live to ignore the index and rescan every project.
 
 Options:
   --json                       Optional: Return bundle object in json format
   --yaml                       Optional: Return the bundle in yaml format
   --include-metadata           Optional: Include metadata in the bundle object
+  --include-projects           Optional: Include the projects the bundle is linked to
+  --live                       Optional: Ignore the tenant index when collecting the projects the bundle is linked to
+  --max-workers=<max_workers>  Optional: The number of projects to scan at once (default 8)
+  --include-all-data           Optional: Include every data item in the bundle, not just the top level data
+  --no-cache                   Optional: Do not use the cached data list of the bundle with --include-all-data
   --output-path=<path>         Optional: Write out bundle attributes out to a file, otherwise to stdout
 
 Environment variables:
     ICAV2_BASE_URL           Optional, default set as https://ica.illumina.com/ica/rest
+    ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_MINUTES  Optional, rescan projects last indexed longer ago than this, default set as 10
 
 Example:
     icav2 bundles get abcdefg.12345 --output-yaml bundle.abcdefg.yaml
@@ -70,6 +98,11 @@ Example:
     is_json: Optional[bool]
     is_yaml: Optional[bool]
     include_metadata: Optional[bool]
+    include_projects: Optional[bool]
+    live: Optional[bool]
+    max_workers: Optional[int]
+    include_all_data: Optional[bool]
+    no_cache: Optional[bool]
     output_path: Optional[Path]
 
     def __init__(self, command_argv):
@@ -87,35 +120,125 @@ Example:
             "include_metadata": DocOptArg(
                 cli_arg_keys=["--include-metadata"]
             ),
+            "include_projects": DocOptArg(
+                cli_arg_keys=["--include-projects"]
+            ),
+            "live": DocOptArg(
+                cli_arg_keys=["--live"]
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"]
+            ),
+            "include_all_data": DocOptArg(
+                cli_arg_keys=["--include-all-data"]
+            ),
+            "no_cache": DocOptArg(
+                cli_arg_keys=["--no-cache"]
+            ),
             "output_path": DocOptArg(
                 cli_arg_keys=["--output-path"],
             )
         }
 
+        # Initialise parameters
+        self.linked_projects: Optional[List[Project]] = None
+        self.all_data: Optional[List[Dict]] = None
+
         super().__init__(command_argv)
 
     def __call__(self):
+        if self.include_projects:
+            self.set_linked_projects()
+
+        if self.include_all_data:
+            self.all_data = get_bundle_all_data(
+                self.bundle_obj,
+                use_cache=not self.no_cache
+            )
+
         with open(self.output_path, "w") as output_h:
             if self.is_json:
+                bundle_dict = bundle_to_dict(
+                    self.bundle_obj,
+                    include_metadata=self.include_metadata
+                )
+                if self.include_projects:
+                    bundle_dict["projects"] = list(
+                        map(
+                            lambda project_iter: project_iter.id,
+                            self.linked_projects
+                        )
+                    )
+                if self.include_all_data:
+                    bundle_dict["all_data"] = list(
+                        map(
+                            lambda data_iter: data_iter["data_id"],
+                            self.all_data
+                        )
+                    )
                 json.dump(
-                    bundle_to_dict(
-                        self.bundle_obj,
-                        include_metadata=self.include_metadata
-                    ),
+                    bundle_dict,
                     indent=2,
                     fp=output_h
                 )
             else:
                 yaml = YAML()
                 yaml.indent(mapping=2, sequence=4, offset=2)
+                bundle_yaml_obj = bundle_to_yaml_obj(
+                    self.bundle_obj,
+                    include_metadata=self.include_metadata
+                )
+                if self.include_projects:
+                    # Add project names to the end of the project ids
+                    bundle_yaml_obj["projects"] = CommentedSeq(
+                        map(
+                            lambda project_iter: project_iter.id,
+                            self.linked_projects
+                        )
+                    )
+                    for index, project in enumerate(self.linked_projects):
+                        bundle_yaml_obj["projects"].yaml_add_eol_comment(
+                            key=index,
+                            comment=project.name
+                        )
+                if self.include_all_data:
+                    # Add data uris to the end of the data ids
+                    bundle_yaml_obj["all_data"] = CommentedSeq(
+                        map(
+                            lambda data_iter: data_iter["data_id"],
+                            self.all_data
+                        )
+                    )
+                    for index, data_dict in enumerate(self.all_data):
+                        bundle_yaml_obj["all_data"].yaml_add_eol_comment(
+                            key=index,
+                            comment=f"icav2://{data_dict['project_id']}{data_dict['path']}"
+                        )
                 yaml.dump(
-                    bundle_to_yaml_obj(
-                        self.bundle_obj,
-                        include_metadata=self.include_metadata
-                    ),
+                    bundle_yaml_obj,
                     output_h
                 )
 
+    def set_linked_projects(self):
+        self.linked_projects = sorted(
+            map(
+                lambda project_and_entry_iter: project_and_entry_iter[0],
+                filter(
+                    lambda project_and_entry_iter: project_index_entry_has_bundle(
+                        project_and_entry_iter[1],
+                        bundle_id=self.bundle_obj.id
+                    ),
+                    iter_project_index_entries(
+                        call_with_retries(lambda: list_projects()),
+                        index_key="bundles",
+                        live=self.live,
+                        max_workers=self.max_workers
+                    )
+                )
+            ),
+            key=lambda project_iter: project_iter.id
+        )
+
     def check_args(self):
         # Check that the parent directory is required for the output path
         if self.output_path is not None and not self.output_path.parent.exists():
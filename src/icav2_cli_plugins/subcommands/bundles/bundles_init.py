@@ -14,8 +14,6 @@ from ruamel.yaml import YAML
 from wrapica.bundle import (
     Bundle,
     generate_empty_bundle,
-    add_pipeline_to_bundle,
-    add_data_to_bundle,
     get_bundle_obj_from_bundle_name
 )
 from wrapica.pipelines import (
@@ -33,7 +31,7 @@ from wrapica.region import (
 from ...utils import is_interactive
 
 # Utils
-from ...utils.bundle_helpers import bundle_to_dict, bundle_to_yaml_obj
+from ...utils.bundle_helpers import bundle_to_dict, bundle_to_yaml_obj, deduplicate_by_id, link_items_to_bundle
 from ...utils.logger import get_logger
 
 # Local
@@ -53,6 +51,7 @@ class BundlesInit(Command):
                        [--data=<data_id_or_uri>]...
                        [--category=<category>]...
                        [--region <region_id_or_city_name>]
+                       [--max-workers=<max_workers>]
                        [--json | --yaml]
     icav2 bundles init (--cli-input-yaml=<file>)
                        [--bundle-name=<bundle_name>]
@@ -63,6 +62,7 @@ class BundlesInit(Command):
                        [--data=<data_id_or_uri>]...
                        [--category=<category>]...
                        [--region <region_id_or_city_name>]
+                       [--max-workers=<max_workers>]
                        [--json | --yaml]
 
 Description:
@@ -86,6 +86,9 @@ Description:
     Use either --json or --yaml to specify the output format. If neither --json or --yaml are specified,
     the bundle id will be printed to stdout.
 
+    Pipelines and data are linked to the bundle concurrently, rate-limited calls are retried with backoff.
+    The exit code is non-zero if any pipeline or data item could not be linked to the bundle.
+
 
 Options:
   --short-description=<description>          Required, a short description for the bundle
@@ -101,6 +104,7 @@ Options:
                                              (specify multiple times for multiple categories).
                                              Use the 'categories' key when using the input yaml file invocation.
   --region=<region_id_or_city_name>          Optional, specify a region ID or city name if user has access to multiple regions
+  --max-workers=<max_workers>                Optional, the number of pipelines or data items to link to the bundle at once (default 8)
   --json                                     Optional, return the output in json format
   --yaml                                     Optional, return the output in yaml format
 
@@ -121,6 +125,7 @@ Example:
     data_obj_list: Optional[List[Data]]
     categories: Optional[List[str]]
     region: Optional[Region]
+    max_workers: Optional[int]
     is_json: Optional[bool]
     is_yaml: Optional[bool]
 
@@ -154,6 +159,9 @@ Example:
             "region": DocOptArg(
                 cli_arg_keys=["--region"],
             ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
             "is_json": DocOptArg(
                 cli_arg_keys=["--json"]
             ),
@@ -182,24 +190,41 @@ Example:
         self.bundle_id = self.bundle_obj.id
         logger.info(f"Created the bundle {self.bundle_id}")
 
+        failed_item_ids = []
+
         # Add pipeline objects to bundle
         if self.pipeline_obj_list is not None and len(self.pipeline_obj_list) > 0:
             logger.info(f"Adding pipelines to bundle {self.bundle_id}")
-            for pipeline_obj in self.pipeline_obj_list:
-                if add_pipeline_to_bundle(self.bundle_id, pipeline_obj.id):
-                    logger.info(f"Successfully linked pipeline {pipeline_obj.id} to {self.bundle_id}")
-                else:
-                    logger.warning(f"Could not add pipeline {pipeline_obj.id} to bundle {self.bundle_id}")
+            failed_item_ids.extend(
+                link_items_to_bundle(
+                    bundle_id=self.bundle_id,
+                    item_ids=list(
+                        map(
+                            lambda pipeline_iter: pipeline_iter.id,
+                            self.pipeline_obj_list
+                        )
+                    ),
+                    item_type="pipeline",
+                    max_workers=self.max_workers
+                )
+            )
 
         # Add data objects to bundle
         if self.data_obj_list is not None and len(self.data_obj_list) > 0:
             logger.info(f"Adding data to bundle {self.bundle_id}")
-            data_obj: Data
-            for data_obj in self.data_obj_list:
-                if add_data_to_bundle(self.bundle_id, data_obj.id):
-                    logger.info(f"Successfully linked data {data_obj.id} to {self.bundle_id}")
-                else:
-                    logger.warning(f"Could not add data {data_obj.id} to bundle {self.bundle_id}")
+            failed_item_ids.extend(
+                link_items_to_bundle(
+                    bundle_id=self.bundle_id,
+                    item_ids=list(
+                        map(
+                            lambda data_iter: data_iter.id,
+                            self.data_obj_list
+                        )
+                    ),
+                    item_type="data",
+                    max_workers=self.max_workers
+                )
+            )
 
         with open(sys.stdout.fileno(), "w") as output_h:
             if self.is_json:
@@ -222,7 +247,17 @@ Example:
                     output_h
                 )
 
+        if len(failed_item_ids) > 0:
+            logger.error(f"Could not link {len(failed_item_ids)} pipelines or data items to bundle {self.bundle_id}")
+            sys.exit(1)
+
     def check_args(self):
+        # Only link each pipeline and data item once
+        if self.pipeline_obj_list is not None:
+            self.pipeline_obj_list = deduplicate_by_id(self.pipeline_obj_list)
+        if self.data_obj_list is not None:
+            self.data_obj_list = deduplicate_by_id(self.data_obj_list)
+
         # Set region
         if self.region is None:
             self.region = get_default_region()
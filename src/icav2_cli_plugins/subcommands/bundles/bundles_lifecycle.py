@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+"""
+Release or deprecate many bundles at once
+"""
+
+# Standard imports
+import sys
+from pathlib import Path
+from typing import Optional, List, Dict
+
+# Wrapica imports
+from wrapica.bundle import filter_bundles, release_bundle, deprecate_bundle, Bundle
+from wrapica.enums import BundleStatus
+from wrapica.project import Project
+from wrapica.region import Region
+from wrapica.user import User
+
+# Utils
+from ...utils import is_interactive
+from ...utils.errors import InvalidArgumentError
+from ...utils.lifecycle_helpers import (
+    get_completed_ids_from_journal, print_lifecycle_targets, apply_lifecycle_transition
+)
+from ...utils.logger import get_logger
+
+# Local
+from .. import Command, DocOptArg
+
+# Set logger
+logger = get_logger()
+
+
+class BundlesLifecycle(Command):
+    """Usage:
+    icav2 bundles lifecycle help
+    icav2 bundles lifecycle (release | deprecate)
+                            [--name <name_or_regex>]
+                            [--status <status>]
+                            [--project <project_id_or_name>]
+                            [--creator <creator_id_or_username>]
+                            [--region <region_id_or_city_name>]
+                            [--all]
+                            [--preview | --yes]
+                            [--journal=<journal_jsonl>]
+                            [--resume]
+                            [--max-workers=<max_workers>]
+                            [--max-calls-per-minute=<max_calls_per_minute>]
+
+Description:
+    Release (or deprecate) every bundle that matches the filters, filters are the same as those of 'icav2 bundles list'.
+
+    Only draft bundles can be released, bundles that are already deprecated are not deprecated again.
+
+    The bundles to be transitioned are printed as a table first, use --preview to stop there.
+    In an interactive session you will then be asked to confirm the transition, use --yes to skip the confirmation,
+    --yes is required when not running in an interactive session.
+
+    Bundles are transitioned concurrently, use --max-calls-per-minute to rate limit the transitions.
+    Use --journal to record the result of each transition to a jsonl file,
+    rerun with --resume to skip the bundles in the journal that have already been transitioned.
+    The exit code is non-zero if any bundle could not be transitioned.
+
+Options:
+  --name=<name>                                  Optional, only bundles that match a certain bundle name,
+                                                 can use a regex here too
+  --status=<status>                              Optional, only bundles of this status (one of DRAFT, RELEASED, DEPRECATED)
+  --project=<project_id_or_name>                 Optional, only bundles that are part of this project
+  --creator=<creator_id_or_username>             Optional, only bundles that are created by this user
+  --region=<region_id_or_city_name>              Optional, only bundles of a certain region
+  --all                                          Optional, required if no filters are set, transition every bundle
+  --preview                                      Optional, print the bundles that would be transitioned and exit
+  --yes                                          Optional, do not ask for confirmation
+  --journal=<journal_jsonl>                      Optional, append the result of each transition to this jsonl file
+  --resume                                       Optional, skip bundles already transitioned in the journal,
+                                                 required if the journal file already exists
+  --max-workers=<max_workers>                    Optional, the number of bundles to transition at once (default 8)
+  --max-calls-per-minute=<max_calls_per_minute>  Optional, the maximum number of transitions to start each minute
+
+Environment variables:
+    ICAV2_BASE_URL           Optional, default set as https://ica.illumina.com/ica/rest
+
+Example:
+    icav2 bundles lifecycle deprecate --name 'reference-.*-2023' --status RELEASED --preview
+    icav2 bundles lifecycle deprecate --name 'reference-.*-2023' --status RELEASED --journal deprecate.jsonl --yes
+    """
+
+    is_release: Optional[bool]
+    is_deprecate: Optional[bool]
+    bundle_name: Optional[str]
+    status: Optional[BundleStatus]
+    project_obj: Optional[Project]
+    creator_obj: Optional[User]
+    region_obj: Optional[Region]
+    all_bundles: Optional[bool]
+    preview: Optional[bool]
+    yes: Optional[bool]
+    journal_path: Optional[Path]
+    resume: Optional[bool]
+    max_workers: Optional[int]
+    max_calls_per_minute: Optional[int]
+
+    def __init__(self, command_argv):
+        # CLI ARGS
+        self._docopt_type_args = {
+            "is_release": DocOptArg(
+                cli_arg_keys=["release"]
+            ),
+            "is_deprecate": DocOptArg(
+                cli_arg_keys=["deprecate"]
+            ),
+            "bundle_name": DocOptArg(
+                cli_arg_keys=["--name"]
+            ),
+            "status": DocOptArg(
+                cli_arg_keys=["--status"]
+            ),
+            "project_obj": DocOptArg(
+                cli_arg_keys=["--project"]
+            ),
+            "creator_obj": DocOptArg(
+                cli_arg_keys=["--creator"]
+            ),
+            "region_obj": DocOptArg(
+                cli_arg_keys=["--region"]
+            ),
+            "all_bundles": DocOptArg(
+                cli_arg_keys=["--all"]
+            ),
+            "preview": DocOptArg(
+                cli_arg_keys=["--preview"]
+            ),
+            "yes": DocOptArg(
+                cli_arg_keys=["--yes"]
+            ),
+            "journal_path": DocOptArg(
+                cli_arg_keys=["--journal"]
+            ),
+            "resume": DocOptArg(
+                cli_arg_keys=["--resume"]
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"]
+            ),
+            "max_calls_per_minute": DocOptArg(
+                cli_arg_keys=["--max-calls-per-minute"]
+            ),
+        }
+
+        # Extras
+        self.transition: Optional[str] = None
+        self.targets: Optional[List[Dict]] = None
+
+        super().__init__(command_argv)
+
+    def __call__(self):
+        if len(self.targets) == 0:
+            logger.info(f"No bundles to {self.transition}")
+            return
+
+        print_lifecycle_targets(self.targets)
+
+        if self.preview:
+            return
+
+        if not self.yes:
+            continue_or_exit = input(f"{self.transition.capitalize()} {len(self.targets)} bundles? (y/n): ")
+            if continue_or_exit.lower() != "y":
+                sys.exit(0)
+
+        has_failures = apply_lifecycle_transition(
+            targets=self.targets,
+            transition=self.transition,
+            transition_func=release_bundle if self.transition == "release" else deprecate_bundle,
+            journal_path=self.journal_path,
+            max_workers=self.max_workers,
+            max_calls_per_minute=self.max_calls_per_minute
+        )
+
+        if has_failures:
+            sys.exit(1)
+
+    def check_args(self):
+        self.transition = "release" if self.is_release else "deprecate"
+
+        # Guard against transitioning every bundle by accident
+        if not self.all_bundles and all(
+            map(
+                lambda filter_iter: filter_iter is None,
+                [self.bundle_name, self.status, self.project_obj, self.creator_obj, self.region_obj]
+            )
+        ):
+            logger.error(f"Please specify at least one filter, or use --all to {self.transition} every bundle")
+            raise InvalidArgumentError
+
+        # We cannot ask for confirmation outside of an interactive session
+        if not self.preview and not self.yes and not is_interactive():
+            logger.error("--yes is required when not running in an interactive session")
+            raise InvalidArgumentError
+
+        # Check the journal
+        if self.journal_path is not None:
+            if self.journal_path.exists() and not self.resume:
+                logger.error(f"Journal {self.journal_path} already exists, use --resume to continue from the journal")
+                raise InvalidArgumentError
+            if not self.journal_path.parent.is_dir():
+                logger.error(f"Parent directory of the journal {self.journal_path} does not exist")
+                raise InvalidArgumentError
+        elif self.resume:
+            logger.error("--resume requires --journal")
+            raise InvalidArgumentError
+
+        bundle_obj_list: List[Bundle] = filter_bundles(
+            bundle_name=self.bundle_name,
+            project_id=self.project_obj.id if self.project_obj is not None else None,
+            region_id=self.region_obj.id if self.region_obj is not None else None,
+            status=BundleStatus(self.status) if self.status is not None else None,
+            creator_id=self.creator_obj.id if self.creator_obj is not None else None
+        )
+        logger.info(f"Found {len(bundle_obj_list)} bundles matching the filters")
+
+        # Only draft bundles can be released, and deprecated bundles are not deprecated again
+        if self.transition == "release":
+            bundle_obj_list = list(
+                filter(
+                    lambda bundle_iter: BundleStatus(bundle_iter.status) == BundleStatus.DRAFT,
+                    bundle_obj_list
+                )
+            )
+        else:
+            bundle_obj_list = list(
+                filter(
+                    lambda bundle_iter: not BundleStatus(bundle_iter.status) == BundleStatus.DEPRECATED,
+                    bundle_obj_list
+                )
+            )
+
+        # Skip bundles already transitioned in the journal
+        if self.resume and self.journal_path.exists():
+            completed_ids = get_completed_ids_from_journal(self.journal_path, self.transition)
+            logger.info(f"Skipping {len(completed_ids)} bundles already transitioned in the journal")
+            bundle_obj_list = list(
+                filter(
+                    lambda bundle_iter: bundle_iter.id not in completed_ids,
+                    bundle_obj_list
+                )
+            )
+
+        self.targets = list(
+            map(
+                lambda bundle_iter: {
+                    "id": bundle_iter.id,
+                    "name": bundle_iter.name,
+                    "status": bundle_iter.status,
+                    "region": bundle_iter.region.city_name,
+                    "modification_time_stamp": bundle_iter.time_modified,
+                },
+                bundle_obj_list
+            )
+        )
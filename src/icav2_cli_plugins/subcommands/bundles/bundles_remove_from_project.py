@@ -5,7 +5,9 @@ Remove a bundle from a project
 """
 
 # Standard imports
-from typing import List, Optional
+import re
+import sys
+from typing import List, Optional, Union, Pattern, Dict
 
 # Wrapica imports
 from wrapica.bundle import (
@@ -21,6 +23,9 @@ from wrapica.region import (
 from wrapica.enums import BundleStatus
 
 # Utils
+from ...utils.bundle_helpers import get_bundle_projects, print_bundle_project_results
+from ...utils.concurrency_helpers import run_concurrently_as_completed, call_with_retries
+from ...utils.errors import InvalidArgumentError
 from ...utils.logger import get_logger
 
 # Local imports
@@ -35,10 +40,13 @@ class BundlesRemoveFromProject(Command):
     """Usage:
     icav2 bundles remove-bundle-from-project help
     icav2 bundles remove-bundle-from-project <bundle_id_or_name>
-                                             (--project=<project_name_or_id>)...
+                                             ((--project=<project_name_or_id>)... | --project-name-regex=<regex>)
+                                             [--max-workers=<max_workers>]
     icav2 bundles remove-bundle-from-project (--cli-input-yaml=<file>)
                                              [--bundle=<bundle_id_or_name>]
                                              [--project=<project_name_or_id>]...
+                                             [--project-name-regex=<regex>]
+                                             [--max-workers=<max_workers>]
 
 
 Description:
@@ -53,8 +61,15 @@ Description:
 
     If you have only one project to link to, you wish to may specify the project on the commandline instead.
 
+    Use --project-name-regex to remove the bundle from every project (in the same region as the bundle)
+    whose name matches the regex.
+
     In order to add a bundle to a project, you will need admin access to the project.
 
+    The bundle is removed from the projects concurrently, projects the bundle is not in are skipped.
+    A table of the result for each project is written to stdout.
+    The exit code is non-zero if the bundle could not be removed from any of the projects.
+
 
 Options:
   --bundle=<bundle_id_or_name>          Required, the bundle id (or bundle name) to be remove from the project(s)
@@ -64,6 +79,8 @@ Options:
   --project=<project_name_or_id>        Optional, the project(s) to remove the bundle from.  This option can be specified
                                         multiple times to remove the bundle from multiple projects.
                                         When using the yaml file use the 'projects' key.
+  --project-name-regex=<regex>          Optional, remove the bundle from all projects whose name fully matches this regex
+  --max-workers=<max_workers>           Optional, the number of projects to remove the bundle from at once (default 8)
 
   --cli-input-yaml=<file>               Optional, path to input yaml file (see yaml example above)
 
@@ -74,10 +91,13 @@ Environment variables:
 Example:
     icav2 bundles remove-bundle-from-project bundle1234 --project my-project
     icav2 bundles remove-bundle-from-project --cli-input-yaml /path/to/input.yaml
+    icav2 bundles remove-bundle-from-project bundle1234 --project-name-regex 'staging-.*'
     """
 
     bundle_obj: Bundle
-    project_obj_list: List[Project]
+    project_obj_list: Optional[List[Project]]
+    project_name_regex: Optional[Union[str, Pattern]]
+    max_workers: Optional[int]
 
     def __init__(self, command_argv):
         # CLI ARGS
@@ -88,30 +108,85 @@ Example:
             "project_obj_list": DocOptArg(
                 cli_arg_keys=["project"],
                 yaml_arg_keys=["projects"]
-            )
+            ),
+            "project_name_regex": DocOptArg(
+                cli_arg_keys=["--project-name-regex"],
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
         }
 
         super().__init__(command_argv)
 
     def __call__(self):
-        for project_iter in self.project_obj_list:
-            logger.info(f"Removing bundle {self.bundle_obj.id} from project {project_iter.id}")
-            unlink_bundle_from_project(
-                project_id=project_iter.id,
-                bundle_id=self.bundle_obj.id
+        bundle_project_results: List[Dict] = []
+
+        project_iter: Project
+        for project_iter, is_unlinked, exc in run_concurrently_as_completed(
+            self.remove_bundle_from_project,
+            self.project_obj_list,
+            max_workers=self.max_workers
+        ):
+            if exc is not None:
+                logger.warning(f"Could not unlink bundle {self.bundle_obj.id} from project {project_iter.id}: {exc}")
+                result = "failed"
+            elif not is_unlinked:
+                logger.info(f"Could not find bundle {self.bundle_obj.id} in project {project_iter.id}, skipping this project")
+                result = "skipped"
+            else:
+                logger.info(f"Successfully unlinked bundle {self.bundle_obj.id} from project {project_iter.id}")
+                result = "unlinked"
+            bundle_project_results.append(
+                {
+                    "project_id": project_iter.id,
+                    "project_name": project_iter.name,
+                    "result": result,
+                    "error": str(exc) if exc is not None else ""
+                }
             )
-            logger.info(f"Successfully unlinked bundle {self.bundle_obj.id} from project {project_iter.id}")
 
-    def check_args(self):
-        # Check the bundle is in the project
-        projects_with_bundle = []
-        for project_obj in self.project_obj_list:
-            for bundle in list_bundles_in_project(project_id=project_obj.id):
-                if bundle.id == self.bundle_obj.id:
-                    break
-            else:
-                logger.info(f"Could not find bundle {self.bundle_obj.id} in project {project_obj.id}, skipping this project")
-                continue
-            projects_with_bundle.append(project_obj)
+        print_bundle_project_results(bundle_project_results)
+
+        if any(map(lambda result_iter: result_iter["result"] == "failed", bundle_project_results)):
+            sys.exit(1)
+
+    def remove_bundle_from_project(self, project_obj: Project) -> bool:
+        """
+        Unlink the bundle from the project if the bundle is in the project
+        :param project_obj:
+        :return: False if the bundle is not in the project
+        """
+        if not any(
+            map(
+                lambda bundle_iter: bundle_iter.id == self.bundle_obj.id,
+                call_with_retries(
+                    lambda: list_bundles_in_project(project_id=project_obj.id)
+                )
+            )
+        ):
+            return False
+
+        # Unlinking a bundle is not idempotent, a 5xx may still have unlinked it,
+        # so we only retry when we've been explicitly rate limited
+        call_with_retries(
+            lambda: unlink_bundle_from_project(
+                project_id=project_obj.id,
+                bundle_id=self.bundle_obj.id
+            ),
+            retryable_status_codes=[429]
+        )
+        return True
 
-        self.project_obj_list = projects_with_bundle
+    def check_args(self):
+        # Collect the explicit projects and those matching the regex
+        if self.project_name_regex is not None:
+            self.project_name_regex = re.compile(self.project_name_regex)
+        self.project_obj_list = get_bundle_projects(
+            self.bundle_obj,
+            project_obj_list=self.project_obj_list,
+            project_name_regex=self.project_name_regex
+        )
+        if len(self.project_obj_list) == 0:
+            logger.error("Please specify one or more projects to remove the bundle from")
+            raise InvalidArgumentError
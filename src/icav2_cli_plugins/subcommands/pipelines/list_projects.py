@@ -5,14 +5,14 @@ List projects a pipeline resides in
 """
 # Standard imports
 import json
-from typing import Optional, List, Dict
+from typing import Optional, List
 
 # Wrapica imports
 from wrapica.project import list_projects, Project
 from wrapica.pipelines import PipelineType
-from wrapica.project_pipelines import list_project_pipelines
 
 # Utils
+from ...utils.index_helpers import iter_project_index_entries, project_index_entry_has_pipeline
 from ...utils.logger import get_logger
 
 # Locals
@@ -29,6 +29,9 @@ class ListProjects(Command):
                                   [--json] 
                                   [--include-bundle-linked]
                                   [--include-hidden-projects]
+                                  [--first]
+                                  [--live]
+                                  [--max-workers=<max_workers>]
 
 Description:
     List projects a pipeline belongs to.
@@ -45,15 +48,25 @@ Description:
     Use case 2:
     Finding out which projects a pipeline is linked to.
 
+    Projects are scanned concurrently and (unless --json is set) printed as soon as they are found.
+    The pipelines of each project are read from the local tenant index (see 'icav2 tenants index build') where possible,
+    only projects not yet in the index, or last scanned more than ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_MINUTES (default 10) minutes ago,
+    are scanned (and then added to the index).
+    Use --live to ignore the index and rescan every project, i.e if the pipeline was only just added to a project.
+
 Options:
     <pipeline_id_or_code>        Required, the id (or code) of the pipeline to update
     --include-hidden-projects    Optional, search hidden projects
     --json                       Optional, output in json format
     --include-bundle-linked      Optional, include projects that have the pipeline linked via a bundle
+    --first                      Optional, stop after the first project that contains the pipeline is found
+    --max-workers=<max_workers>  Optional, the number of projects to scan at once (default 8)
+    --live                       Optional, ignore the tenant index and rescan every project
 
 Environment:
     ICAV2_BASE_URL (optional, defaults to ica.illumina.com)
     ICAV2_PROJECT_ID (optional, taken from ~/.session.ica.yaml otherwise)
+    ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_MINUTES (optional, rescan projects last indexed longer ago than this, defaults to 10)
 
 Example:
     icav2 pipelines list-projects abcd-efgh-ijkl-mnop
@@ -63,6 +76,9 @@ Example:
     include_hidden_projects: Optional[bool]
     is_json: Optional[bool]
     include_bundle_linked: Optional[bool]
+    first: Optional[bool]
+    max_workers: Optional[int]
+    live: Optional[bool]
 
     def __init__(self, command_argv):
         # CLI Args
@@ -78,7 +94,16 @@ Example:
             ),
             "include_bundle_linked": DocOptArg(
                 cli_arg_keys=["--include-bundle-linked"],
-            )
+            ),
+            "first": DocOptArg(
+                cli_arg_keys=["--first"],
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
+            "live": DocOptArg(
+                cli_arg_keys=["--live"],
+            ),
         }
 
         # Initialise parameters
@@ -87,7 +112,7 @@ Example:
         super().__init__(command_argv)
 
     def __call__(self):
-        # Update pipeline
+        # Find projects, printing each as they are found
         self.filter_projects()
 
         # End script
@@ -110,41 +135,36 @@ Example:
                     indent=4
                 )
             )
-        else:
-            print(f"The following projects contain the pipeline id: '{self.pipeline_obj.id}'")
-            for project in self.projects:
-                print(f"* Project ID: {project.id} / Project Name: {project.name}")
 
     def check_args(self):
         # Get projects
         self.projects = list_projects(include_hidden_projects=self.include_hidden_projects)
 
-    def select_linked_pipeline(self, project_pipeline_dict: Dict) -> bool:
-        """
-        Select linked pipeline
-        :return:
-        """
-        if self.include_bundle_linked:
-            return True
-        else:
-            return len(project_pipeline_dict.get("bundleLinks").get("items")) == 0
+    def add_project(self, project: Project):
+        self.projects.append(project)
 
-    def filter_projects(self):
-        new_projects = []
-        for project in self.projects:
-            try:
-                next(
-                    filter(
-                        lambda project_pipeline: (
-                            project_pipeline.pipeline.id == self.pipeline_obj.id and
-                            self.select_linked_pipeline(project_pipeline)
-                        ),
-                        list_project_pipelines(project_id=project.id)
-                    )
-                )
-            except StopIteration:
-                continue
-            else:
-                new_projects.append(project)
+        # Stream results as they are found
+        if not self.is_json:
+            if len(self.projects) == 1:
+                print(f"The following projects contain the pipeline id: '{self.pipeline_obj.id}'")
+            print(f"* Project ID: {project.id} / Project Name: {project.name}", flush=True)
 
-        self.projects = new_projects
+    def filter_projects(self):
+        all_projects = self.projects
+        self.projects = []
+
+        for project, project_index_entry in iter_project_index_entries(
+            all_projects,
+            index_key="pipelines",
+            live=self.live,
+            max_workers=self.max_workers
+        ):
+            if project_index_entry_has_pipeline(
+                project_index_entry,
+                pipeline_id=self.pipeline_obj.id,
+                include_bundle_linked=self.include_bundle_linked
+            ):
+                self.add_project(project)
+                if self.first:
+                    # Closing the generator cancels the scans that have not yet started
+                    break
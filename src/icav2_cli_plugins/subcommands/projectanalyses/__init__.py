@@ -31,6 +31,7 @@ Plugin Commands:
   get-analysis-step-logs           Get the log outputs for a cwl analysis step
   gantt-plot                       Create a gantt-plot for analysis
   abort                            Abort an analysis
+  watch                            Watch the status of one or more analyses
 
 Flags:
   -h, --help   help for projectanalyses
@@ -61,6 +62,8 @@ Use "icav2 projectanalyses [command] --help" for more information about a comman
             from .gantt_plot import ProjectAnalysesGanttPlot as subcommand
         elif cmd == "abort":
             from .abort import ProjectAnalysesAbort as subcommand
+        elif cmd == "watch":
+            from .watch import ProjectAnalysesWatch as subcommand
         elif cmd == "list-v2":
             from .list_v2 import ProjectAnalysesListV2 as subcommand
         else:
@@ -1,20 +1,28 @@
 #!/usr/bin/env python3
 
 """
-Abort an analysis
+Abort one or more analyses
 """
 
 # External imports
-from typing import Optional
+import sys
+from datetime import datetime
+from typing import Optional, List, Dict
+
+import pandas as pd
 
 # Wrapica imports
 from wrapica.enums import ProjectAnalysisStatus
+from wrapica.pipelines import PipelineType
 from wrapica.project_analysis import (
-    abort_analysis, AnalysisType
+    abort_analysis, list_analyses, AnalysisType
 )
 
 # Utils
+from ...utils.concurrency_helpers import run_concurrently_as_completed, call_with_retries
 from ...utils.config_helpers import get_project_id
+from ...utils.errors import InvalidArgumentError
+from ...utils.projectanalysis_helpers import is_terminal_analysis_status
 from ...utils.logger import get_logger
 
 # locals
@@ -27,15 +35,39 @@ logger = get_logger()
 class ProjectAnalysesAbort(Command):
     """Usage:
     icav2 projectanalyses abort help
-    icav2 projectanalyses abort <analysis_id_or_user_reference>
+    icav2 projectanalyses abort [<analysis_id_or_user_reference>...]
+                                [--pipeline=<pipeline_id_or_code>]
+                                [--status-filter=<status_filter>]
+                                [--creation-date-before=<creation_date_before>]
+                                [--creation-date-after=<creation_date_after>]
+                                [--max-workers=<max_workers>]
+                                [--dry-run]
 
 Description:
-    Abort an analysis in a project
+    Abort one or more analyses in a project.
+
+    Analyses may be specified by id (or user reference), or selected with the same filters as 'list-v2'.
+    Analyses that are already in a terminal state are skipped.
+
+    Aborts are issued concurrently, rate-limited responses are retried with backoff.
+    A summary table of each analysis and the result of the abort is printed to stdout.
+    The exit code is non-zero if any abort failed.
 
 Options:
-    <analysis_id_or_user_reference>     Required, the id (or user reference) of the analysis.
-                                        Note that the user reference must be unique within the project,
-                                        If the user reference is not unique, please use an analysis id instead.
+    <analysis_id_or_user_reference>...                  Optional, the id (or user reference) of the analysis.
+                                                        Note that the user reference must be unique within the project,
+                                                        If the user reference is not unique, please use an analysis id instead.
+                                                        Cannot be used alongside the filtering options.
+
+    Filtering options:
+    --pipeline=<pipeline_id_or_code>                    Optional, filter by the pipeline id or code
+    --status-filter=<status_filter>                     Optional, filter by the status
+    --creation-date-before=<creation_date_before>       Optional, filter by the creation date before
+    --creation-date-after=<creation_date_after>         Optional, filter by the creation date after
+
+    Other options:
+    --max-workers=<max_workers>                         Optional, the number of analyses to abort at once (default 8)
+    --dry-run                                           Optional, print the analyses that would be aborted and exit
 
 Environment:
     ICAV2_ACCESS_TOKEN (optional, set as ~/.icav2/.session.ica.yaml if not set)
@@ -44,44 +76,150 @@ Environment:
 
 Example:
     icav2 projectanalyses abort <analysis_id>
+    icav2 projectanalyses abort <analysis_id> <analysis_id_2>
+    icav2 projectanalyses abort --pipeline my-pipeline --creation-date-after 2024-01-01T00:00:00Z --dry-run
     """
 
-    analysis_obj: Optional[AnalysisType]
+    analysis_obj_list: Optional[List[AnalysisType]]
+    pipeline: Optional[PipelineType]
+    status_filter: Optional[ProjectAnalysisStatus]
+    creation_date_before: Optional[datetime]
+    creation_date_after: Optional[datetime]
+    max_workers: Optional[int]
+    dry_run: Optional[bool]
 
     def __init__(self, command_argv):
         # CLI ARGS
         self._docopt_type_args = {
-            "analysis_obj": DocOptArg(
+            "analysis_obj_list": DocOptArg(
                 cli_arg_keys=["analysis_id_or_user_reference"],
-            )
+            ),
+            "pipeline": DocOptArg(
+                cli_arg_keys=["pipeline"]
+            ),
+            "status_filter": DocOptArg(
+                cli_arg_keys=["--status-filter"]
+            ),
+            "creation_date_before": DocOptArg(
+                cli_arg_keys=["--creation-date-before"]
+            ),
+            "creation_date_after": DocOptArg(
+                cli_arg_keys=["--creation-date-after"]
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"]
+            ),
+            "dry_run": DocOptArg(
+                cli_arg_keys=["--dry-run"]
+            ),
         }
 
         # Initialise other args
         self.project_id: Optional[str] = None
+        self.analysis_obj_list: Optional[List[AnalysisType]] = None
+        self.creation_date_before: Optional[datetime] = None
+        self.creation_date_after: Optional[datetime] = None
 
         # Collect args from doc strings
         super().__init__(command_argv)
 
+    def has_filters(self) -> bool:
+        return any(
+            map(
+                lambda filter_iter: filter_iter is not None,
+                [self.pipeline, self.status_filter, self.creation_date_before, self.creation_date_after]
+            )
+        )
+
     def check_args(self):
         # Set project id
         self.project_id = get_project_id()
 
-        # Check analysis status is a non-terminal state
-        if ProjectAnalysisStatus(self.analysis_obj.status) not in [
-            ProjectAnalysisStatus.REQUESTED,
-            ProjectAnalysisStatus.QUEUED,
-            ProjectAnalysisStatus.INITIALIZING,
-            ProjectAnalysisStatus.PREPARING_INPUTS,
-            ProjectAnalysisStatus.IN_PROGRESS,
-            ProjectAnalysisStatus.GENERATING_OUTPUTS,
-            ProjectAnalysisStatus.AWAITING_INPUT
-        ]:
-            raise ValueError(
-                f"Analysis {self.analysis_obj.id} is in a terminal state and cannot be aborted"
+        # Check analyses or filters have been specified (but not both)
+        if self.analysis_obj_list is None and not self.has_filters():
+            logger.error("Please specify either one or more analyses or at least one filtering option")
+            raise InvalidArgumentError
+        if self.analysis_obj_list is not None and self.has_filters():
+            logger.error("Please specify either one or more analyses or filtering options, not both")
+            raise InvalidArgumentError
+
+        # Collect analyses from filters
+        if self.analysis_obj_list is None:
+            self.analysis_obj_list = list_analyses(
+                project_id=self.project_id,
+                pipeline_id=self.pipeline.id if self.pipeline is not None else None,
+                status=self.status_filter,
+                creation_date_before=self.creation_date_before,
+                creation_date_after=self.creation_date_after,
             )
 
+        # Deduplicate analyses, and pre-filter to non-terminal states
+        analysis_obj_by_id: Dict[str, AnalysisType] = {}
+        for analysis_obj in self.analysis_obj_list:
+            if is_terminal_analysis_status(analysis_obj.status):
+                logger.info(
+                    f"Analysis {analysis_obj.id} is in a terminal state ({analysis_obj.status}), skipping"
+                )
+                continue
+            analysis_obj_by_id[analysis_obj.id] = analysis_obj
+        self.analysis_obj_list = list(analysis_obj_by_id.values())
+
+        if len(self.analysis_obj_list) == 0:
+            logger.warning("No analyses in a non-terminal state found, nothing to abort")
+
     def __call__(self):
-        abort_analysis(
-            project_id=self.project_id,
-            analysis_id=self.analysis_obj.id
-        )
+        if len(self.analysis_obj_list) == 0:
+            return
+
+        if self.dry_run:
+            self.print_summary(
+                list(
+                    map(
+                        lambda analysis_obj_iter: self.get_summary_row(analysis_obj_iter, "DRY_RUN"),
+                        self.analysis_obj_list
+                    )
+                )
+            )
+            return
+
+        summary_rows = []
+        for analysis_obj, _, exc in run_concurrently_as_completed(
+            lambda analysis_obj_iter: call_with_retries(
+                lambda: abort_analysis(
+                    project_id=self.project_id,
+                    analysis_id=analysis_obj_iter.id
+                )
+            ),
+            self.analysis_obj_list,
+            max_workers=self.max_workers
+        ):
+            if exc is not None:
+                logger.error(f"Could not abort analysis {analysis_obj.id}: {exc}")
+                summary_rows.append(self.get_summary_row(analysis_obj, f"FAILED: {str(exc).splitlines()[0]}"))
+            else:
+                summary_rows.append(self.get_summary_row(analysis_obj, "ABORTED"))
+
+        self.print_summary(summary_rows)
+
+        if any(map(lambda row_iter: row_iter["result"].startswith("FAILED"), summary_rows)):
+            sys.exit(1)
+
+    @staticmethod
+    def get_summary_row(analysis_obj: AnalysisType, result: str) -> Dict:
+        return {
+            "id": analysis_obj.id,
+            "user_reference": analysis_obj.user_reference,
+            "status": analysis_obj.status,
+            "result": result
+        }
+
+    @staticmethod
+    def print_summary(summary_rows: List[Dict]):
+        # Print to stdout
+        try:
+            pd.DataFrame(summary_rows).to_markdown(sys.stdout, index=False)
+
+            # Add an extra line to stdout
+            print()
+        except BrokenPipeError:
+            pass
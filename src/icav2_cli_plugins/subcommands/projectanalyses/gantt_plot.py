@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
 """
-Create a gantt plot for an analysis run
+Create a gantt plot for one or more analysis runs
 """
 
 # Standard imports
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict
+
+import pandas as pd
 
 # Wrapica
 from wrapica.project_analysis import (
@@ -15,10 +17,12 @@ from wrapica.project_analysis import (
 )
 
 # Utils
+from ...utils.concurrency_helpers import run_concurrently
 from ...utils.config_helpers import get_project_id
 from ...utils.gantt_plot_helpers import (
-    filter_workflow_steps_df, analysis_steps_list_to_df, plot_workflow_steps_df,
-    add_task_duration_columns, add_task_colour_column
+    filter_workflow_steps_df, analysis_steps_list_to_df, write_workflow_steps_output,
+    add_task_duration_columns, add_task_colour_column, add_critical_path_column,
+    add_relative_time_columns, GANTT_PLOT_OUTPUT_FORMATS
 )
 from ...utils.errors import InvalidArgumentError
 from ...utils.logger import get_logger
@@ -33,17 +37,35 @@ logger = get_logger()
 class ProjectAnalysesGanttPlot(Command):
     """Usage:
     icav2 projectanalyses gantt-plot help
-    icav2 projectanalyses gantt-plot <analysis_id_or_user_reference>
+    icav2 projectanalyses gantt-plot <analysis_id_or_user_reference>...
                                      [--output-path <output_plot_path>]
+                                     [--format <output_format>]
 
 Description:
-    Create a gantt plot for an analysis run
+    Create a gantt plot for one or more analysis runs.
+
+    When multiple analyses are provided, the gantt charts are aligned on the same time axis
+    so that step timings can be compared between runs (i.e between pipeline versions).
+
+    Steps on the critical path of each analysis are outlined in black.
+    The critical path is inferred from the step timings, working backwards from the last step to complete.
 
 Options:
-    <analysis_id_or_user_reference>            Required, the id or user reference of the analysis
+    <analysis_id_or_user_reference>...         Required, the id or user reference of the analysis
                                                Note that the user reference must be unique within the project,
                                                If the user reference is not unique, please use an analysis id instead.
-    --output-path <output_plot_path>           Optional, The output path (should end in .png), otherwise the output is <analysis_id>.gantt.png
+                                               Multiple analyses may be specified.
+    --output-path <output_plot_path>           Optional, The output path (should end in .png, .svg, .html or .json),
+                                               otherwise the output is <analysis_id>.<output_format>
+                                               (or analyses.gantt.<output_format> if multiple analyses are specified).
+    --format <output_format>                   Optional, one of png, svg, html or json.
+                                               Defaults to the suffix of the output path, otherwise png.
+                                               * png: A raster image rendered with matplotlib (Agg backend)
+                                               * svg: A vector image, rendered without matplotlib
+                                               * html: A report containing the gantt chart (as svg), the critical path
+                                                 of each analysis, and the running and pending time of each step
+                                                 across analyses, rendered without matplotlib
+                                               * json: The step timings and critical path of each analysis
 
 Environment:
     ICAV2_ACCESS_TOKEN (optional, set as ~/.icav2/.session.ica.yaml if not set)
@@ -53,26 +75,33 @@ Environment:
 
 Example:
     icav2 projectanalyses gantt-plot abc12345 --output-path gantt.png
+    icav2 projectanalyses gantt-plot abc12345 def67890 --output-path gantt_comparison.html
+    icav2 projectanalyses gantt-plot abc12345 --format json
     """
 
-    analysis_obj: AnalysisType
+    analysis_obj_list: List[AnalysisType]
     output_path: Path
+    output_format: Optional[str]
 
     def __init__(self, command_argv):
         # CLI ARGS
         self._docopt_type_args = {
-            "analysis_obj": DocOptArg(
+            "analysis_obj_list": DocOptArg(
                 cli_arg_keys=["analysis_id_or_user_reference"],
             ),
             "output_path": DocOptArg(
                 cli_arg_keys=["--output-path"],
+            ),
+            "output_format": DocOptArg(
+                cli_arg_keys=["--format"],
             )
         }
 
         # Initialise parameters
         self.project_id: Optional[str] = None
         self.output_path: Optional[Path] = None
-        self.workflow_steps: Optional[List[AnalysisStep]] = None
+        self.output_format: Optional[str] = None
+        self.workflow_steps_by_analysis_id: Optional[Dict[str, List[AnalysisStep]]] = None
 
         # Collect args from doc strings
         super().__init__(command_argv)
@@ -80,36 +109,60 @@ Example:
     def check_args(self):
         # Set project id
         self.project_id = get_project_id()
+
+        # Check the output format
+        if self.output_format is None:
+            if self.output_path is not None and self.output_path.suffix.lstrip(".") in GANTT_PLOT_OUTPUT_FORMATS:
+                self.output_format = self.output_path.suffix.lstrip(".")
+            else:
+                self.output_format = "png"
+        if self.output_format not in GANTT_PLOT_OUTPUT_FORMATS:
+            logger.error(f"--format should be one of {', '.join(GANTT_PLOT_OUTPUT_FORMATS)}")
+            raise InvalidArgumentError
+
         # Check if output path is specified
         # If so, check its parent exists
         if self.output_path is not None:
             if not self.output_path.parent.is_dir():
                 logger.error("Could not confirm parent directory of output path exists")
                 raise NotADirectoryError
-            if not self.output_path.suffix == ".png":
-                logger.error("--output-path should have a suffix .png")
+            if not self.output_path.suffix == f".{self.output_format}":
+                logger.error(f"--output-path should have a suffix .{self.output_format}")
                 raise InvalidArgumentError
+        elif len(self.analysis_obj_list) == 1:
+            self.output_path = Path.cwd() / f"{self.analysis_obj_list[0].id}.{self.output_format}"
         else:
-            self.output_path = Path.cwd() / f"{self.analysis_obj.id}.png"
-
-        # Get analysis workflow steps
-        self.workflow_steps = get_analysis_steps(
-            project_id=self.project_id,
-            analysis_id=self.analysis_obj.id,
-            include_technical_steps=True
+            self.output_path = Path.cwd() / f"analyses.gantt.{self.output_format}"
+
+        # Get analysis workflow steps for all analyses concurrently
+        self.workflow_steps_by_analysis_id = dict(
+            zip(
+                map(lambda analysis_obj_iter: analysis_obj_iter.id, self.analysis_obj_list),
+                run_concurrently(
+                    lambda analysis_obj_iter: get_analysis_steps(
+                        project_id=self.project_id,
+                        analysis_id=analysis_obj_iter.id,
+                        include_technical_steps=True
+                    ),
+                    self.analysis_obj_list
+                )
+            )
         )
 
     def __call__(self):
         self.plot_workflow_steps()
 
-    def plot_workflow_steps(self):
+    def get_workflow_steps_df(self, analysis_obj: AnalysisType) -> pd.DataFrame:
         """
-        Plot the workflow steps and write to output path
+        Get the workflow steps dataframe for an analysis, ready for plotting
+        Args:
+            analysis_obj:
+
         Returns:
 
         """
         # Get a dataframe from a list of analysis step objects
-        workflow_steps_df = analysis_steps_list_to_df(self.workflow_steps)
+        workflow_steps_df = analysis_steps_list_to_df(self.workflow_steps_by_analysis_id[analysis_obj.id])
 
         # Squish the executors together
         workflow_steps_df = filter_workflow_steps_df(workflow_steps_df)
@@ -120,10 +173,26 @@ Example:
         # Add in the colour column
         workflow_steps_df = add_task_colour_column(workflow_steps_df)
 
+        # Add in the critical path column
+        workflow_steps_df = add_critical_path_column(workflow_steps_df)
+
+        # Use timeCreated as the start of the analysis
+        return add_relative_time_columns(workflow_steps_df, analysis_obj.time_created)
+
+    def plot_workflow_steps(self):
+        """
+        Plot the workflow steps and write to output path
+        Returns:
+
+        """
+        workflow_steps_df_by_analysis_id = {
+            analysis_obj.id: self.get_workflow_steps_df(analysis_obj)
+            for analysis_obj in self.analysis_obj_list
+        }
+
         # Plot steps df
-        plot_workflow_steps_df(
-            workflow_steps_df=workflow_steps_df,
+        write_workflow_steps_output(
+            workflow_steps_df_by_analysis_id=workflow_steps_df_by_analysis_id,
             output_path=self.output_path,
-            project_id=self.project_id,
-            analysis_id=self.analysis_obj.id
+            output_format=self.output_format
         )
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+"""
+Watch the status of one or more analyses
+"""
+
+# External imports
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional, List, Dict
+
+# Wrapica imports
+from wrapica.enums import ProjectAnalysisStatus
+from wrapica.project_analysis import (
+    AnalysisType, get_analysis_obj_from_analysis_id
+)
+
+# Utils
+from ...utils.concurrency_helpers import run_concurrently_as_completed
+from ...utils.config_helpers import get_project_id
+from ...utils.projectanalysis_helpers import (
+    is_terminal_analysis_status, ANALYSIS_STATUS_POLL_INTERVAL_SECONDS
+)
+from ...utils.logger import get_logger
+
+# locals
+from .. import Command, DocOptArg
+
+# Get logger
+logger = get_logger()
+
+# Exit codes
+WATCH_EXIT_CODE_SUCCEEDED = 0
+WATCH_EXIT_CODE_FAILED = 1
+WATCH_EXIT_CODE_NOT_TERMINAL = 2
+
+
+class ProjectAnalysesWatch(Command):
+    """Usage:
+    icav2 projectanalyses watch help
+    icav2 projectanalyses watch <analysis_id_or_user_reference>...
+                                [--until-terminal]
+
+Description:
+    Watch the status of one or more analyses in a project.
+
+    A JSON event is printed to stdout (one per line) for the initial state of each analysis,
+    and then each time an analysis changes state.
+
+    Without --until-terminal, the current state of each analysis is printed once and the command exits.
+
+    With --until-terminal, analyses are polled until every analysis has reached a terminal state.
+    Analyses are polled more often while in short-lived states (i.e INITIALIZING)
+    and less often while in long-lived states (i.e IN_PROGRESS).
+
+    Each event has the following keys:
+      * timestamp
+      * analysis_id
+      * user_reference
+      * previous_status (null for the initial state)
+      * status
+
+    The exit code is
+      * 0 if all analyses have succeeded
+      * 1 if any analysis has failed or been aborted
+      * 2 if no analyses have failed or been aborted, but at least one analysis has not yet reached a terminal state
+
+Options:
+    <analysis_id_or_user_reference>...  Required, the id (or user reference) of the analysis.
+                                        Note that the user reference must be unique within the project,
+                                        If the user reference is not unique, please use an analysis id instead.
+                                        Multiple analyses may be specified.
+    --until-terminal                    Optional, keep polling until all analyses have reached a terminal state
+
+Environment:
+    ICAV2_ACCESS_TOKEN (optional, set as ~/.icav2/.session.ica.yaml if not set)
+    ICAV2_BASE_URL (optional, defaults to https://ica.illumina.com/ica/rest)
+    ICAV2_PROJECT_ID (optional, set as ~/.icav2/.session.ica.yaml if not set)
+
+Example:
+    icav2 projectanalyses watch <analysis_id> <analysis_id_2> --until-terminal
+    """
+
+    analysis_obj_list: List[AnalysisType]
+    until_terminal: Optional[bool]
+
+    def __init__(self, command_argv):
+        # CLI ARGS
+        self._docopt_type_args = {
+            "analysis_obj_list": DocOptArg(
+                cli_arg_keys=["analysis_id_or_user_reference"],
+            ),
+            "until_terminal": DocOptArg(
+                cli_arg_keys=["--until-terminal"],
+            )
+        }
+
+        # Initialise other args
+        self.project_id: Optional[str] = None
+
+        # Latest status and next poll time of each analysis
+        self.analysis_obj_by_id: Dict[str, AnalysisType] = {}
+        self.next_poll_time_by_id: Dict[str, float] = {}
+
+        # Collect args from doc strings
+        super().__init__(command_argv)
+
+    def check_args(self):
+        # Set project id
+        self.project_id = get_project_id()
+
+        # Deduplicate analyses (a user may specify both the id and the user reference)
+        for analysis_obj in self.analysis_obj_list:
+            self.analysis_obj_by_id[analysis_obj.id] = analysis_obj
+
+    def __call__(self):
+        # Initial state
+        for analysis_obj in self.analysis_obj_by_id.values():
+            self.emit_event(analysis_obj, previous_status=None)
+            self.set_next_poll_time(analysis_obj)
+
+        if self.until_terminal:
+            self.watch_until_terminal()
+
+        sys.exit(self.get_exit_code())
+
+    def watch_until_terminal(self):
+        """
+        Poll any non-terminal analyses that are due,
+        then sleep until the next analysis is due
+        """
+        while True:
+            non_terminal_analysis_ids = list(
+                filter(
+                    lambda analysis_id_iter: not is_terminal_analysis_status(
+                        self.analysis_obj_by_id[analysis_id_iter].status
+                    ),
+                    self.analysis_obj_by_id.keys()
+                )
+            )
+
+            if len(non_terminal_analysis_ids) == 0:
+                return
+
+            # Sleep until the next analysis is due
+            next_poll_time = min(
+                map(
+                    lambda analysis_id_iter: self.next_poll_time_by_id[analysis_id_iter],
+                    non_terminal_analysis_ids
+                )
+            )
+            # Read the clock once, a second read may already be past the poll time
+            time.sleep(max(0.0, next_poll_time - time.monotonic()))
+
+            due_analysis_ids = list(
+                filter(
+                    lambda analysis_id_iter: self.next_poll_time_by_id[analysis_id_iter] <= time.monotonic(),
+                    non_terminal_analysis_ids
+                )
+            )
+
+            for analysis_id, analysis_obj, exc in run_concurrently_as_completed(
+                lambda analysis_id_iter: get_analysis_obj_from_analysis_id(
+                    project_id=self.project_id,
+                    analysis_id=analysis_id_iter
+                ),
+                due_analysis_ids
+            ):
+                if exc is not None:
+                    # Try again at the next interval
+                    logger.warning(f"Could not get the status of analysis {analysis_id}, will retry: {exc}")
+                    self.set_next_poll_time(self.analysis_obj_by_id[analysis_id])
+                    continue
+
+                previous_status = self.analysis_obj_by_id[analysis_id].status
+                self.analysis_obj_by_id[analysis_id] = analysis_obj
+                if not analysis_obj.status == previous_status:
+                    self.emit_event(analysis_obj, previous_status=previous_status)
+                self.set_next_poll_time(analysis_obj)
+
+    def set_next_poll_time(self, analysis_obj: AnalysisType):
+        if is_terminal_analysis_status(analysis_obj.status):
+            return
+        self.next_poll_time_by_id[analysis_obj.id] = (
+            time.monotonic() +
+            ANALYSIS_STATUS_POLL_INTERVAL_SECONDS[ProjectAnalysisStatus(analysis_obj.status)]
+        )
+
+    @staticmethod
+    def emit_event(analysis_obj: AnalysisType, previous_status: Optional[str]):
+        print(
+            json.dumps(
+                {
+                    "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "analysis_id": analysis_obj.id,
+                    "user_reference": analysis_obj.user_reference,
+                    "previous_status": previous_status,
+                    "status": analysis_obj.status
+                }
+            ),
+            flush=True
+        )
+
+    def get_exit_code(self) -> int:
+        statuses = list(
+            map(
+                lambda analysis_obj_iter: analysis_obj_iter.status,
+                self.analysis_obj_by_id.values()
+            )
+        )
+
+        if any(
+            map(
+                lambda status_iter: (
+                    is_terminal_analysis_status(status_iter) and
+                    not ProjectAnalysisStatus(status_iter) == ProjectAnalysisStatus.SUCCEEDED
+                ),
+                statuses
+            )
+        ):
+            return WATCH_EXIT_CODE_FAILED
+
+        if not all(map(is_terminal_analysis_status, statuses)):
+            return WATCH_EXIT_CODE_NOT_TERMINAL
+
+        return WATCH_EXIT_CODE_SUCCEEDED
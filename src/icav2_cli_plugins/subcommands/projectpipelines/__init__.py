@@ -31,6 +31,7 @@ Plugin Commands:
   update                                   Update a projectpipeline
   download                                 Download a projectpipeline to a zip file
   release                                  Release a projectpipeline
+  lifecycle                                Release or deprecate many projectpipelines at once
 
 Flags:
   -h, --help   help for projectpipelines
@@ -67,6 +68,8 @@ Use "icav2 projectpipelines [command] --help" for more information about a comma
             from .download_pipeline import ProjectPipelinesDownload as subcommand
         elif cmd == "release":
             from .release_pipeline import ProjectPipelineReleasePipeline as subcommand
+        elif cmd == "lifecycle":
+            from .pipelines_lifecycle import ProjectPipelinesLifecycle as subcommand
         else:
             print(self.__doc__)
             print(f"Could not find cmd \"{cmd}\". Please refer to usage above")
@@ -13,9 +13,10 @@ Create technical tags for
 import json
 import os
 import shutil
+import sys
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Optional
+from typing import Optional, List, Dict, Tuple
 import requests
 
 # Wrapica imports
@@ -27,13 +28,17 @@ from wrapica.project_pipelines import (
 from wrapica.project_pipelines import ProjectPipeline
 
 # Utils
+from ...utils.concurrency_helpers import run_concurrently_as_completed, call_with_retries
 from ...utils.errors import InvalidArgumentError
-from ...utils.config_helpers import get_project_id
+from ...utils.config_helpers import (
+    get_project_id, get_tenant, get_icav2_base_url, get_libicav2_configuration
+)
 from ...utils.gh_helpers import (
     download_zipped_workflow_from_github_release,
     get_release_repo_and_tag_from_release_url
 )
 from ...utils.logger import get_logger
+from ...utils.tenant_helpers import tenant_context, get_project_ids_from_project_names_or_ids_curl
 
 # Local imports
 from .. import Command, DocOptArg
@@ -48,15 +53,30 @@ class ProjectPipelinesCreateCWLWorkflowFromGitHubRelease(Command):
     icav2 projectpipelines create-cwl-pipeline-from-github-release help
     icav2 projectpipelines create-cwl-pipeline-from-github-release <github_release_url>
                                                                    [--analysis-storage=<analysis_storage_id_or_size>]
+                                                                   [--project=<project_name_or_id>]...
+                                                                   [--max-workers=<max_workers>]
                                                                    [--json]
 
 Description:
     From a GitHub release, deploy a workflow to ICAv2
 
+    The release is downloaded once and may be deployed to multiple projects (in multiple tenants)
+    by specifying --project multiple times.
+    Projects are prefixed with the tenant name and a slash (i.e my-tenant/my-project) to deploy to a project
+    in a tenant other than the current tenant.  Tenants must first be registered with 'icav2 tenants init'.
+
+    Tenants are deployed to one at a time, the projects within a tenant are deployed to concurrently.
+
 Options:
     <github_release_url>                               Required, path to GitHub release url
     --analysis-storage=<analysis_storage_id_or_size>   Optional, analysis storage id or size [default: Small]
-    --json                                             Optional, write pipeline id and code to stdout in json format
+    --project=<project_name_or_id>                     Optional, the project (name or id) to deploy to,
+                                                       may be prefixed by a tenant name, i.e my-tenant/my-project.
+                                                       May be specified multiple times, defaults to the current project
+    --max-workers=<max_workers>                        Optional, the number of projects (per tenant) to deploy to at once (default 8)
+    --json                                             Optional, write pipeline id and code to stdout in json format,
+                                                       when --project is specified, a list with one element per project is written,
+                                                       each element also has the tenant name, project id and any error
 
 Environment variables:
     ICAV2_BASE_URL           Optional, default set as https://ica.illumina.com/ica/rest
@@ -68,10 +88,13 @@ Requirements:
 
 Example:
     icav2 projectpipelines create-cwl-pipeline-from-github-release https://github.com/umccr/cwl-ica/releases/tag/dragen-pon-qc/3.9.3__221221152834 --analysis-storage-size Small
+    icav2 projectpipelines create-cwl-pipeline-from-github-release https://github.com/umccr/cwl-ica/releases/tag/dragen-pon-qc/3.9.3__221221152834 --project development --project umccr-prod/production --json
     """
 
     github_release_url: Optional[str]
     analysis_storage_obj: Optional[AnalysisStorageType]
+    project_list: Optional[List[str]]
+    max_workers: Optional[int]
     is_output_json: Optional[bool]
 
     def __init__(self, command_argv):
@@ -83,6 +106,12 @@ Example:
             "analysis_storage_obj": DocOptArg(
                 cli_arg_keys=["--analysis-storage"],
             ),
+            "project_list": DocOptArg(
+                cli_arg_keys=["--project"],
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
             "is_output_json": DocOptArg(
                 cli_arg_keys=["--json"]
             )
@@ -102,6 +131,10 @@ Example:
         self.project_id: Optional[str] = None
         self.pipeline_obj: Optional[ProjectPipeline] = None
 
+        # The (tenant name, project name or id) pairs to deploy to, a tenant name of None is the current tenant
+        self.targets: Optional[List[Tuple[Optional[str], str]]] = None
+        self.deployments: Optional[List[Dict]] = None
+
         # Get the input template based on the cwl object
         self.params_xml_file: Optional[Path] = None  #
 
@@ -137,21 +170,136 @@ Example:
         # Generate html file through pandoc
         # html_doc = generate_standalone_html_through_pandoc(markdown_path)
 
-        # Create output file from zipped workflow apth
-        self.pipeline_obj = create_cwl_workflow_from_zip(
-            project_id=self.project_id,
+        if self.project_list is None:
+            # Create output file from zipped workflow apth
+            self.pipeline_obj = self.create_pipeline(self.project_id)
+            logger.info(
+                f"Successfully created pipeline with "
+                f"pipeline id '{self.pipeline_obj.pipeline.id}' and "
+                f"pipeline code '{self.pipeline_obj.pipeline.code}'"
+            )
+
+            if self.is_output_json:
+                self.print_to_stdout()
+            return
+
+        # Deploy the (already downloaded) release to each project
+        self.deployments = []
+        for tenant_name in dict.fromkeys(map(lambda target_iter: target_iter[0], self.targets)):
+            self.deployments.extend(
+                self.deploy_to_tenant(
+                    tenant_name,
+                    list(
+                        map(
+                            lambda target_iter: target_iter[1],
+                            filter(lambda target_iter: target_iter[0] == tenant_name, self.targets)
+                        )
+                    )
+                )
+            )
+
+        if self.is_output_json:
+            print(json.dumps(self.deployments, indent=2))
+
+        if any(map(lambda deployment_iter: deployment_iter["error"] is not None, self.deployments)):
+            sys.exit(1)
+
+    def create_pipeline(self, project_id: str) -> ProjectPipeline:
+        return create_cwl_workflow_from_zip(
+            project_id=project_id,
             pipeline_code=self.zipped_workflow_path.stem.replace(".", "_"),
             zip_path=self.zipped_workflow_path,
             workflow_description=self.description
         )
-        logger.info(
-            f"Successfully created pipeline with "
-            f"pipeline id '{self.pipeline_obj.pipeline.id}' and "
-            f"pipeline code '{self.pipeline_obj.pipeline.code}'"
+
+    def deploy_to_tenant(self, tenant_name: Optional[str], project_name_or_id_list: List[str]) -> List[Dict]:
+        """
+        Deploy the pipeline to each project in a tenant concurrently.
+        The tenant environment is process wide so we only switch tenants between pools.
+        :param tenant_name:
+        :param project_name_or_id_list:
+        :return:
+        """
+        if tenant_name is None:
+            tenant_name = get_tenant(raise_if_not_found=False)
+            return self.deploy_to_projects(tenant_name, project_name_or_id_list)
+
+        with tenant_context(tenant_name):
+            return self.deploy_to_projects(tenant_name, project_name_or_id_list)
+
+    def deploy_to_projects(self, tenant_name: Optional[str], project_name_or_id_list: List[str]) -> List[Dict]:
+        deployments = []
+
+        try:
+            project_id_map = get_project_ids_from_project_names_or_ids_curl(
+                base_url=get_icav2_base_url(tenant_name=tenant_name),
+                project_name_or_id_list=project_name_or_id_list,
+                access_token=get_libicav2_configuration().access_token
+            )
+        except (ValueError, ChildProcessError) as exc:
+            logger.error(f"Could not resolve projects in tenant '{tenant_name}'")
+            return list(
+                map(
+                    lambda project_iter: self.get_deployment_dict(tenant_name, project_iter, None, exc),
+                    project_name_or_id_list
+                )
+            )
+
+        # Deduplicate on the resolved project id, one pipeline per project,
+        # a project may have been given by both its name and its id
+        project_id_list = list(
+            dict.fromkeys(
+                map(
+                    lambda project_iter: project_id_map[project_iter],
+                    project_name_or_id_list
+                )
+            )
         )
 
-        if self.is_output_json:
-            self.print_to_stdout()
+        if len(project_id_list) < len(project_name_or_id_list):
+            logger.info(
+                f"Deploying to {len(project_id_list)} unique projects "
+                f"from {len(project_name_or_id_list)} projects given in tenant '{tenant_name}'"
+            )
+
+        # Creating a pipeline is not idempotent, a 5xx may still have created it,
+        # so we only retry when we've been explicitly rate limited
+        for project_id, pipeline_obj, exc in run_concurrently_as_completed(
+            lambda project_id_iter: call_with_retries(
+                lambda: self.create_pipeline(project_id_iter),
+                retryable_status_codes=[429]
+            ),
+            project_id_list,
+            max_workers=self.max_workers
+        ):
+            if exc is not None:
+                logger.error(f"Could not create pipeline in project '{project_id}': {exc}")
+            else:
+                logger.info(
+                    f"Successfully created pipeline in project '{project_id}' with "
+                    f"pipeline id '{pipeline_obj.pipeline.id}' and "
+                    f"pipeline code '{pipeline_obj.pipeline.code}'"
+                )
+            deployments.append(
+                self.get_deployment_dict(tenant_name, project_id, pipeline_obj, exc)
+            )
+
+        return deployments
+
+    @staticmethod
+    def get_deployment_dict(
+            tenant_name: Optional[str],
+            project_id: str,
+            pipeline_obj: Optional[ProjectPipeline],
+            exc: Optional[Exception]
+    ) -> Dict:
+        return {
+            "tenant_name": tenant_name,
+            "project_id": project_id,
+            "pipeline_id": pipeline_obj.pipeline.id if pipeline_obj is not None else None,
+            "pipeline_code": pipeline_obj.pipeline.code if pipeline_obj is not None else None,
+            "error": str(exc).splitlines()[0] if exc is not None else None
+        }
 
     def __exit__(self):
         # Delete tmp file
@@ -159,8 +307,24 @@ Example:
         os.remove(self.params_xml_file)
 
     def check_args(self):
-        # Check we can get project id
-        self.project_id = get_project_id()
+        # Check we can get project id (only required if we're deploying to the current project)
+        self.project_id = get_project_id(raise_if_not_found=self.project_list is None)
+
+        # Split any tenant names from the projects
+        if self.project_list is not None:
+            self.targets = list(
+                map(
+                    lambda project_iter: (
+                        tuple(project_iter.split("/", 1))
+                        if "/" in project_iter
+                        else (None, project_iter)
+                    ),
+                    self.project_list
+                )
+            )
+            if any(map(lambda target_iter: target_iter[0] == "" or target_iter[1] == "", self.targets)):
+                logger.error("--project should be either <project_name_or_id> or <tenant_name>/<project_name_or_id>")
+                raise InvalidArgumentError
 
         # Check GitHub release url is valid
         url_obj = requests.get(self.github_release_url)
@@ -7,6 +7,7 @@ This will create a pipeline from the nfcore pipeline
 
 Step 1. Download nfcore pipeline using nf-core-cli i.e
 nf-core download ampliseq --revision 2.8.0 --compress zip --outdir ampliseq
+(Downloads are cached per pipeline and revision so this only happens once)
 
 Step 2. Update the base.config file to cater for illumina pod like syntax
 
@@ -35,7 +36,7 @@ from wrapica.project_pipelines import (
 # Utils
 from ...utils.config_helpers import get_project_id
 from ...utils.logger import get_logger
-from ...utils.nextflow_helpers import download_nf_core_pipeline_to_zip
+from ...utils.nextflow_helpers import get_cached_nf_core_pipeline_zip
 
 # Set command
 from .. import Command, DocOptArg
@@ -51,16 +52,22 @@ class ProjectPipelinesCreateNextflowPipelineFromNfCore(Command):
     icav2 projectpipelines create-nextflow-pipeline-from-nf-core <pipeline_name>
                                                                  (--revision=<revision>)
                                                                  [--analysis-storage=<analysis_storage_id_or_size>]
+                                                                 [--no-cache]
                                                                  [--json]
 
 Description:
     Deploy an nf-core workflow as an ICAv2 Pipeline.
 
+    The nf-core download is cached under the icav2 cli plugins cache directory per pipeline and revision,
+    so deploying the same pipeline revision to several projects only downloads it once.
+    Use --no-cache to download the pipeline again, i.e if the revision is a branch rather than a release.
+
 Options:
     <pipeline_name>                                    Required, the pipeline core, use `nf-core list`
                                                        to get the list of pipelines
     --revision=<revision>                              Required, the revision of the pipeline.
     --analysis-storage=<analysis_storage_id_or_size>   Optional, analysis storage id or size [default: Small]
+    --no-cache                                         Optional, download the pipeline even if it is already in the cache
     --json                                             Optional, write pipeline id and code to stdout in json format
 
 
@@ -81,6 +88,7 @@ Example:
     pipeline_name: str
     revision: str
     analysis_storage: Optional[AnalysisStorageType]
+    no_cache: Optional[bool]
     is_output_json: Optional[bool]
 
     def __init__(self, command_argv):
@@ -95,6 +103,9 @@ Example:
             "analysis_storage": DocOptArg(
                 cli_arg_keys=["--analysis-storage"],
             ),
+            "no_cache": DocOptArg(
+                cli_arg_keys=["--no-cache"]
+            ),
             "is_output_json": DocOptArg(
                 cli_arg_keys=["--json"]
             )
@@ -206,8 +217,12 @@ Example:
         )
 
     def download_nf_core_pipeline_to_zip(self):
-        download_nf_core_pipeline_to_zip(
-            pipeline_name=self.pipeline_name,
-            pipeline_revision=self.revision,
-            output_zip_path=self.zipped_workflow_path
+        # Copy out of the cache, so that any changes made to the zip on upload don't make their way back into the cache
+        shutil.copyfile(
+            get_cached_nf_core_pipeline_zip(
+                pipeline_name=self.pipeline_name,
+                pipeline_revision=self.revision,
+                use_cache=not self.no_cache
+            ),
+            self.zipped_workflow_path
         )
@@ -10,8 +10,7 @@ Given a pipeline id or pipeline code, create a wes input template that comprises
 
 # Standard imports
 import sys
-from tempfile import NamedTemporaryFile
-from typing import Optional, List
+from typing import Optional, List, Dict
 from urllib.parse import urlparse
 from ruamel.yaml import YAML, CommentedMap
 from pathlib import Path
@@ -23,9 +22,6 @@ from wrapica.utils.cwl_typing_helpers import WorkflowType
 from wrapica.project_pipelines import (
     ProjectPipeline,
 )
-from wrapica.pipelines import (
-    get_cwl_obj_from_pipeline_id
-)
 from wrapica.utils.cwl_helpers import (
     create_template_from_workflow_inputs,
     get_overrides_from_workflow_steps
@@ -38,9 +34,12 @@ from wrapica.utils.nextflow_helpers import (
 )
 
 # From utils
+from ...utils.concurrency_helpers import run_concurrently_as_completed
+from ...utils.cwl_helpers import get_cwl_obj_from_pipeline_id
 from ...utils.errors import InvalidArgumentError
 from ...utils.config_helpers import get_project_id
 from ...utils.logger import get_logger
+from ...utils.nextflow_helpers import get_cached_pipeline_schema_file
 
 # Locals
 from .. import Command, DocOptArg
@@ -48,6 +47,9 @@ from .. import Command, DocOptArg
 # Get logger
 logger = get_logger()
 
+NEXTFLOW_SCHEMA_FILE_NAME = "nextflow_schema.json"
+NEXTFLOW_SCHEMA_INPUT_FILE_NAME = "schema_input.json"
+
 
 class ProjectPipelinesCreateWESInputTemplate(Command):
     """Usage:
@@ -118,6 +120,9 @@ Description:
     When values are populated into this dict and launched via start-wes, the samplesheet input will be uploaded to the cache directory before the pipeline is run.
     Any attributes in the samplesheet input that are icav2 uris will first be presigned before being uploaded to the cache directory.
 
+    The nextflow schema files of a pipeline are cached in $ICAV2_CLI_PLUGINS_HOME/cache/pipelines/
+    until the pipeline is next modified.
+
 
 Options:
     --pipeline=<pipeline_id_or_code>                         Optional, id (or code) of the pipeline you wish to launch
@@ -232,6 +237,9 @@ Example:
         self.workflow_language: Optional[WorkflowLanguage] = None
         self.cwl_obj: Optional[WorkflowType] = None
 
+        # Nextflow schema files, by file name
+        self.nextflow_schema_file_paths: Dict[str, Path] = {}
+
         super().__init__(command_argv)
 
     def __call__(self):
@@ -265,29 +273,24 @@ Example:
         else:
             # FIXME - provide alternative way if the
             # FIXME - workflow is 'private' and we cannot get the schema from a file
-            # Download the schema json file from the pipeline object
-            schema_json_file_tmp_obj = NamedTemporaryFile(delete=False, prefix='nextflow_schema', suffix=".json")
-            schema_json_file_path = Path(schema_json_file_tmp_obj.name)
-            download_nextflow_schema_file_from_pipeline_id(
-                pipeline_id=self.pipeline_obj.pipeline.id,
-                schema_json_path=schema_json_file_path
-            )
+            # Get the schema json file from the pipeline object
+            self.set_nextflow_schema_file_paths()
 
             # Generate the input template from the schema json file
-            nf_yaml_template = generate_input_yaml_from_schema_json(schema_json_file_path)
+            nf_yaml_template = generate_input_yaml_from_schema_json(
+                self.nextflow_schema_file_paths[NEXTFLOW_SCHEMA_FILE_NAME]
+            )
 
             # Update the samplesheet_input attribute to be a dict instead of a file
             if "input" in nf_yaml_template.keys():
-                schema_input_json_file_tmp_obj = NamedTemporaryFile(delete=False, prefix='schema_input', suffix=".json")
-                schema_input_json_file_path = Path(schema_input_json_file_tmp_obj.name)
-                download_nextflow_schema_input_json_from_pipeline_id(
-                    pipeline_id=self.pipeline_obj.pipeline.id,
-                    schema_input_json_path=schema_input_json_file_path
-                )
+                if NEXTFLOW_SCHEMA_INPUT_FILE_NAME not in self.nextflow_schema_file_paths:
+                    self.nextflow_schema_file_paths[NEXTFLOW_SCHEMA_INPUT_FILE_NAME] = self.get_nextflow_schema_file(
+                        NEXTFLOW_SCHEMA_INPUT_FILE_NAME
+                    )
                 # Rename input to samplesheet_input
                 _ = nf_yaml_template.pop("input")
                 nf_yaml_template["samplesheet_input"] = generate_samplesheet_yaml_template_from_schema_input(
-                    schema_input_json_file_path
+                    self.nextflow_schema_file_paths[NEXTFLOW_SCHEMA_INPUT_FILE_NAME]
                 )
                 nf_yaml_template.yaml_set_comment_before_after_key(
                     key="samplesheet_input",
@@ -298,6 +301,54 @@ Example:
             # Return the nextflow yaml template
             return nf_yaml_template
 
+    def get_nextflow_schema_file(self, file_name: str) -> Path:
+        """
+        Get a nextflow schema file for the pipeline, from the cache if the pipeline has not been modified since
+        Args:
+            file_name: One of NEXTFLOW_SCHEMA_FILE_NAME or NEXTFLOW_SCHEMA_INPUT_FILE_NAME
+
+        Returns:
+
+        """
+        if file_name == NEXTFLOW_SCHEMA_FILE_NAME:
+            downloader = lambda pipeline_id_iter, file_path_iter: download_nextflow_schema_file_from_pipeline_id(
+                pipeline_id=pipeline_id_iter,
+                schema_json_path=file_path_iter
+            )
+        else:
+            downloader = lambda pipeline_id_iter, file_path_iter: download_nextflow_schema_input_json_from_pipeline_id(
+                pipeline_id=pipeline_id_iter,
+                schema_input_json_path=file_path_iter
+            )
+
+        return get_cached_pipeline_schema_file(
+            pipeline_id=self.pipeline_obj.pipeline.id,
+            time_modified=str(self.pipeline_obj.pipeline.time_modified),
+            file_name=file_name,
+            downloader=downloader,
+            # Not all pipelines have a schema input file
+            is_optional=file_name == NEXTFLOW_SCHEMA_INPUT_FILE_NAME
+        )
+
+    def set_nextflow_schema_file_paths(self):
+        """
+        Get the nextflow schema file, if it is not already cached, we also fetch the schema input file at the same time
+        since we don't know if we need it until we've parsed the schema file.
+        A failure to fetch the schema input file is ignored here, it is fetched again if required.
+        Returns:
+
+        """
+        for file_name, file_path, exc in run_concurrently_as_completed(
+            self.get_nextflow_schema_file,
+            [NEXTFLOW_SCHEMA_FILE_NAME, NEXTFLOW_SCHEMA_INPUT_FILE_NAME],
+        ):
+            if exc is not None:
+                if file_name == NEXTFLOW_SCHEMA_FILE_NAME:
+                    raise exc
+                logger.debug(f"Could not get {file_name} for pipeline {self.pipeline_obj.pipeline.id}: {exc}")
+                continue
+            self.nextflow_schema_file_paths[file_name] = file_path
+
     def get_cwltool_overrides_as_commented_map(self) -> CommentedMap:
         self.cwl_obj: WorkflowType
         return CommentedMap(get_overrides_from_workflow_steps(self.cwl_obj.steps))
@@ -317,7 +368,10 @@ Example:
         self.workflow_language = WorkflowLanguage(self.pipeline_obj.pipeline.language)
 
         if self.workflow_language == WorkflowLanguage.CWL:
-            self.cwl_obj = get_cwl_obj_from_pipeline_id(self.pipeline_obj.pipeline.id)
+            self.cwl_obj = get_cwl_obj_from_pipeline_id(
+                pipeline_id=self.pipeline_obj.pipeline.id,
+                time_modified=str(self.pipeline_obj.pipeline.time_modified)
+            )
 
         # Get yaml path
         if self.output_template_yaml_path is None or self.output_template_yaml_path == "-":
@@ -6,9 +6,11 @@ Launch a workflow through CWL WES
 
 # External data
 import json
+import sys
 from collections import OrderedDict
 from tempfile import NamedTemporaryFile
-from typing import Optional, List, Union, Dict
+from typing import Optional, List, Union, Dict, Tuple
+from urllib.parse import urlparse
 from ruamel.yaml import YAML
 from pathlib import Path
 
@@ -32,9 +34,14 @@ from wrapica.utils.nextflow_helpers import generate_samplesheet_file_from_input_
     download_nextflow_schema_input_json_from_pipeline_id
 
 # Get utils
+from ...utils.concurrency_helpers import (
+    run_concurrently_as_completed, call_with_retries, Memoiser, RateLimiter, JsonlJournal
+)
 from ...utils.errors import InvalidArgumentError
 from ...utils.config_helpers import get_project_id
 from ...utils.logger import get_logger
+from ...utils.nextflow_helpers import get_cached_pipeline_schema_file
+from ...utils.projectdata_helpers import get_icav2_locations_from_inputs, validate_icav2_locations
 
 # Locals
 from .. import Command, DocOptArg
@@ -46,7 +53,7 @@ logger = get_logger()
 class ProjectPipelinesStartWES(Command):
     """Usage:
     icav2 projectpipelines start-wes help
-    icav2 projectpipelines start-wes (--launch-yaml=<launch_yaml>)
+    icav2 projectpipelines start-wes (--launch-yaml=<launch_yaml> | --batch=<runs_yaml_or_jsonl>)
                                      [--user-reference=<user_reference>]
                                      [--pipeline=<pipeline_id_or_code>]
                                      [--analysis-output=<analysis_output_uri_or_path>]
@@ -58,6 +65,11 @@ class ProjectPipelinesStartWES(Command):
                                      [--technical-tag=<technical_tag>]...
                                      [--idempotency-key=<idempotency_key>]
                                      [--create-analysis-json-output-path=<output_path>]
+                                     [--validate]
+                                     [--output-jsonl=<output_jsonl>]
+                                     [--resume]
+                                     [--max-workers=<max_workers>]
+                                     [--max-launches-per-minute=<max_launches_per_minute>]
                                      [--json]
 
 Description:
@@ -87,8 +99,27 @@ Description:
 
     These will then be mounted into your analysis at runtime.
 
+    Use --validate to check that every icav2:// location in the inputs exists (and is a file or directory as expected)
+    before launching, all missing or mistyped locations are reported at once.
+
+    Batch mode:
+    Use --batch in place of --launch-yaml to launch many analyses at once.
+    The batch file is either
+      * a jsonl file where each line is a launch yaml dict (as above) or
+      * a yaml file that is a list of launch yaml dicts, or a dict with the keys 'runs' (a list of launch yaml dicts)
+        and 'engine_parameters' (engine parameters shared by all runs).
+    Engine parameters on the CLI take precedence over those of each run, which take precedence over the shared engine parameters.
+    Each run must have a unique user_reference.
+
+    Pipelines, analysis storage and folders are resolved once and shared between runs,
+    analyses are then launched through a pool of --max-workers threads (default 8), optionally capped with --max-launches-per-minute.
+    One json object per run (user_reference, analysis_id and error) is written to --output-jsonl (or stdout) as each launch completes.
+    Rerun with --resume to skip runs that already have an analysis id in --output-jsonl, i.e after a partial failure.
+    The exit code is non-zero if any run failed to launch.
+
 Options:
-    --launch-yaml=<launch_yaml>                              Required, input json similar to v1
+    --launch-yaml=<launch_yaml>                              Required (unless --batch is set), input json similar to v1
+    --batch=<runs_yaml_or_jsonl>                             Required (unless --launch-yaml is set), a yaml or jsonl file of launch yaml dicts
 
     --user-reference=<user_reference>                        Optional, user reference for the analysis
                                                              Must either specify user reference on the CLI or in the launch yaml
@@ -126,17 +157,29 @@ Options:
     --create-analysis-json-output-path=<output_path>         Optional, Path to output a json file that contains the body for
                                                              a create analysis (https://ica.illumina.com/ica/api/swagger/index.html#/Project%20Analysis/createCwlAnalysis)
                                                              Useful for reproducibility and debugging
+                                                             Not supported alongside --batch
+    --validate                                               Optional, check all icav2:// input locations exist before launching
     --json                                                   Optional, Write json to stdout, useful for debugging
 
+    Batch options:
+    --output-jsonl=<output_jsonl>                            Optional, write the result of each run to this file rather than stdout
+    --resume                                                 Optional, skip runs already launched in --output-jsonl, requires --output-jsonl
+    --max-workers=<max_workers>                              Optional, the number of analyses to launch at once (default 8)
+    --max-launches-per-minute=<max_launches_per_minute>      Optional, cap the rate at which analyses are launched
+
 Environment:
     ICAV2_BASE_URL (optional, defaults to ica.illumina.com)
     ICAV2_PROJECT_ID (optional, taken from ~/.session.ica.yaml otherwise)
 
 Example:
-    icav2 projectpipelines start-cwl-wes --launch-yaml /path/to/input.yaml
+    icav2 projectpipelines start-wes --launch-yaml /path/to/input.yaml
+    icav2 projectpipelines start-wes --launch-yaml /path/to/input.yaml --validate
+    icav2 projectpipelines start-wes --batch /path/to/runs.jsonl --output-jsonl launched.jsonl --max-launches-per-minute 60
+    icav2 projectpipelines start-wes --batch /path/to/runs.jsonl --output-jsonl launched.jsonl --resume
     """
 
-    launch_yaml_path: Path
+    launch_yaml_path: Optional[Path]
+    batch_path: Optional[Path]
     pipeline_obj: Optional[ProjectPipeline]
     analysis_output_obj: Optional[ProjectData]
     ica_logs_obj: Optional[ProjectData]
@@ -147,6 +190,11 @@ Example:
     technical_tags: Optional[List[str]]
     reference_tags: Optional[List[str]]
     create_analysis_json_output_path: Optional[Path]
+    validate: Optional[bool]
+    output_jsonl_path: Optional[Path]
+    resume: Optional[bool]
+    max_workers: Optional[int]
+    max_launches_per_minute: Optional[int]
     is_json: Optional[bool]
 
     def __init__(self, command_argv):
@@ -154,6 +202,9 @@ Example:
             "launch_yaml_path": DocOptArg(
                 cli_arg_keys=["--launch-yaml"],
             ),
+            "batch_path": DocOptArg(
+                cli_arg_keys=["--batch"],
+            ),
             "pipeline_obj": DocOptArg(
                 cli_arg_keys=["--pipeline"],
             ),
@@ -193,6 +244,21 @@ Example:
             "create_analysis_json_output_path": DocOptArg(
                 cli_arg_keys=["--create-analysis-json-output-path"],
             ),
+            "validate": DocOptArg(
+                cli_arg_keys=["--validate"],
+            ),
+            "output_jsonl_path": DocOptArg(
+                cli_arg_keys=["--output-jsonl"],
+            ),
+            "resume": DocOptArg(
+                cli_arg_keys=["--resume"],
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
+            "max_launches_per_minute": DocOptArg(
+                cli_arg_keys=["--max-launches-per-minute"],
+            ),
             "is_json": DocOptArg(
                 cli_arg_keys=["--json"],
             ),
@@ -206,15 +272,57 @@ Example:
         self.analysis_obj: Optional[ICAv2CWLPipelineAnalysis] = None
         self.analysis_id: Optional[str] = None
 
+        # Batch parameters
+        self.launch_dict_list: Optional[List[Dict]] = None
+        self.shared_engine_parameters: Dict = {}
+
+        # Lookups shared between runs, so 500 runs don't resolve the same pipeline or create the same folder 500 times
+        self.pipeline_memoiser = Memoiser(
+            lambda pipeline_id_or_code: call_with_retries(
+                lambda: coerce_pipeline_id_or_code_to_project_pipeline_obj(pipeline_id_or_code)
+            )
+        )
+        self.analysis_storage_memoiser = Memoiser(
+            lambda analysis_storage_id_or_size: call_with_retries(
+                lambda: coerce_analysis_storage_id_or_size_to_analysis_storage(analysis_storage_id_or_size)
+            )
+        )
+        self.default_analysis_storage_memoiser = Memoiser(
+            lambda pipeline_id: call_with_retries(
+                lambda: get_default_analysis_storage_obj_from_project_pipeline(
+                    project_id=self.project_id,
+                    pipeline_id=pipeline_id
+                )
+            )
+        )
+        self.folder_memoiser = Memoiser(self.get_or_create_folder_obj)
+        self.schema_input_path_memoiser = Memoiser(self.get_schema_input_path)
+
         super().__init__(command_argv)
 
     def __call__(self):
-        self.launch_workflow()
+        if self.batch_path is not None:
+            self.launch_batch()
+        else:
+            self.launch_workflow()
 
     def check_args(self):
         # Get the project id
         self.project_id = get_project_id()
 
+        # Check if create analysis json output path is set and if parent exists
+        if self.create_analysis_json_output_path is not None:
+            if self.batch_path is not None:
+                logger.error("--create-analysis-json-output-path is not supported alongside --batch")
+                raise InvalidArgumentError
+            if not self.create_analysis_json_output_path.parent.is_dir():
+                logger.error("Please ensure the parent directory of the --create-analysis-json-output-path parameter exists")
+                raise InvalidArgumentError
+
+        if self.batch_path is not None:
+            self.check_batch_args()
+            return
+
         # Read launch yaml
         if not self.launch_yaml_path.is_file():
             logger.error(f"Could not get file {self.launch_yaml_path}")
@@ -225,114 +333,285 @@ Example:
         with open(self.launch_yaml_path, "r") as yaml_h:
             launch_yaml_dict: OrderedDict = yaml_obj.load(yaml_h)
 
+        # CLI user reference takes precedence over the launch yaml
+        if self.user_reference is not None:
+            launch_yaml_dict["user_reference"] = self.user_reference
+
+        if self.validate:
+            self.validate_inputs([launch_yaml_dict])
+
+        self.user_reference, self.pipeline_obj, self.analysis_obj = self.get_analysis_obj_from_launch_dict(
+            launch_yaml_dict
+        )
+        self.workflow_language = WorkflowLanguage(self.pipeline_obj.pipeline.language)
+
+    def check_batch_args(self):
+        if not self.batch_path.is_file():
+            logger.error(f"Could not get file {self.batch_path}")
+            raise InvalidArgumentError
+
+        # Read the batch file
+        if self.batch_path.suffix == ".jsonl":
+            with open(self.batch_path, "r") as batch_h:
+                self.launch_dict_list = list(
+                    map(
+                        lambda line_iter: json.loads(line_iter),
+                        filter(
+                            lambda line_iter: not line_iter.strip() == "",
+                            batch_h.readlines()
+                        )
+                    )
+                )
+        else:
+            yaml_obj = YAML()
+            with open(self.batch_path, "r") as batch_h:
+                batch_yaml = yaml_obj.load(batch_h)
+            if isinstance(batch_yaml, dict):
+                self.shared_engine_parameters = dict(batch_yaml.get("engine_parameters", {}))
+                self.launch_dict_list = list(batch_yaml.get("runs", []))
+            else:
+                self.launch_dict_list = list(batch_yaml)
+
+        if len(self.launch_dict_list) == 0:
+            logger.error(f"Could not find any runs in {self.batch_path}")
+            raise InvalidArgumentError
+
+        # Each run needs a unique user reference, this is how we track runs on resume
+        user_reference_list = list(
+            map(
+                lambda launch_dict_iter: launch_dict_iter.get("user_reference", None),
+                self.launch_dict_list
+            )
+        )
+        if None in user_reference_list:
+            logger.error("Every run in the batch file must have a user_reference")
+            raise InvalidArgumentError
+        if not len(set(user_reference_list)) == len(user_reference_list):
+            logger.error("Every run in the batch file must have a unique user_reference")
+            raise InvalidArgumentError
+
+        # Check resume
+        if self.resume and self.output_jsonl_path is None:
+            logger.error("--resume requires --output-jsonl")
+            raise InvalidArgumentError
+        if self.output_jsonl_path is not None:
+            if not self.output_jsonl_path.parent.is_dir():
+                logger.error("Please ensure the parent directory of the --output-jsonl parameter exists")
+                raise InvalidArgumentError
+            if self.output_jsonl_path.is_file() and not self.resume:
+                logger.error(
+                    f"{self.output_jsonl_path} already exists, "
+                    f"use --resume to skip runs already launched or specify a new --output-jsonl path"
+                )
+                raise InvalidArgumentError
+
+        if self.resume and self.output_jsonl_path.is_file():
+            launched_user_references = self.get_launched_user_references_from_output_jsonl()
+            self.launch_dict_list = list(
+                filter(
+                    lambda launch_dict_iter: launch_dict_iter["user_reference"] not in launched_user_references,
+                    self.launch_dict_list
+                )
+            )
+            logger.info(
+                f"Skipping {len(launched_user_references)} runs already launched, "
+                f"{len(self.launch_dict_list)} runs remaining"
+            )
+
+        if self.validate:
+            self.validate_inputs(self.launch_dict_list)
+
+    def validate_inputs(self, launch_dict_list: List[Dict]):
+        """
+        Check every icav2 location in the inputs of each launch dict in one pass
+        :param launch_dict_list:
+        :return:
+        """
+        locations = []
+        for launch_dict in launch_dict_list:
+            locations.extend(
+                get_icav2_locations_from_inputs(
+                    launch_dict.get("inputs", None) or {},
+                    key_path=(
+                        f"{launch_dict.get('user_reference', None)}.inputs"
+                        if self.batch_path is not None
+                        else "inputs"
+                    )
+                )
+            )
+
+        logger.info(f"Validating {len(locations)} icav2 input locations")
+        invalid_locations = validate_icav2_locations(locations, max_workers=self.max_workers)
+
+        for invalid_location in invalid_locations:
+            logger.error(
+                f"{invalid_location['key']}: '{invalid_location['location']}' {invalid_location['error']}"
+            )
+        if len(invalid_locations) > 0:
+            logger.error(f"{len(invalid_locations)} of {len(locations)} icav2 input locations failed validation")
+            raise InvalidArgumentError
+
+    def get_launched_user_references_from_output_jsonl(self) -> List[str]:
+        return list(
+            map(
+                lambda run_result_iter: run_result_iter["user_reference"],
+                filter(
+                    lambda run_result_iter: run_result_iter.get("analysis_id", None) is not None,
+                    JsonlJournal.read(self.output_jsonl_path)
+                )
+            )
+        )
+
+    @staticmethod
+    def get_parent_folder_uri_or_path(folder_uri_or_path: str) -> Optional[str]:
+        """
+        Get the parent folder of an icav2 uri or absolute path, or None if the parent is the root
+        (or we have a folder id and so cannot tell)
+        :param folder_uri_or_path:
+        :return:
+        """
+        if folder_uri_or_path.startswith("icav2://"):
+            folder_uri_obj = urlparse(folder_uri_or_path)
+            parent_path = Path(folder_uri_obj.path).parent
+            if parent_path == Path("/"):
+                return None
+            return f"icav2://{folder_uri_obj.netloc}{parent_path}/"
+        if folder_uri_or_path.startswith("/"):
+            parent_path = Path(folder_uri_or_path).parent
+            if parent_path == Path("/"):
+                return None
+            return f"{parent_path}/"
+        return None
+
+    def get_or_create_folder_obj(self, folder_uri_or_path: str) -> ProjectData:
+        """
+        Resolve (creating if necessary) a folder, called through self.folder_memoiser.
+
+        We resolve the parent first (again through the memoiser) so that runs writing to sibling folders
+        don't race to create the same parent folder
+        :param folder_uri_or_path:
+        :return:
+        """
+        parent_folder_uri_or_path = self.get_parent_folder_uri_or_path(folder_uri_or_path)
+        if parent_folder_uri_or_path is not None:
+            _ = self.folder_memoiser(parent_folder_uri_or_path)
+
+        return call_with_retries(
+            lambda: coerce_data_id_uri_or_path_to_project_data_obj(
+                folder_uri_or_path,
+                create_data_if_not_found=True
+            )
+        )
+
+    @staticmethod
+    def get_schema_input_path(pipeline_id_and_time_modified: Tuple[str, str]) -> Path:
+        """
+        Get the path to the schema input json for a pipeline, called through self.schema_input_path_memoiser.
+        The file itself is cached on disk until the pipeline is next modified
+        :param pipeline_id_and_time_modified:
+        :return:
+        """
+        pipeline_id, time_modified = pipeline_id_and_time_modified
+        return get_cached_pipeline_schema_file(
+            pipeline_id=pipeline_id,
+            time_modified=time_modified,
+            file_name="schema_input.json",
+            downloader=lambda pipeline_id_iter, file_path_iter: download_nextflow_schema_input_json_from_pipeline_id(
+                pipeline_id=pipeline_id_iter,
+                schema_input_json_path=file_path_iter
+            ),
+            is_optional=True
+        )
+
+    def get_engine_parameter(self, launch_dict: Dict, key: str):
+        """
+        Run engine parameters take precedence over the batch shared engine parameters
+        :param launch_dict:
+        :param key:
+        :return:
+        """
+        return launch_dict.get("engine_parameters", {}).get(
+            key,
+            self.shared_engine_parameters.get(key, None)
+        )
+
+    def get_tags_list(self, launch_dict: Dict, cli_tags: Optional[List], key: str) -> List[Union[str, Dict]]:
+        tags_list = list(cli_tags) if cli_tags is not None else []
+        tags_yaml: List[Union[str, Dict]] | None = self.get_engine_parameter(launch_dict, key)
+        if tags_yaml is not None:
+            tags_list.extend(tags_yaml)
+        return tags_list
+
+    def get_analysis_obj_from_launch_dict(
+            self,
+            launch_yaml_dict: Dict
+    ) -> Tuple[str, ProjectPipeline, ICAv2CWLPipelineAnalysis]:
+        """
+        Generate the analysis object from a launch yaml dict.
+        Parameters set on the CLI take precedence over those in the launch yaml dict
+        :param launch_yaml_dict:
+        :return: The user reference, the pipeline object and the analysis object
+        """
         # Get the pipeline object
-        if self.pipeline_obj is None:
+        pipeline_obj = self.pipeline_obj
+        if pipeline_obj is None:
             # Get the pipeline object from the launch yaml engine parameters
-            pipeline_yaml: str | None = launch_yaml_dict.get("engine_parameters", {}).get("pipeline", None)
+            pipeline_yaml: str | None = self.get_engine_parameter(launch_yaml_dict, "pipeline")
             if pipeline_yaml is None:
                 logger.error("Pipeline not specified on cli or in the launch yaml")
                 raise InvalidArgumentError
 
-            self.pipeline_obj = coerce_pipeline_id_or_code_to_project_pipeline_obj(
-                pipeline_yaml
-            )
+            pipeline_obj = self.pipeline_memoiser(pipeline_yaml)
 
         # Get pipeline workflow type
-        self.workflow_language = WorkflowLanguage(self.pipeline_obj.pipeline.language)
+        workflow_language = WorkflowLanguage(pipeline_obj.pipeline.language)
 
-        # Set the user reference
-        if self.user_reference is None:
-            # Get the user reference from the launch yaml
-            user_reference_yaml: str | None = launch_yaml_dict.get("user_reference", None)
-            if user_reference_yaml is None:
-                logger.error("User reference not specified on the cli or in the launch yaml")
-                raise InvalidArgumentError
-            self.user_reference = user_reference_yaml
+        # Get the user reference from the launch yaml
+        user_reference: str | None = launch_yaml_dict.get("user_reference", None)
+        if user_reference is None:
+            logger.error("User reference not specified on the cli or in the launch yaml")
+            raise InvalidArgumentError
 
         # Get the analysis output
-        if self.analysis_output_obj is None:
+        analysis_output_obj = self.analysis_output_obj
+        if analysis_output_obj is None:
             # Get the pipeline object from the launch yaml engine parameters
-            analysis_output_yaml: str | None = launch_yaml_dict.get("engine_parameters", {}).get("analysis_output", None)
+            analysis_output_yaml: str | None = self.get_engine_parameter(launch_yaml_dict, "analysis_output")
             if analysis_output_yaml is None:
                 logger.error("Analysis Output not specified on cli or in the launch yaml")
                 raise InvalidArgumentError
 
-            self.analysis_output_obj = coerce_data_id_uri_or_path_to_project_data_obj(
-                analysis_output_yaml,
-                create_data_if_not_found=True
-            )
+            analysis_output_obj = self.folder_memoiser(analysis_output_yaml)
 
         # Get the ica logs
-        if self.ica_logs_obj is None:
+        ica_logs_obj = self.ica_logs_obj
+        if ica_logs_obj is None:
             # Get the pipeline object from the launch yaml engine parameters
-            ica_logs_yaml: str | None = launch_yaml_dict.get("engine_parameters", {}).get("ica_logs", None)
+            ica_logs_yaml: str | None = self.get_engine_parameter(launch_yaml_dict, "ica_logs")
             if ica_logs_yaml is None:
                 logger.error("ICA Logs not specified on cli or in the launch yaml")
                 raise InvalidArgumentError
 
-            self.ica_logs_obj = coerce_data_id_uri_or_path_to_project_data_obj(
-                ica_logs_yaml,
-                create_data_if_not_found=True
-            )
+            ica_logs_obj = self.folder_memoiser(ica_logs_yaml)
 
-        if self.cache_obj is None and self.workflow_language == WorkflowLanguage.NEXTFLOW:
+        cache_obj = self.cache_obj
+        if cache_obj is None and workflow_language == WorkflowLanguage.NEXTFLOW:
             # Get the pipeline object from the launch yaml engine parameters
-            cache_yaml: str | None = launch_yaml_dict.get("engine_parameters", {}).get("cache", None)
+            cache_yaml: str | None = self.get_engine_parameter(launch_yaml_dict, "cache")
             if cache_yaml is None:
                 logger.error("Cache not specified on cli or in the launch yaml")
                 raise InvalidArgumentError
 
-            self.cache_obj = coerce_data_id_uri_or_path_to_project_data_obj(
-                cache_yaml,
-                create_data_if_not_found=True
-            )
+            cache_obj = self.folder_memoiser(cache_yaml)
 
         # Get the analysis storage
-        if self.analysis_storage_obj is None:
-            analysis_storage_yaml: str | None = launch_yaml_dict.get("engine_parameters", {}).get("analysis_storage", None)
+        analysis_storage_obj = self.analysis_storage_obj
+        if analysis_storage_obj is None:
+            analysis_storage_yaml: str | None = self.get_engine_parameter(launch_yaml_dict, "analysis_storage")
             if analysis_storage_yaml is None:
-                self.analysis_storage_obj = get_default_analysis_storage_obj_from_project_pipeline(
-                    project_id=self.project_id,
-                    pipeline_id=self.pipeline_obj.pipeline.id
-                )
+                analysis_storage_obj = self.default_analysis_storage_memoiser(pipeline_obj.pipeline.id)
             else:
-                self.analysis_storage_obj = coerce_analysis_storage_id_or_size_to_analysis_storage(
-                    analysis_storage_yaml
-                )
-
-        # Check if activation ID is set?
-        if self.activation_id is None:
-
-            activation_id_yaml: str | None = launch_yaml_dict.get("engine_parameters", {}).get("activation_id", None)
-            if activation_id_yaml is None:
-                self.activation_id = activation_id_yaml
-
-        # Check if user tags are set in the launch yaml
-        if self.user_tags is None:
-            self.user_tags = []
-        user_tags_yaml: List[Union[str, Dict]] | None = launch_yaml_dict.get("engine_parameters", {}).get("user_tags", None)
-        if user_tags_yaml is not None:
-            self.user_tags.extend(user_tags_yaml)
-
-        # Check if technical tags are set in the launch yaml
-        if self.technical_tags is None:
-            self.technical_tags = []
-        technical_tags_yaml: List[Union[str, Dict]] | None = launch_yaml_dict.get("engine_parameters", {}).get("technical_tags", None)
-        if technical_tags_yaml is not None:
-            self.technical_tags.extend(technical_tags_yaml)
-
-        # Check if technical tags are set in the launch yaml
-        if self.reference_tags is None:
-            self.reference_tags = []
-        reference_tags_yaml: List[Union[str, Dict]] | None = launch_yaml_dict.get("engine_parameters", {}).get("reference_tags", None)
-        if reference_tags_yaml is not None:
-            self.reference_tags.extend(reference_tags_yaml)
-
-        # Check if create analysis json output path is set and if parent exists
-        if self.create_analysis_json_output_path is not None:
-            if not self.create_analysis_json_output_path.parent.is_dir():
-                logger.error("Please ensure the parent directory of the --create-analysis-json-output-path parameter exists")
-                raise InvalidArgumentError
+                analysis_storage_obj = self.analysis_storage_memoiser(analysis_storage_yaml)
 
         # Collect Dict
         inputs_dict: Dict | None = launch_yaml_dict.get("inputs", None)
@@ -341,50 +620,51 @@ Example:
             raise InvalidArgumentError
 
         # Generate input launch json
-        if self.workflow_language == WorkflowLanguage.CWL:
+        if workflow_language == WorkflowLanguage.CWL:
             # Initialise the analysis
             from wrapica.project_pipelines import ICAv2CWLPipelineAnalysis as ICAv2PipelineAnalysis
             # Check if the cwltool_overrides are set in the launch yaml - if so extend them into the inputs dict
-            if "cwltool_overrides" in launch_yaml_dict.get("engine_parameters", {}):
+            cwltool_overrides = self.get_engine_parameter(launch_yaml_dict, "cwltool_overrides")
+            if cwltool_overrides is not None:
                 inputs_dict.update(
                     {
-                        "cwltool:overrides": launch_yaml_dict.get("engine_parameters", {}).get("cwltool_overrides")
+                        "cwltool:overrides": cwltool_overrides
                     }
                 )
 
-            self.analysis_input_obj: ICAv2CwlAnalysisJsonInput = ICAv2CwlAnalysisJsonInput(
+            analysis_input_obj: ICAv2CwlAnalysisJsonInput = ICAv2CwlAnalysisJsonInput(
                 inputs_dict
             )
         else:  # Nextflow
             # Initialise the analysis
             from wrapica.project_pipelines import ICAv2NextflowPipelineAnalysis as ICAv2PipelineAnalysis
             if "samplesheet_input" in inputs_dict.keys():
-                # First we need to update samplesheet_input to input
-                samplesheet_tmp_obj = NamedTemporaryFile(prefix="samplesheet_input_", suffix=".csv")
-                samplesheet_tmp_path = Path(samplesheet_tmp_obj.name)
-
-                schema_input_json_file_tmp_obj = NamedTemporaryFile(delete=False, prefix='schema_input', suffix=".json")
-                schema_input_json_file_path = Path(schema_input_json_file_tmp_obj.name)
-
-                # Download the schema input json
-                download_nextflow_schema_input_json_from_pipeline_id(
-                    pipeline_id=self.pipeline_obj.pipeline.id,
-                    schema_input_json_path=schema_input_json_file_path
+                # Runs in a batch may share a cache folder, so prefix the samplesheet with the user reference
+                samplesheet_file_name = (
+                    f"{user_reference}.samplesheet_input.csv"
+                    if self.batch_path is not None
+                    else "samplesheet_input.csv"
                 )
 
-                # Generate the samplesheet file
-                generate_samplesheet_file_from_input_dict(
-                    samplesheet_dict=inputs_dict["samplesheet_input"],
-                    schema_input_path=schema_input_json_file_path,
-                    samplesheet_path=samplesheet_tmp_path
-                )
+                # First we need to update samplesheet_input to input
+                with NamedTemporaryFile(prefix="samplesheet_input_", suffix=".csv") as samplesheet_tmp_obj:
+                    samplesheet_tmp_path = Path(samplesheet_tmp_obj.name)
+
+                    # Generate the samplesheet file
+                    generate_samplesheet_file_from_input_dict(
+                        samplesheet_dict=inputs_dict["samplesheet_input"],
+                        schema_input_path=self.schema_input_path_memoiser(
+                            (pipeline_obj.pipeline.id, str(pipeline_obj.pipeline.time_modified))
+                        ),
+                        samplesheet_path=samplesheet_tmp_path
+                    )
 
-                # Upload the samplesheet file to icav2
-                samplesheet_input_file_id = write_icav2_file_contents(
-                    project_id=self.cache_obj.project_id,
-                    data_path=Path(self.cache_obj.data.details.path) / "samplesheet_input.csv",
-                    file_stream_or_path=samplesheet_tmp_path
-                )
+                    # Upload the samplesheet file to icav2
+                    samplesheet_input_file_id = write_icav2_file_contents(
+                        project_id=cache_obj.project_id,
+                        data_path=Path(cache_obj.data.details.path) / samplesheet_file_name,
+                        file_stream_or_path=samplesheet_tmp_path
+                    )
 
                 # Now pop the samplesheet_input and instead set 'input' as a file id, set to the samplesheet file
                 _ = inputs_dict.pop("samplesheet_input")
@@ -395,52 +675,29 @@ Example:
                     )
                 )
 
-            self.analysis_input_obj: ICAv2NextflowAnalysisInput = ICAv2NextflowAnalysisInput(
+            analysis_input_obj: ICAv2NextflowAnalysisInput = ICAv2NextflowAnalysisInput(
                 inputs_dict,
                 project_id=self.project_id,
-                pipeline_id=self.pipeline_obj.pipeline.id
+                pipeline_id=pipeline_obj.pipeline.id
             )
 
         # Initialise the analysis
-        self.analysis_obj = ICAv2PipelineAnalysis(
-            user_reference=self.user_reference,
+        analysis_obj = ICAv2PipelineAnalysis(
+            user_reference=user_reference,
             project_id=self.project_id,
-            pipeline_id=self.pipeline_obj.pipeline.id,
-            analysis_input=self.analysis_input_obj.create_analysis_input(),
-            analysis_output_uri=convert_project_data_obj_to_uri(self.analysis_output_obj),
-            analysis_storage_id=self.analysis_storage_obj.id,
-            ica_logs_uri=convert_project_data_obj_to_uri(self.ica_logs_obj),
+            pipeline_id=pipeline_obj.pipeline.id,
+            analysis_input=analysis_input_obj.create_analysis_input(),
+            analysis_output_uri=convert_project_data_obj_to_uri(analysis_output_obj),
+            analysis_storage_id=analysis_storage_obj.id,
+            ica_logs_uri=convert_project_data_obj_to_uri(ica_logs_obj),
             tags=ICAv2PipelineAnalysisTags(
-                user_tags=self.user_tags,
-                technical_tags=self.technical_tags,
-                reference_tags=self.reference_tags
+                user_tags=self.get_tags_list(launch_yaml_dict, self.user_tags, "user_tags"),
+                technical_tags=self.get_tags_list(launch_yaml_dict, self.technical_tags, "technical_tags"),
+                reference_tags=self.get_tags_list(launch_yaml_dict, self.reference_tags, "reference_tags")
             )
         )
-        #
-        # # Update the engine parameter
-        # self.analysis_obj.engine_parameters.update_engine_parameter(
-        #     "pipeline_id", self.pipeline_id
-        # )
-        #
-        # # Get the analysis storage arg
-        # if self.analysis_storage_arg is not None:
-        #     self.analysis_storage_id = coerce_analysis_storage_id_or_size_to_analysis_storage(self.analysis_storage_arg)
-        # if self.analysis_storage_id is not None:
-        #     self.analysis_obj.engine_parameters.update_engine_parameter(
-        #         "analysis_storage_id", self.analysis_storage_id
-        #     )
-        #
-        # # Check activation id
-        # if self.activation_id is not None:
-        #     self.analysis_obj.engine_parameters.update_engine_parameter(
-        #         "activation_id", self.activation_id
-        #     )
-        #
-        # # Get the --json parameter
-        # if self.args.get("--json", False):
-        #     self.is_output_json = True
-        # else:
-        #     self.is_output_json = False
+
+        return user_reference, pipeline_obj, analysis_obj
 
     def launch_workflow(self):
         logger.info("Launching analysis")
@@ -457,6 +714,60 @@ Example:
         if self.is_json:
             self.print_to_stdout()
 
+    def launch_run(self, launch_dict: Dict, rate_limiter: RateLimiter) -> str:
+        """
+        Launch a single run of the batch
+        :param launch_dict:
+        :param rate_limiter:
+        :return: The analysis id
+        """
+        _, _, analysis_obj = self.get_analysis_obj_from_launch_dict(launch_dict)
+
+        rate_limiter.wait()
+
+        # Launching an analysis twice is worse than not launching it at all,
+        # so we only retry when we've been explicitly rate limited
+        analysis_launch_obj: AnalysisType = call_with_retries(
+            lambda: analysis_obj(),
+            retryable_status_codes=[429]
+        )
+
+        return analysis_launch_obj.id
+
+    def launch_batch(self):
+        if len(self.launch_dict_list) == 0:
+            logger.info("All runs have already been launched")
+            return
+
+        rate_limiter = RateLimiter(self.max_launches_per_minute)
+
+        has_failures = False
+        with JsonlJournal(self.output_jsonl_path, default_h=sys.stdout) as output_journal:
+            for launch_dict, analysis_id, exc in run_concurrently_as_completed(
+                lambda launch_dict_iter: self.launch_run(launch_dict_iter, rate_limiter),
+                self.launch_dict_list,
+                max_workers=self.max_workers
+            ):
+                if exc is not None:
+                    has_failures = True
+                    logger.error(f"Could not launch run '{launch_dict['user_reference']}': {exc}")
+                else:
+                    logger.info(
+                        f"Successfully launched analysis with analysis id '{analysis_id}' "
+                        f"and user reference '{launch_dict['user_reference']}'"
+                    )
+
+                output_journal.write(
+                    {
+                        "user_reference": launch_dict["user_reference"],
+                        "analysis_id": analysis_id,
+                        "error": JsonlJournal.get_error_str(exc)
+                    }
+                )
+
+        if has_failures:
+            sys.exit(1)
+
     def print_to_stdout(self):
         print(
             json.dumps(
@@ -466,4 +777,4 @@ Example:
                 },
                 indent=2
             )
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+"""
+Release or deprecate many pipelines of a project at once
+"""
+
+# Standard imports
+import re
+import sys
+from pathlib import Path
+from typing import Optional, List, Dict, Union, Pattern
+
+# Wrapica imports
+from wrapica.enums import PipelineStatus
+from wrapica.project import Project
+from wrapica.project_pipelines import ProjectPipeline, list_project_pipelines, release_project_pipeline
+from wrapica.user import User
+
+# Utils
+from ...utils import is_interactive
+from ...utils.concurrency_helpers import call_with_retries
+from ...utils.config_helpers import get_project_id
+from ...utils.errors import InvalidArgumentError
+from ...utils.index_helpers import is_project_pipeline_bundle_linked
+from ...utils.lifecycle_helpers import (
+    get_completed_ids_from_journal, print_lifecycle_targets, apply_lifecycle_transition
+)
+from ...utils.logger import get_logger
+from ...utils.pipeline_helpers import deprecate_project_pipeline
+
+# Locals
+from .. import Command, DocOptArg
+
+# Get logger
+logger = get_logger()
+
+
+class ProjectPipelinesLifecycle(Command):
+    """Usage:
+    icav2 projectpipelines lifecycle help
+    icav2 projectpipelines lifecycle (release | deprecate)
+                                     [--project <project_id_or_name>]
+                                     [--code <code_regex>]
+                                     [--status <status>]
+                                     [--creator <creator_id_or_username>]
+                                     [--all]
+                                     [--preview | --yes]
+                                     [--journal=<journal_jsonl>]
+                                     [--resume]
+                                     [--max-workers=<max_workers>]
+                                     [--max-calls-per-minute=<max_calls_per_minute>]
+
+Description:
+    Release (or deprecate) every pipeline in a project that matches the filters.
+    Pipelines linked to the project through a bundle are never transitioned.
+
+    Only draft pipelines can be released, pipelines that are already deprecated are not deprecated again.
+
+    The pipelines to be transitioned are printed as a table first, use --preview to stop there.
+    In an interactive session you will then be asked to confirm the transition, use --yes to skip the confirmation,
+    --yes is required when not running in an interactive session.
+
+    Pipelines are transitioned concurrently, use --max-calls-per-minute to rate limit the transitions.
+    Use --journal to record the result of each transition to a jsonl file,
+    rerun with --resume to skip the pipelines in the journal that have already been transitioned.
+    The exit code is non-zero if any pipeline could not be transitioned.
+
+Options:
+  --project=<project_id_or_name>                 Optional, the project of the pipelines, defaults to the current project
+  --code=<code_regex>                            Optional, only pipelines whose code fully matches this regex
+  --status=<status>                              Optional, only pipelines of this status (one of DRAFT, RELEASED, DEPRECATED)
+  --creator=<creator_id_or_username>             Optional, only pipelines owned by this user
+  --all                                          Optional, required if no filters are set, transition every pipeline in the project
+  --preview                                      Optional, print the pipelines that would be transitioned and exit
+  --yes                                          Optional, do not ask for confirmation
+  --journal=<journal_jsonl>                      Optional, append the result of each transition to this jsonl file
+  --resume                                       Optional, skip pipelines already transitioned in the journal,
+                                                 required if the journal file already exists
+  --max-workers=<max_workers>                    Optional, the number of pipelines to transition at once (default 8)
+  --max-calls-per-minute=<max_calls_per_minute>  Optional, the maximum number of transitions to start each minute
+
+Environment:
+    ICAV2_BASE_URL (optional, defaults to ica.illumina.com)
+    ICAV2_PROJECT_ID (optional, taken from ~/.session.ica.yaml otherwise)
+
+Example:
+    icav2 projectpipelines lifecycle deprecate --code 'dragen-.*__4_0_.*' --status RELEASED --preview
+    icav2 projectpipelines lifecycle deprecate --code 'dragen-.*__4_0_.*' --status RELEASED --journal deprecate.jsonl --yes
+    """
+
+    is_release: Optional[bool]
+    is_deprecate: Optional[bool]
+    project_obj: Optional[Project]
+    pipeline_code_regex: Optional[Union[str, Pattern]]
+    status: Optional[PipelineStatus]
+    creator_obj: Optional[User]
+    all_pipelines: Optional[bool]
+    preview: Optional[bool]
+    yes: Optional[bool]
+    journal_path: Optional[Path]
+    resume: Optional[bool]
+    max_workers: Optional[int]
+    max_calls_per_minute: Optional[int]
+
+    def __init__(self, command_argv):
+        # Set the docopt args
+        self._docopt_type_args = {
+            "is_release": DocOptArg(
+                cli_arg_keys=["release"]
+            ),
+            "is_deprecate": DocOptArg(
+                cli_arg_keys=["deprecate"]
+            ),
+            "project_obj": DocOptArg(
+                cli_arg_keys=["--project"]
+            ),
+            "pipeline_code_regex": DocOptArg(
+                cli_arg_keys=["--code"]
+            ),
+            "status": DocOptArg(
+                cli_arg_keys=["--status"]
+            ),
+            "creator_obj": DocOptArg(
+                cli_arg_keys=["--creator"]
+            ),
+            "all_pipelines": DocOptArg(
+                cli_arg_keys=["--all"]
+            ),
+            "preview": DocOptArg(
+                cli_arg_keys=["--preview"]
+            ),
+            "yes": DocOptArg(
+                cli_arg_keys=["--yes"]
+            ),
+            "journal_path": DocOptArg(
+                cli_arg_keys=["--journal"]
+            ),
+            "resume": DocOptArg(
+                cli_arg_keys=["--resume"]
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"]
+            ),
+            "max_calls_per_minute": DocOptArg(
+                cli_arg_keys=["--max-calls-per-minute"]
+            ),
+        }
+
+        # Initialise parameters
+        self.project_id: Optional[str] = None
+        self.transition: Optional[str] = None
+        self.targets: Optional[List[Dict]] = None
+
+        super().__init__(command_argv)
+
+    def __call__(self):
+        if len(self.targets) == 0:
+            logger.info(f"No pipelines to {self.transition}")
+            return
+
+        print_lifecycle_targets(self.targets)
+
+        if self.preview:
+            return
+
+        if not self.yes:
+            continue_or_exit = input(f"{self.transition.capitalize()} {len(self.targets)} pipelines? (y/n): ")
+            if continue_or_exit.lower() != "y":
+                sys.exit(0)
+
+        if self.transition == "release":
+            transition_func = lambda pipeline_id_iter: release_project_pipeline(self.project_id, pipeline_id_iter)
+        else:
+            transition_func = lambda pipeline_id_iter: deprecate_project_pipeline(self.project_id, pipeline_id_iter)
+
+        has_failures = apply_lifecycle_transition(
+            targets=self.targets,
+            transition=self.transition,
+            transition_func=transition_func,
+            journal_path=self.journal_path,
+            max_workers=self.max_workers,
+            max_calls_per_minute=self.max_calls_per_minute
+        )
+
+        if has_failures:
+            sys.exit(1)
+
+    def check_args(self):
+        self.transition = "release" if self.is_release else "deprecate"
+
+        # Get the project id
+        if self.project_obj is not None:
+            self.project_id = self.project_obj.id
+        else:
+            self.project_id = get_project_id()
+
+        if self.pipeline_code_regex is not None:
+            self.pipeline_code_regex = re.compile(self.pipeline_code_regex)
+
+        # Guard against transitioning every pipeline by accident
+        if not self.all_pipelines and all(
+            map(
+                lambda filter_iter: filter_iter is None,
+                [self.pipeline_code_regex, self.status, self.creator_obj]
+            )
+        ):
+            logger.error(f"Please specify at least one filter, or use --all to {self.transition} every pipeline")
+            raise InvalidArgumentError
+
+        # We cannot ask for confirmation outside of an interactive session
+        if not self.preview and not self.yes and not is_interactive():
+            logger.error("--yes is required when not running in an interactive session")
+            raise InvalidArgumentError
+
+        # Check the journal
+        if self.journal_path is not None:
+            if self.journal_path.exists() and not self.resume:
+                logger.error(f"Journal {self.journal_path} already exists, use --resume to continue from the journal")
+                raise InvalidArgumentError
+            if not self.journal_path.parent.is_dir():
+                logger.error(f"Parent directory of the journal {self.journal_path} does not exist")
+                raise InvalidArgumentError
+        elif self.resume:
+            logger.error("--resume requires --journal")
+            raise InvalidArgumentError
+
+        project_pipeline_list: List[ProjectPipeline] = list(
+            filter(
+                lambda project_pipeline_iter: self.is_target(project_pipeline_iter),
+                call_with_retries(
+                    lambda: list_project_pipelines(project_id=self.project_id)
+                )
+            )
+        )
+        logger.info(f"Found {len(project_pipeline_list)} pipelines matching the filters")
+
+        # Skip pipelines already transitioned in the journal
+        if self.resume and self.journal_path.exists():
+            completed_ids = get_completed_ids_from_journal(self.journal_path, self.transition)
+            logger.info(f"Skipping {len(completed_ids)} pipelines already transitioned in the journal")
+            project_pipeline_list = list(
+                filter(
+                    lambda project_pipeline_iter: project_pipeline_iter.pipeline.id not in completed_ids,
+                    project_pipeline_list
+                )
+            )
+
+        self.targets = list(
+            map(
+                lambda project_pipeline_iter: {
+                    "id": project_pipeline_iter.pipeline.id,
+                    "name": project_pipeline_iter.pipeline.code,
+                    "status": project_pipeline_iter.pipeline.status,
+                    "modification_time_stamp": project_pipeline_iter.pipeline.time_modified,
+                },
+                project_pipeline_list
+            )
+        )
+
+    def is_target(self, project_pipeline: ProjectPipeline) -> bool:
+        """
+        Check the project pipeline matches the filters and can be transitioned
+        :param project_pipeline:
+        :return:
+        """
+        pipeline_status = PipelineStatus(project_pipeline.pipeline.status)
+
+        # Bundle linked pipelines are not ours to transition
+        if is_project_pipeline_bundle_linked(project_pipeline):
+            return False
+
+        # Only draft pipelines can be released, and deprecated pipelines are not deprecated again
+        if self.transition == "release" and not pipeline_status == PipelineStatus.DRAFT:
+            return False
+        if self.transition == "deprecate" and pipeline_status == PipelineStatus.DEPRECATED:
+            return False
+
+        if self.status is not None and not pipeline_status == PipelineStatus(self.status):
+            return False
+        if self.creator_obj is not None and not project_pipeline.pipeline.owner_id == self.creator_obj.id:
+            return False
+        if (
+                self.pipeline_code_regex is not None and
+                self.pipeline_code_regex.fullmatch(project_pipeline.pipeline.code) is None
+        ):
+            return False
+
+        return True
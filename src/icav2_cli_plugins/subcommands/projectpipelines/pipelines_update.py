@@ -5,18 +5,18 @@ Update a project pipeline by
 
 1. User provides a local zip file of the pipeline
 2. A pipeline-id or code
-3. We then extract local zip file, and download all pipeline files from the server
-4. Compare each with filecmp report, and confirm with user that they would like to update the pipeline
-5. Each file in the pipeline is updated
+3. We then extract local zip file, and compare the md5sum of each file with the md5sum of each pipeline file
+   (from our manifest of the pipeline if the pipeline has not been modified since, otherwise by downloading the pipeline)
+4. Report the differences, and confirm with user that they would like to update the pipeline
+5. Each changed file in the pipeline is updated
 """
 
 # External imports
 import sys
-from filecmp import cmpfiles
 from pathlib import Path
 from pprint import pprint
 from tempfile import TemporaryDirectory
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 from zipfile import ZipFile
 from deepdiff import DeepDiff
 
@@ -28,7 +28,8 @@ from wrapica.pipelines import (
 )
 from wrapica.project_pipelines import (
     ProjectPipeline,
-    update_pipeline_file, add_pipeline_file, delete_pipeline_file
+    update_pipeline_file, add_pipeline_file, delete_pipeline_file,
+    coerce_pipeline_id_or_code_to_project_pipeline_obj
 )
 from wrapica.user import (
     User,
@@ -37,10 +38,14 @@ from wrapica.user import (
 )
 
 # Utils
+from ...utils.concurrency_helpers import run_concurrently_as_completed, call_with_retries
 from ...utils.config_helpers import get_project_id
 from ...utils.errors import InvalidArgumentError
 from ...utils.logger import get_logger
-from ...utils.pipeline_helpers import compare_yaml_files
+from ...utils.pipeline_helpers import (
+    compare_yaml_files, get_md5sums_from_directory,
+    read_pipeline_files_manifest, write_pipeline_files_manifest, delete_pipeline_files_manifest
+)
 from ...utils.subprocess_handler import run_subprocess_proc
 
 # Locals
@@ -61,6 +66,7 @@ class ProjectPipelinesUpdate(Command):
     """Usage:
     icav2 projectpipelines update help
     icav2 projectpipelines update <zipped_pipeline_path> <pipeline> [--force]
+                                  [--max-workers=<max_workers>]
 
 Description:
     Update a pipeline on ICAv2. The zipped workflow can be created with either
@@ -70,10 +76,18 @@ Description:
     It is expected for CWL workflows, that the workflow.cwl file is in the top directory of the zip file.
     For Nextflow workflows, the main.nf file is expected in the top directory of the zip file, along with nextflow.config.
 
+    Local files are compared to the pipeline files by md5sum.
+    After each update, a manifest of the md5sum of each pipeline file is kept in $ICAV2_CLI_PLUGINS_HOME/cache/pipelines/.
+    If the pipeline has not been modified since the manifest was written, the pipeline is not downloaded
+    (unless files have been edited, and we need to show the differences before asking for confirmation).
+
+    Changed files are uploaded, added and deleted concurrently.
+
 Options:
-    <zipped_pipeline_path>   Required, the path to the zip file containing the pipeline.
-    <pipeline_id>            Required, the id (or code) of the pipeline to update
-    --force                  Optional, don't ask user for confirmation
+    <zipped_pipeline_path>         Required, the path to the zip file containing the pipeline.
+    <pipeline_id>                  Required, the id (or code) of the pipeline to update
+    --force                        Optional, don't ask user for confirmation
+    --max-workers=<max_workers>    Optional, the number of files to upload at once (default 8)
 
 Environment:
     ICAV2_BASE_URL (optional, defaults to ica.illumina.com)
@@ -86,6 +100,7 @@ Example:
     zipped_pipeline_path: Path
     project_pipeline_obj: ProjectPipeline
     force: bool
+    max_workers: Optional[int]
 
     def __init__(self, command_argv):
         self._docopt_type_args = {
@@ -97,6 +112,9 @@ Example:
             ),
             "force": DocOptArg(
                 cli_arg_keys=["--force"]
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"]
             )
         }
 
@@ -123,6 +141,10 @@ Example:
         # Pipeline file mapping
         self.pipeline_file_mapping: Optional[List[PipelineFile]] = None
 
+        # md5sums of each file (by relative path)
+        self.local_md5sums: Optional[Dict[str, str]] = None
+        self.icav2_md5sums: Optional[Dict[str, str]] = None
+
         # Get the user obj
         self.user_obj: Optional[User]
 
@@ -139,6 +161,9 @@ Example:
             len(self.file_cmp_list_new) == 0
         ):
             logger.info("No changes detected, exiting")
+            # Write the manifest if we've had to download the pipeline, so we don't need to next time
+            if self.tmp_icav2_pipeline_directory is not None:
+                self.write_manifest(self.pipeline_file_mapping, self.project_pipeline_obj)
             sys.exit(0)
 
         # Confirm with user that they would like to update the pipeline
@@ -179,13 +204,71 @@ Example:
 
         # Unzip the local pipeline
         self.unzip_pipeline()
-
-        # Pull pipeline from icav2
-        self.pull_pipeline_from_icav2()
+        self.local_md5sums = get_md5sums_from_directory(self.tmp_local_unzipped_pipeline_directory)
 
         # Set pipeline file mapping
         self.pipeline_file_mapping = list_pipeline_files(self.pipeline_id)
 
+        # Get the md5sums of the pipeline files from the manifest, otherwise pull the pipeline from icav2
+        self.icav2_md5sums = self.get_icav2_md5sums_from_manifest()
+        if self.icav2_md5sums is None:
+            self.pull_pipeline_from_icav2()
+            self.icav2_md5sums = get_md5sums_from_directory(self.tmp_icav2_pipeline_directory)
+
+    def get_icav2_md5sums_from_manifest(self) -> Optional[Dict[str, str]]:
+        """
+        The manifest is trusted only if the pipeline has not been modified since the manifest was written,
+        and the pipeline files (and their ids) still match those in the manifest
+        Returns:
+
+        """
+        manifest = read_pipeline_files_manifest(self.pipeline_id)
+
+        if manifest is None:
+            return None
+
+        if not manifest.get("time_modified") == str(self.project_pipeline_obj.pipeline.time_modified):
+            logger.info("Pipeline has been modified since it was last updated from this machine")
+            return None
+
+        if not {
+            file_name: file_dict.get("id")
+            for file_name, file_dict in manifest.get("files").items()
+        } == {
+            str(file_iter.name): file_iter.id
+            for file_iter in self.pipeline_file_mapping
+        }:
+            logger.info("Pipeline files do not match the files in the manifest")
+            return None
+
+        logger.info("Using pipeline file md5sums from the manifest, no need to download the pipeline")
+        return {
+            file_name: file_dict.get("md5sum")
+            for file_name, file_dict in manifest.get("files").items()
+        }
+
+    def write_manifest(self, pipeline_file_mapping: List[PipelineFile], project_pipeline_obj: ProjectPipeline):
+        """
+        Write the manifest of the pipeline files, the contents of the pipeline now match the local files
+        Args:
+            pipeline_file_mapping:
+            project_pipeline_obj:
+
+        Returns:
+
+        """
+        write_pipeline_files_manifest(
+            pipeline_id=self.pipeline_id,
+            time_modified=str(project_pipeline_obj.pipeline.time_modified),
+            files={
+                str(file_iter.name): {
+                    "id": file_iter.id,
+                    "md5sum": self.local_md5sums.get(str(file_iter.name))
+                }
+                for file_iter in pipeline_file_mapping
+            }
+        )
+
     def unzip_pipeline(self):
         # Create a temporary directory
         self.tmp_local_unzipped_pipeline_directory_obj = TemporaryDirectory()
@@ -215,53 +298,20 @@ Example:
         Returns:
 
         """
-        # Get the list of files in the local pipeline
-        local_files = list(
-            map(
-                lambda sub_path: sub_path.relative_to(self.tmp_local_unzipped_pipeline_directory),
-                filter(
-                    lambda file_: (
-                        file_.is_file()
-                    ),
-                    Path(self.tmp_local_unzipped_pipeline_directory).rglob("*")
-                )
-            )
-        )
-
-        # Get the list of files in the icav2 pipeline
-        icav2_pipeline_files = list(
-            map(
-                lambda sub_path: sub_path.relative_to(self.tmp_icav2_pipeline_directory),
-                filter(
-                    lambda file_: file_.is_file(),
-                    self.tmp_icav2_pipeline_directory.rglob("*")
-                )
-            )
-        )
-
-        # Collect cmp files objects
-        self.file_cmp_list_match, self.file_cmp_list_edited, file_cmp_list_errors = cmpfiles(
-            self.tmp_local_unzipped_pipeline_directory,
-            self.tmp_icav2_pipeline_directory,
-            sorted({*icav2_pipeline_files, *local_files}),
-            shallow=False
-        )
-
-        # Get the list of missing files
-        self.file_cmp_list_missing = list(
-            filter(
-                lambda file_: not (self.tmp_local_unzipped_pipeline_directory / file_).is_file(),
-                file_cmp_list_errors
-            )
-        )
-
-        # Get the list of new files
-        self.file_cmp_list_new = list(
-            filter(
-                lambda file_: (self.tmp_local_unzipped_pipeline_directory / file_).is_file(),
-                file_cmp_list_errors
-            )
-        )
+        # Compare md5sums
+        self.file_cmp_list_match = []
+        self.file_cmp_list_edited = []
+        self.file_cmp_list_missing = []
+        self.file_cmp_list_new = []
+        for file_name in sorted({*self.icav2_md5sums.keys(), *self.local_md5sums.keys()}):
+            if file_name not in self.local_md5sums:
+                self.file_cmp_list_missing.append(Path(file_name))
+            elif file_name not in self.icav2_md5sums:
+                self.file_cmp_list_new.append(Path(file_name))
+            elif self.local_md5sums[file_name] == self.icav2_md5sums[file_name]:
+                self.file_cmp_list_match.append(Path(file_name))
+            else:
+                self.file_cmp_list_edited.append(Path(file_name))
 
         # Report the following files match
         matching_files_list_str = '\n'.join(map(str, self.file_cmp_list_match))
@@ -289,6 +339,16 @@ Example:
             )
 
         # The following files are different, printing the differences
+        # We only need to download the pipeline (if we haven't already) to show the differences to the user
+        if len(self.file_cmp_list_edited) > 0 and self.tmp_icav2_pipeline_directory is None:
+            if self.force:
+                logger.info(
+                    "The following files have been edited and will be updated:\n" +
+                    '\n'.join(map(str, self.file_cmp_list_edited))
+                )
+                return
+            self.pull_pipeline_from_icav2()
+
         file_path: Path
         for file_path in self.file_cmp_list_edited:
             local_file_path = self.tmp_local_unzipped_pipeline_directory / file_path
@@ -333,21 +393,51 @@ Example:
         for file_name in self.file_cmp_list_match:
             logger.info(f"Skipping update of {file_name}")
 
-        # Update mismatched files
-        for file_name in self.file_cmp_list_edited:
+        # Update mismatched files, add new files and delete missing files concurrently
+        file_actions: List[Tuple[str, Path]] = [
+            *map(lambda file_iter: ("update", file_iter), self.file_cmp_list_edited),
+            *map(lambda file_iter: ("add", file_iter), self.file_cmp_list_new),
+            *map(lambda file_iter: ("delete", file_iter), self.file_cmp_list_missing),
+        ]
+
+        # A 5xx may still have added, updated or deleted the file, and replaying the action
+        # against a changed pipeline is not safe, so we only retry when we've been explicitly rate limited
+        has_errors = False
+        for (action, file_name), _, exc in run_concurrently_as_completed(
+            lambda file_action_iter: call_with_retries(
+                lambda: self.run_file_action(*file_action_iter),
+                retryable_status_codes=[429]
+            ),
+            file_actions,
+            max_workers=self.max_workers
+        ):
+            if exc is not None:
+                logger.error(f"Could not {action} file {file_name}: {exc}")
+                has_errors = True
+
+        if has_errors:
+            # The pipeline is in an unknown state
+            delete_pipeline_files_manifest(self.pipeline_id)
+            logger.error(f"Pipeline {self.pipeline_id} was only partially updated, please re-run this command")
+            sys.exit(1)
+
+        # Write the manifest for next time
+        self.write_manifest(
+            list_pipeline_files(self.pipeline_id),
+            coerce_pipeline_id_or_code_to_project_pipeline_obj(self.pipeline_id)
+        )
+
+    def run_file_action(self, action: str, file_name: Path):
+        if action == "update":
             logger.info(f"Updating file {file_name}")
             local_file_path = self.tmp_local_unzipped_pipeline_directory / file_name
             file_id = self.get_file_id_from_file_name(file_name)
             update_pipeline_file(self.project_id, self.pipeline_id, file_id, local_file_path)
-
-        # Add new files
-        for file_name in self.file_cmp_list_new:
+        elif action == "add":
             logger.info(f"Adding file {file_name}")
             file_path = self.tmp_local_unzipped_pipeline_directory / file_name
             add_pipeline_file(self.project_id, self.pipeline_id, file_path)
-
-        # Delete missing files
-        for file_name in self.file_cmp_list_missing:
+        elif action == "delete":
             logger.info(f"Deleting file {file_name}")
             file_id = self.get_file_id_from_file_name(file_name)
             delete_pipeline_file(self.project_id, self.pipeline_id, file_id)
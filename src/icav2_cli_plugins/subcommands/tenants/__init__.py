@@ -19,6 +19,7 @@ Plugin Commands:
     list                 List available tenants to enter
     set-default-project  Set the default project for a given tenant
     set-default-tenant   Set the default tenant
+    index                Build a local index of projects, pipelines and bundle links for a tenant
 
 Flags:
   -h, --help   help for tenants
@@ -45,6 +46,8 @@ Use "icav2 tenants [command] --help" for more information about a command.
             from .set_default_tenant import TenantsSetDefaultTenant as subcommand
         elif cmd == "set-default-project":
             from .set_default_project import TenantsSetDefaultProject as subcommand
+        elif cmd == "index":
+            from .tenants_index_build import TenantsIndexBuild as subcommand
         else:
             print(self.__doc__)
             print(f"Could not find cmd \"{cmd}\". Please refer to usage above")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Build the local index of projects, project pipelines and bundle links for a tenant
+"""
+
+# Standard imports
+import sys
+from contextlib import nullcontext
+from typing import Optional, List
+
+# Wrapica imports
+from wrapica.project import list_projects, Project
+
+# Utils
+from ...utils.concurrency_helpers import run_concurrently_as_completed, call_with_retries
+from ...utils.index_helpers import (
+    read_tenant_index, write_tenant_index, scan_project, get_utc_now_str, get_tenant_index_path
+)
+from ...utils.logger import get_logger
+from ...utils.tenant_helpers import tenant_context
+
+# Locals
+from .. import Command, DocOptArg
+
+# Set logger
+logger = get_logger()
+
+
+class TenantsIndexBuild(Command):
+    """Usage:
+    icav2 tenants index help
+    icav2 tenants index build [--tenant=<tenant_name>]
+                              [--include-hidden-projects]
+                              [--max-workers=<max_workers>]
+
+Description:
+    Crawl every project in the tenant, collecting the pipelines in each project and the bundles linked to each project,
+    into a local index of the tenant.
+
+    Commands such as 'icav2 pipelines list-projects' and 'icav2 bundles get --include-projects' consult
+    this index rather than scanning every project, use --live on those commands to bypass the index.
+    Those commands rescan any project whose entry is older than ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_MINUTES (default 10) minutes,
+    set this higher to make use of an index built some time ago.
+
+    Projects are crawled concurrently, any project that fails to be crawled keeps its previous entry in the index.
+    The exit code is non-zero if any project failed to be crawled.
+
+Options:
+    --tenant=<tenant_name>           Optional, the tenant to build the index for, defaults to the current tenant
+    --include-hidden-projects        Optional, also crawl hidden projects
+    --max-workers=<max_workers>      Optional, the number of projects to crawl at once (default 8)
+
+Environment variables:
+    ICAV2_BASE_URL           Optional, default set as https://ica.illumina.com/ica/rest
+
+Example:
+    icav2 tenants index build
+    icav2 tenants index build --tenant my-tenant --include-hidden-projects
+    """
+
+    tenant_name: Optional[str]
+    include_hidden_projects: Optional[bool]
+    max_workers: Optional[int]
+
+    def __init__(self, command_argv):
+        self._docopt_type_args = {
+            "tenant_name": DocOptArg(
+                cli_arg_keys=["--tenant"],
+            ),
+            "include_hidden_projects": DocOptArg(
+                cli_arg_keys=["--include-hidden-projects"],
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"],
+            ),
+        }
+
+        super().__init__(command_argv)
+
+    def check_args(self):
+        pass
+
+    def __call__(self):
+        with (
+            tenant_context(self.tenant_name)
+            if self.tenant_name is not None
+            else nullcontext()
+        ):
+            has_failures = self.build_index()
+
+        if has_failures:
+            sys.exit(1)
+
+    def build_index(self) -> bool:
+        """
+        Build the index for the current tenant
+        :return: True if any project failed to be crawled
+        """
+        projects: List[Project] = call_with_retries(
+            lambda: list_projects(include_hidden_projects=self.include_hidden_projects)
+        )
+        logger.info(f"Crawling {len(projects)} projects")
+
+        previous_tenant_index = read_tenant_index()
+        tenant_index = {
+            "time_built": get_utc_now_str(),
+            "projects": {}
+        }
+
+        num_failed_projects = 0
+        for project, project_index_entry, exc in run_concurrently_as_completed(
+            scan_project,
+            projects,
+            max_workers=self.max_workers
+        ):
+            if exc is not None:
+                logger.warning(f"Could not crawl project '{project.name}': {exc}")
+                num_failed_projects += 1
+                if project.id in previous_tenant_index["projects"]:
+                    tenant_index["projects"][project.id] = previous_tenant_index["projects"][project.id]
+                continue
+            tenant_index["projects"][project.id] = project_index_entry
+
+        write_tenant_index(tenant_index)
+
+        logger.info(
+            f"Indexed {len(tenant_index['projects'])} projects, "
+            f"{sum(map(lambda entry_iter: len(entry_iter.get('pipelines', [])), tenant_index['projects'].values()))} "
+            f"project pipelines and "
+            f"{sum(map(lambda entry_iter: len(entry_iter.get('bundles', [])), tenant_index['projects'].values()))} "
+            f"bundle links into {get_tenant_index_path()}"
+        )
+
+        if num_failed_projects > 0:
+            logger.error(f"Could not crawl {num_failed_projects} of {len(projects)} projects")
+            return True
+        return False
@@ -9,12 +9,15 @@ from typing import Optional, List
 import pandas as pd
 
 # Utils
+from ...utils.concurrency_helpers import run_concurrently_as_completed
 from ...utils.config_helpers import read_config_file
+from ...utils.errors import InvalidArgumentError
 from ...utils.logger import get_logger
 from ...utils.plugin_helpers import get_tenants_directory
+from ...utils.tenant_helpers import get_tenant_status
 
 # Locals
-from .. import Command
+from .. import Command, DocOptArg
 
 # Set logger
 logger = get_logger()
@@ -23,22 +26,56 @@ logger = get_logger()
 class TenantsList(Command):
     """Usage:
     icav2 tenants list help
-    icav2 tenants list
+    icav2 tenants list [--status]
+                       [--refresh]
+                       [--refresh-within=<minutes>]
+                       [--max-workers=<max_workers>]
 
 Description:
-    List all tenants
+    List all tenants.
+
+    Use --status to also show, for each tenant, when the stored access token expires,
+    the latency of the tenant's server and the default project of the tenant.
+    Token expiry is read from the token itself, tenants are checked concurrently.
+
+    Use --refresh to renew the access token (from the tenant's api key) of any tenant whose token has expired
+    or expires within --refresh-within minutes.
 
 Options:
+  --status                        Optional, show the token expiry, latency and default project of each tenant
+  --refresh                       Optional, renew expired (or expiring) access tokens, implies --status
+  --refresh-within=<minutes>      Optional, with --refresh, also renew tokens expiring within this many minutes (default 0)
+  --max-workers=<max_workers>     Optional, the number of tenants to check at once (default 8)
 
 Environment variables:
     ICAV2_BASE_URL           Optional, default set as https://ica.illumina.com/ica/rest
 
 Example:
     icav2 tenants list
+    icav2 tenants list --status
+    icav2 tenants list --refresh --refresh-within 60
     """
 
+    status: Optional[bool]
+    refresh: Optional[bool]
+    refresh_within: Optional[int]
+    max_workers: Optional[int]
+
     def __init__(self, command_argv):
-        self._docopt_type_args = {}
+        self._docopt_type_args = {
+            "status": DocOptArg(
+                cli_arg_keys=["--status"]
+            ),
+            "refresh": DocOptArg(
+                cli_arg_keys=["--refresh"]
+            ),
+            "refresh_within": DocOptArg(
+                cli_arg_keys=["--refresh-within"]
+            ),
+            "max_workers": DocOptArg(
+                cli_arg_keys=["--max-workers"]
+            ),
+        }
         # The tenant name provided by the user
         self.tenant_list: Optional[List[str]] = None
 
@@ -47,6 +84,8 @@ Example:
     def __call__(self):
         # Ask user (kindly) for the api key
         self.get_tenants()
+        if self.status:
+            self.get_tenants_status()
         self.print_columns()
 
     def get_tenants(self):
@@ -76,6 +115,43 @@ Example:
             logger.error("No tenants available, please initialise a tenant with 'icav2 tenants list'")
             raise ValueError
 
+    def get_tenants_status(self):
+        """
+        Add the token expiry, latency and default project of each tenant, tenants are checked concurrently
+        :return:
+        """
+        tenant_status_by_name = {}
+        for tenant_name, tenant_status, exc in run_concurrently_as_completed(
+            lambda tenant_name_iter: get_tenant_status(
+                tenant_name_iter,
+                refresh_within_seconds=self.refresh_within * 60 if self.refresh else None
+            ),
+            list(map(lambda tenant_iter: tenant_iter["name"], self.tenant_list)),
+            max_workers=self.max_workers
+        ):
+            if exc is not None:
+                logger.warning(f"Could not get the status of tenant {tenant_name}: {exc}")
+                continue
+            tenant_status_by_name[tenant_name] = tenant_status
+
+        # Tenants whose status could not be collected are still listed, with empty status columns
+        self.tenant_list = list(
+            map(
+                lambda tenant_iter: {
+                    "name": tenant_iter["name"],
+                    "token_tns": tenant_iter["token_tns"],
+                    **{
+                        status_key: tenant_status_by_name.get(tenant_iter["name"], {}).get(status_key)
+                        for status_key in [
+                            "server_url", "token_expiry", "token_minutes_remaining",
+                            "token_refreshed", "latency_ms", "default_project_id"
+                        ]
+                    }
+                },
+                self.tenant_list
+            )
+        )
+
     def print_columns(self):
         pd.set_option('expand_frame_repr', False)
         pd.set_option('display.max_columns', 999)
@@ -83,4 +159,14 @@ Example:
         print(pd.DataFrame(self.tenant_list).to_markdown(index=False))
 
     def check_args(self):
-        pass
+        if self.refresh:
+            self.status = True
+
+        if self.refresh_within is None:
+            self.refresh_within = 0
+        elif not self.refresh:
+            logger.error("--refresh-within requires --refresh")
+            raise InvalidArgumentError
+        elif self.refresh_within < 0:
+            logger.error("--refresh-within must not be negative")
+            raise InvalidArgumentError
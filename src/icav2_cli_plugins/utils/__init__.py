@@ -1,4 +1,6 @@
+import hashlib
 import re
+from pathlib import Path
 from typing import Dict, Any
 import sys
 from urllib.parse import urlparse
@@ -67,3 +69,16 @@ def strip_literal(input_str: str) -> str:
         return str(literal_eval(input_str))
     except (ValueError, SyntaxError):
         return input_str
+
+
+def get_md5sum_from_file(file_path: Path) -> str:
+    """
+    Get the md5sum of a file, reading in chunks so large files are not read into memory at once
+    :param file_path:
+    :return:
+    """
+    md5sum_obj = hashlib.md5()
+    with open(file_path, "rb") as file_h:
+        for chunk in iter(lambda: file_h.read(1024 * 1024), b""):
+            md5sum_obj.update(chunk)
+    return md5sum_obj.hexdigest()
@@ -2,22 +2,32 @@
 
 # External imports
 import json
-from typing import OrderedDict, Optional, List, Dict
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import OrderedDict, Optional, List, Dict, Callable, Tuple, Iterator, Set, Pattern
 
-from libica.openapi.v2 import ApiException
+from libica.openapi.v2 import ApiException, ApiClient
+from libica.openapi.v2.api.bundle_data_api import BundleDataApi
+from libica.openapi.v2.api.bundle_pipeline_api import BundlePipelineApi
+from libica.openapi.v2.model.bundle_data_paged_list import BundleDataPagedList
 from ruamel.yaml import YAML, CommentedMap, CommentedSeq
 
 # Wrapica
 from wrapica.bundle import (
     Bundle, BundleData, BundlePipeline,
-    list_data_in_bundle, list_pipelines_in_bundle, filter_bundle_data_to_top_level_only
+    list_pipelines_in_bundle, filter_bundle_data_to_top_level_only,
+    add_data_to_bundle, add_pipeline_to_bundle
 )
 from wrapica.data import convert_data_obj_to_icav2_uri
+from wrapica.enums import BundleStatus
+from wrapica.project import Project, check_project_has_data_sharing_enabled, list_projects
 from wrapica.user import get_user_obj_from_user_id
 
 # Utils
+from .concurrency_helpers import run_concurrently, run_concurrently_as_completed, call_with_retries
+from .config_helpers import get_libicav2_configuration
+from .globals import LIBICAV2_DEFAULT_PAGE_SIZE, LIBICAV2_MAX_OFFSET_PAGING_ROWS
 from .logger import get_logger
+from .plugin_helpers import get_cache_directory, write_file_atomically
 
 # Get logger
 logger = get_logger()
@@ -134,7 +144,7 @@ def bundle_to_dict(
         pipeline_objs = list_pipelines_in_bundle(bundle_obj.id)
 
     if data_objs is None:
-        data_objs = filter_bundle_data_to_top_level_only(list_data_in_bundle(bundle_obj.id))
+        data_objs = list(iter_top_level_bundle_data(bundle_obj.id))
 
     bundle_dict = {
         "id": bundle_obj.id,
@@ -166,9 +176,7 @@ def bundle_to_yaml_obj(
     """
 
     # Collect pipelines and data first (since we need to iterate over them for comments)
-    # Get pipelines and data if not provided
-    pipeline_objs = list_pipelines_in_bundle(bundle_obj.id)
-    data_objs = filter_bundle_data_to_top_level_only(list_data_in_bundle(bundle_obj.id))
+    pipeline_objs, data_objs = get_bundle_pipelines_and_data(bundle_obj.id)
 
     logger.debug("Collecting bundle as a dictionary")
     bundle_commented_map = CommentedMap(
@@ -222,3 +230,371 @@ def bundle_to_yaml_obj(
         )
 
     return bundle_commented_map
+
+
+def get_bundle_pipelines_and_data(bundle_id: str) -> Tuple[List[BundlePipeline], List[BundleData]]:
+    """
+    List the pipelines and the top level data of a bundle concurrently
+    :param bundle_id:
+    :return:
+    """
+    pipeline_objs, data_objs = run_concurrently(
+        lambda list_func_iter: call_with_retries(list_func_iter),
+        [
+            lambda: list_pipelines_in_bundle(bundle_id),
+            lambda: list(iter_top_level_bundle_data(bundle_id))
+        ]
+    )
+    return pipeline_objs, data_objs
+
+
+def get_bundle_data_page(bundle_id: str, **kwargs) -> BundleDataPagedList:
+    """
+    Get a single page of bundle data, kwargs are passed through to the get bundle data endpoint
+    :param bundle_id:
+    :return:
+    """
+    with ApiClient(get_libicav2_configuration()) as api_client:
+        return BundleDataApi(api_client).get_bundle_data(bundle_id, **kwargs)
+
+
+def get_bundle_data_page_by_path(bundle_id: str, page_offset: int, page_size: int, **kwargs) -> BundleDataPagedList:
+    """
+    Get a page of bundle data, sorted by path, with offset based paging
+    :param bundle_id:
+    :param page_offset:
+    :param page_size:
+    :return:
+    """
+    return call_with_retries(
+        lambda: get_bundle_data_page(
+            bundle_id,
+            page_offset=str(page_offset),
+            page_size=str(page_size),
+            sort="path",
+            **kwargs
+        )
+    )
+
+
+def is_nested_bundle_data(bundle_data: BundleData, top_level_folder_paths: Dict[str, Set[str]]) -> bool:
+    """
+    Bundle data is nested if any of its parent folders (in the same project) is a top level folder of the bundle
+    :param bundle_data:
+    :param top_level_folder_paths: The top level folder paths of the bundle, keyed by project id
+    :return:
+    """
+    folder_paths = top_level_folder_paths.get(bundle_data.data.details.owning_project_id, set())
+    if len(folder_paths) == 0:
+        return False
+    return any(
+        map(
+            lambda parent_iter: str(parent_iter).rstrip("/") + "/" in folder_paths,
+            PurePosixPath(bundle_data.data.details.path).parents
+        )
+    )
+
+
+def iter_top_level_bundle_data(bundle_id: str) -> Iterator[BundleData]:
+    """
+    Yield the top level data of a bundle, i.e. data that is not within a folder that is also in the bundle.
+
+    Rather than collecting every data item in the bundle (which for bundles of reference data may be
+    hundreds of thousands of items) and then filtering, we page through the bundle data sorted by path,
+    so that a folder is always seen before its contents, and drop nested data as each page arrives.
+    Only the paths of the top level folders are held in memory.
+
+    Offset based paging (which we need in order to sort) is limited to 200K rows,
+    bundles larger than this are paged through with cursor based paging and filtered once all data is collected.
+
+    :param bundle_id:
+    :return:
+    """
+    page_size = LIBICAV2_DEFAULT_PAGE_SIZE
+    top_level_folder_paths: Dict[str, Set[str]] = {}
+
+    page_offset = 0
+    while True:
+        bundle_data_page = get_bundle_data_page_by_path(bundle_id, page_offset, page_size)
+
+        if (
+                page_offset == 0 and
+                getattr(bundle_data_page, "total_item_count", None) is not None and
+                bundle_data_page.total_item_count > LIBICAV2_MAX_OFFSET_PAGING_ROWS
+        ):
+            logger.info(
+                f"Bundle {bundle_id} has {bundle_data_page.total_item_count} data items, listing all data items"
+            )
+            yield from filter_bundle_data_to_top_level_only(list(iter_bundle_data_by_cursor(bundle_id)))
+            return
+
+        bundle_data: BundleData
+        for bundle_data in bundle_data_page.items:
+            if is_nested_bundle_data(bundle_data, top_level_folder_paths):
+                continue
+
+            yield bundle_data
+
+            if bundle_data.data.details.data_type == "FOLDER":
+                top_level_folder_paths.setdefault(
+                    bundle_data.data.details.owning_project_id, set()
+                ).add(bundle_data.data.details.path)
+
+        if len(bundle_data_page.items) < page_size:
+            return
+
+        page_offset += len(bundle_data_page.items)
+
+
+def iter_bundle_data_by_cursor(bundle_id: str) -> Iterator[BundleData]:
+    """
+    Yield every data item in the bundle (in no particular order) with cursor based paging,
+    which unlike offset based paging is not limited to 200K rows
+    :param bundle_id:
+    :return:
+    """
+    page_token: Optional[str] = None
+    while True:
+        page_kwargs = {"page_size": str(LIBICAV2_DEFAULT_PAGE_SIZE)}
+        if page_token is not None:
+            page_kwargs["page_token"] = page_token
+
+        bundle_data_page: BundleDataPagedList = call_with_retries(
+            lambda: get_bundle_data_page(bundle_id, **page_kwargs)
+        )
+
+        yield from bundle_data_page.items
+
+        page_token = getattr(bundle_data_page, "next_page_token", None)
+        if not page_token or len(bundle_data_page.items) == 0:
+            return
+
+
+def get_bundle_all_data_cache_path(bundle_obj: Bundle) -> Path:
+    return get_cache_directory() / "bundles" / bundle_obj.id / "data.json"
+
+
+def get_bundle_all_data(bundle_obj: Bundle, use_cache: Optional[bool] = True) -> List[Dict]:
+    """
+    Get every data item in the bundle (not just the top level data) as a list of dicts with the keys
+    data_id, project_id and path. The list is paged through with cursor based paging.
+
+    Only released (or deprecated) bundles are cached since the data of these bundles can no longer change.
+
+    :param bundle_obj:
+    :param use_cache:
+    :return:
+    """
+    is_cacheable = not BundleStatus(bundle_obj.status) == BundleStatus.DRAFT
+    cache_path = get_bundle_all_data_cache_path(bundle_obj)
+
+    if use_cache and is_cacheable and cache_path.is_file():
+        logger.info(f"Using cached data list for bundle {bundle_obj.id}")
+        with open(cache_path, "r") as cache_h:
+            return json.load(cache_h)
+
+    all_data = []
+    for bundle_data in iter_bundle_data_by_cursor(bundle_obj.id):
+        all_data.append(
+            {
+                "data_id": bundle_data.data.id,
+                "project_id": bundle_data.data.details.owning_project_id,
+                "path": bundle_data.data.details.path,
+            }
+        )
+        if len(all_data) % LIBICAV2_DEFAULT_PAGE_SIZE == 0:
+            logger.info(f"Collected {len(all_data)} data items from bundle {bundle_obj.id}")
+
+    all_data = sorted(all_data, key=lambda data_iter: (data_iter["project_id"], data_iter["path"]))
+
+    if is_cacheable:
+        write_file_atomically(cache_path, json.dumps(all_data).encode())
+
+    return all_data
+
+
+def remove_data_from_bundle(bundle_id: str, data_id: str) -> bool:
+    """
+    Unlink data from a bundle, note that unlinking a folder does not unlink the folder contents
+    :param bundle_id:
+    :param data_id:
+    :return:
+    """
+    with ApiClient(get_libicav2_configuration()) as api_client:
+        BundleDataApi(api_client).unlink_data_from_bundle(bundle_id, data_id)
+    return True
+
+
+def remove_pipeline_from_bundle(bundle_id: str, pipeline_id: str) -> bool:
+    """
+    Unlink a pipeline from a bundle
+    :param bundle_id:
+    :param pipeline_id:
+    :return:
+    """
+    with ApiClient(get_libicav2_configuration()) as api_client:
+        BundlePipelineApi(api_client).unlink_pipeline_from_bundle(bundle_id, pipeline_id)
+    return True
+
+
+def deduplicate_by_id(obj_list: List) -> List:
+    """
+    Remove objects with the same id, keeping the first of each
+    :param obj_list:
+    :return:
+    """
+    obj_by_id = {}
+    for obj in obj_list:
+        obj_by_id.setdefault(obj.id, obj)
+    return list(obj_by_id.values())
+
+
+def get_project_ids_without_data_sharing(project_ids: List[str], max_workers: Optional[int] = None) -> List[str]:
+    """
+    Check each (unique) project has data sharing enabled, concurrently
+    :param project_ids:
+    :param max_workers:
+    :return: The project ids that do not have data sharing enabled
+    """
+    project_ids = list(dict.fromkeys(project_ids))
+    has_data_sharing_list = run_concurrently(
+        lambda project_id_iter: call_with_retries(
+            lambda: check_project_has_data_sharing_enabled(project_id_iter)
+        ),
+        project_ids,
+        max_workers=max_workers
+    )
+    return list(
+        map(
+            lambda project_id_and_has_data_sharing_iter: project_id_and_has_data_sharing_iter[0],
+            filter(
+                lambda project_id_and_has_data_sharing_iter: not project_id_and_has_data_sharing_iter[1],
+                zip(project_ids, has_data_sharing_list)
+            )
+        )
+    )
+
+
+def link_items_to_bundle(
+        bundle_id: str,
+        item_ids: List[str],
+        item_type: str,
+        max_workers: Optional[int] = None,
+        unlink: Optional[bool] = False
+) -> List[str]:
+    """
+    Link (or unlink) data or pipelines to a bundle through a bounded thread pool, retrying rate-limited calls.
+    Progress is logged every 5% of items.
+
+    :param bundle_id:
+    :param item_ids: The data ids or pipeline ids to link to the bundle
+    :param item_type: One of 'data' or 'pipeline'
+    :param max_workers:
+    :param unlink: Unlink the items from the bundle instead
+    :return: The item ids that could not be linked (or unlinked)
+    """
+    if unlink:
+        bundle_item_func: Callable[[str, str], bool] = (
+            remove_data_from_bundle if item_type == "data" else remove_pipeline_from_bundle
+        )
+        action_str = "unlink"
+    else:
+        bundle_item_func: Callable[[str, str], bool] = (
+            add_data_to_bundle if item_type == "data" else add_pipeline_to_bundle
+        )
+        action_str = "link"
+
+    item_ids = list(dict.fromkeys(item_ids))
+    num_items = len(item_ids)
+    progress_interval = max(1, num_items // 20)
+
+    # A 5xx may still have linked (or unlinked) the item, and replaying the call then fails with a conflict,
+    # so we only retry when we've been explicitly rate limited
+    failed_item_ids = []
+    for num_completed, (item_id, is_linked, exc) in enumerate(
+        run_concurrently_as_completed(
+            lambda item_id_iter: call_with_retries(
+                lambda: bundle_item_func(bundle_id, item_id_iter),
+                retryable_status_codes=[429]
+            ),
+            item_ids,
+            max_workers=max_workers
+        ),
+        start=1
+    ):
+        if exc is not None or is_linked is False:
+            logger.warning(
+                f"Could not {action_str} {item_type} {item_id} (bundle {bundle_id})" +
+                (f": {exc}" if exc is not None else "")
+            )
+            failed_item_ids.append(item_id)
+        else:
+            logger.debug(f"Successfully {action_str}ed {item_type} {item_id} (bundle {bundle_id})")
+
+        if num_completed % progress_interval == 0 or num_completed == num_items:
+            logger.info(
+                f"{action_str.capitalize()}ed {num_completed - len(failed_item_ids)} of {num_items} "
+                f"{item_type} items (bundle {bundle_id})"
+            )
+
+    return failed_item_ids
+
+
+def get_bundle_projects(
+        bundle_obj: Bundle,
+        project_obj_list: Optional[List[Project]] = None,
+        project_name_regex: Optional[Pattern] = None
+) -> List[Project]:
+    """
+    Collect the projects to link (or unlink) a bundle to, projects may be specified explicitly
+    or through a regex on the project name (only projects in the same region as the bundle are matched by the regex).
+    Projects are only returned once, the tenant project list is only collected if a regex is provided.
+
+    :param bundle_obj:
+    :param project_obj_list:
+    :param project_name_regex:
+    :return:
+    """
+    projects_by_id: Dict[str, Project] = {}
+
+    for project_obj in project_obj_list or []:
+        projects_by_id.setdefault(project_obj.id, project_obj)
+
+    if project_name_regex is not None:
+        matched_projects = list(
+            filter(
+                lambda project_iter: (
+                    project_name_regex.fullmatch(project_iter.name) is not None and
+                    project_iter.region.id == bundle_obj.region.id
+                ),
+                call_with_retries(lambda: list_projects())
+            )
+        )
+        logger.info(f"Matched {len(matched_projects)} projects with the regex '{project_name_regex.pattern}'")
+        for project_obj in matched_projects:
+            projects_by_id.setdefault(project_obj.id, project_obj)
+
+    return list(projects_by_id.values())
+
+
+def print_bundle_project_results(bundle_project_results: List[Dict]):
+    """
+    Print the per-project results of linking (or unlinking) a bundle as a table with the columns
+     * project_id
+     * project_name
+     * result
+     * error
+    :param bundle_project_results:
+    :return:
+    """
+    from tabulate import tabulate
+
+    print(
+        tabulate(
+            sorted(
+                bundle_project_results,
+                key=lambda result_iter: result_iter["project_name"]
+            ),
+            headers="keys"
+        )
+    )
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+
+"""
+A cached completion backend for the shell autocompletion helpers (autocompletion/helpers)
+
+Shell completions call 'python3 -m icav2_cli_plugins.utils.completion_helpers complete <kind> [<prefix>]'
+once per TAB press, rather than resolving the tenant config with yq and querying the api with curl each time.
+
+Completions are served from a per-project cache, entries are sorted so that the entries matching the prefix
+are found by bisection. Once a cache is older than its ttl the (stale) entries are still served straight away
+and a detached process refreshes the cache in the background, only a missing cache is filled before returning.
+
+Completion caches are stored per tenant and project under
+{ICAV2_CLI_PLUGINS_HOME}/cache/tenants/<tenant_name>/completion/<project_id>/<kind>.json
+(data listings are stored per parent folder under data/<md5sum of the parent folder path>.json)
+and have the following structure
+
+{
+  "time_refreshed": <epoch seconds>,
+  "entries": [
+    ["<completion>", "<description>"],
+    ...
+  ]
+}
+
+The completion path runs on every TAB press, so it only imports from the standard library,
+the api is only queried (through wrapica) when refreshing a cache.
+"""
+
+# External imports
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Completion kinds, data kinds are listed per parent folder (the item type is filtered on completion)
+COMPLETION_KIND_ANALYSIS_IDS = "analysis_ids"
+COMPLETION_KIND_PIPELINE_CODES = "pipeline_codes"
+COMPLETION_KIND_PIPELINE_IDS = "pipeline_ids"
+COMPLETION_KIND_FILES = "files"
+COMPLETION_KIND_FOLDERS = "folders"
+COMPLETION_KIND_FILES_AND_FOLDERS = "files_and_folders"
+
+COMPLETION_DATA_KINDS = [COMPLETION_KIND_FILES, COMPLETION_KIND_FOLDERS, COMPLETION_KIND_FILES_AND_FOLDERS]
+COMPLETION_KINDS = [
+    COMPLETION_KIND_ANALYSIS_IDS, COMPLETION_KIND_PIPELINE_CODES, COMPLETION_KIND_PIPELINE_IDS
+] + COMPLETION_DATA_KINDS
+
+# Caches older than this are refreshed in the background, override with the env var below
+COMPLETION_DEFAULT_TTL_SECONDS = 300
+COMPLETION_TTL_ENV_VAR = "ICAV2_CLI_PLUGINS_COMPLETION_TTL_SECONDS"
+
+# Don't pull more than this many analyses or data items into a single completion cache
+COMPLETION_MAX_ENTRIES = 10000
+
+
+def get_completion_tenant_name() -> Optional[str]:
+    """
+    As per config_helpers.get_tenant, without importing config_helpers
+    Empty env vars are treated as unset, as per the shell helpers
+    :return:
+    """
+    for tenant_env_var in ["ICAV2_TENANT_NAME", "ICAV2_DEFAULT_TENANT_NAME"]:
+        if os.environ.get(tenant_env_var, ""):
+            return os.environ.get(tenant_env_var)
+
+    default_tenant_file_path = Path(os.environ["ICAV2_CLI_PLUGINS_HOME"]) / "tenants" / "default_tenant.txt"
+    if default_tenant_file_path.is_file():
+        with open(default_tenant_file_path, "r") as file_h:
+            return file_h.read().strip()
+
+    return None
+
+
+def get_completion_project_id(tenant_name: str) -> Optional[str]:
+    """
+    Get the project id from the env, otherwise from the tenant session file
+    :param tenant_name:
+    :return:
+    """
+    if os.environ.get("ICAV2_PROJECT_ID", ""):
+        return os.environ.get("ICAV2_PROJECT_ID")
+
+    # As per config_helpers.get_resolved_tenant_config, config_helpers itself imports libica which is slow to import
+    from ruamel.yaml import YAML
+
+    tenant_directory = Path(os.environ["ICAV2_CLI_PLUGINS_HOME"]) / "tenants" / tenant_name
+
+    try:
+        with open(tenant_directory / "config.yaml", "r") as file_h:
+            server_url = (YAML(typ="safe").load(file_h) or {}).get("server-url", "ica.illumina.com")
+        with open(tenant_directory / f".session.{server_url.split('.')[0]}.yaml", "r") as file_h:
+            return (YAML(typ="safe").load(file_h) or {}).get("project-id", None)
+    except FileNotFoundError:
+        return None
+
+
+def get_completion_cache_path(
+        tenant_name: str,
+        project_id: str,
+        kind: str,
+        parent_folder_path: Optional[str] = None
+) -> Path:
+    completion_directory = (
+        Path(os.environ["ICAV2_CLI_PLUGINS_HOME"]) / "cache" / "tenants" / tenant_name / "completion" / project_id
+    )
+
+    if kind in COMPLETION_DATA_KINDS:
+        return completion_directory / "data" / f"{hashlib.md5(parent_folder_path.encode()).hexdigest()}.json"
+
+    return completion_directory / f"{kind}.json"
+
+
+def get_completion_ttl_seconds() -> int:
+    try:
+        return int(os.environ.get(COMPLETION_TTL_ENV_VAR, COMPLETION_DEFAULT_TTL_SECONDS))
+    except ValueError:
+        return COMPLETION_DEFAULT_TTL_SECONDS
+
+
+def read_completion_cache(completion_cache_path: Path) -> Optional[Dict]:
+    """
+    Read a completion cache, None if the cache does not exist or cannot be read
+    :param completion_cache_path:
+    :return:
+    """
+    try:
+        with open(completion_cache_path, "r") as cache_h:
+            return json.load(cache_h)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def get_parent_folder_path_and_name_prefix(prefix: str) -> Tuple[str, str]:
+    """
+    Split the word being completed into the folder to list and the prefix of the name within that folder
+    :param prefix:
+    :return:
+    """
+    if prefix == "" or "/" not in prefix:
+        return "/", prefix
+
+    parent_folder_path, name_prefix = prefix.rsplit("/", 1)
+
+    if not parent_folder_path.startswith("/"):
+        parent_folder_path = "/" + parent_folder_path
+
+    return parent_folder_path.rstrip("/") + "/", name_prefix
+
+
+def get_matching_entries(entries: List[List[str]], prefix: str) -> List[List[str]]:
+    """
+    Get the entries that start with the prefix, entries are sorted by their completion
+    :param entries:
+    :param prefix:
+    :return:
+    """
+    start_index = bisect_left(entries, [prefix])
+
+    matching_entries = []
+    for entry in entries[start_index:]:
+        if not entry[0].startswith(prefix):
+            break
+        matching_entries.append(entry)
+
+    return matching_entries
+
+
+def format_completion_entries(entries: List[List[str]], cols: Optional[int] = None) -> str:
+    """
+    One completion per line, followed by its description (if any) truncated to the terminal width
+    :param entries:
+    :param cols:
+    :return:
+    """
+    if not any(map(lambda entry_iter: entry_iter[1], entries)):
+        return "\n".join(map(lambda entry_iter: entry_iter[0], entries))
+
+    max_completion_length = max(map(lambda entry_iter: len(entry_iter[0]), entries))
+    max_description_length = (cols if cols is not None else 120) - max_completion_length - 4
+
+    return "\n".join(
+        map(
+            lambda entry_iter: f"{entry_iter[0]:<{max_completion_length}} -- {entry_iter[1][:max(max_description_length, 0)]}",
+            entries
+        )
+    )
+
+
+def start_completion_cache_refresh(kind: str, parent_folder_path: Optional[str] = None):
+    """
+    Refresh a completion cache in a detached process, so the shell does not wait on the refresh
+    :param kind:
+    :param parent_folder_path:
+    :return:
+    """
+    subprocess.Popen(
+        [sys.executable, "-m", "icav2_cli_plugins.utils.completion_helpers", "refresh", kind] +
+        ([parent_folder_path] if parent_folder_path is not None else []),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+
+def get_completions(kind: str, prefix: str = "", cols: Optional[int] = None) -> str:
+    """
+    Get the completions of a kind that start with prefix
+    :param kind:
+    :param prefix:
+    :param cols:
+    :return:
+    """
+    tenant_name = get_completion_tenant_name()
+    if tenant_name is None:
+        return ""
+
+    project_id = get_completion_project_id(tenant_name)
+    if project_id is None:
+        return ""
+
+    parent_folder_path = None
+    if kind in COMPLETION_DATA_KINDS:
+        parent_folder_path, name_prefix = get_parent_folder_path_and_name_prefix(prefix)
+        prefix = parent_folder_path + name_prefix
+
+    completion_cache_path = get_completion_cache_path(tenant_name, project_id, kind, parent_folder_path)
+    completion_cache = read_completion_cache(completion_cache_path)
+
+    if completion_cache is None:
+        # Nothing to serve yet, fill the cache before returning
+        completion_cache = refresh_completion_cache(tenant_name, project_id, kind, parent_folder_path)
+    elif time.time() - completion_cache["time_refreshed"] > get_completion_ttl_seconds():
+        start_completion_cache_refresh(kind, parent_folder_path)
+
+    entries = get_matching_entries(completion_cache["entries"], prefix)
+
+    # Data entries hold the data type as their description, filter and drop it
+    if kind == COMPLETION_KIND_FILES:
+        entries = list(filter(lambda entry_iter: entry_iter[1] == "FILE", entries))
+    if kind == COMPLETION_KIND_FOLDERS:
+        entries = list(filter(lambda entry_iter: entry_iter[1] == "FOLDER", entries))
+    if kind in COMPLETION_DATA_KINDS:
+        entries = list(map(lambda entry_iter: [entry_iter[0], ""], entries))
+
+    if len(entries) == 0:
+        return ""
+
+    return format_completion_entries(entries, cols=cols)
+
+
+def get_first_paged_items(get_page: Callable[[int, int], Any], max_items: int) -> List:
+    """
+    Collect at most max_items from an offset paged (and sorted) endpoint, one page at a time,
+    so that we stop querying once we have enough items rather than listing everything and truncating
+    :param get_page: Takes the page offset and page size, returns a paged list
+    :param max_items:
+    :return:
+    """
+    from .concurrency_helpers import call_with_retries
+    from .globals import LIBICAV2_DEFAULT_PAGE_SIZE
+
+    items = []
+    while len(items) < max_items:
+        page_size = min(LIBICAV2_DEFAULT_PAGE_SIZE, max_items - len(items))
+        page = call_with_retries(lambda: get_page(len(items), page_size))
+        items.extend(page.items)
+        if len(page.items) < page_size:
+            break
+
+    return items
+
+
+def get_completion_entries(project_id: str, kind: str, parent_folder_path: Optional[str] = None) -> List[List[str]]:
+    """
+    Query the api for the completion entries of a kind.
+    Analyses (most recent first) and data items are capped at COMPLETION_MAX_ENTRIES
+    :param project_id:
+    :param kind:
+    :param parent_folder_path:
+    :return:
+    """
+    from libica.openapi.v2 import ApiClient
+
+    from .concurrency_helpers import call_with_retries
+    from .config_helpers import get_libicav2_configuration
+
+    if kind == COMPLETION_KIND_ANALYSIS_IDS:
+        from libica.openapi.v2.api.project_analysis_api import ProjectAnalysisApi
+
+        def _get_analyses_page(page_offset: int, page_size: int):
+            with ApiClient(get_libicav2_configuration()) as api_client:
+                return ProjectAnalysisApi(api_client).get_analyses(
+                    project_id,
+                    page_offset=str(page_offset),
+                    page_size=str(page_size),
+                    sort="startDate desc"
+                )
+
+        return list(
+            map(
+                lambda analysis_iter: [
+                    analysis_iter.id,
+                    f"UserRef: {analysis_iter.user_reference}  Date: {analysis_iter.start_date}"
+                ],
+                get_first_paged_items(_get_analyses_page, COMPLETION_MAX_ENTRIES)
+            )
+        )
+
+    if kind in [COMPLETION_KIND_PIPELINE_CODES, COMPLETION_KIND_PIPELINE_IDS]:
+        from wrapica.project_pipelines import list_project_pipelines
+
+        return list(
+            map(
+                lambda project_pipeline_iter: (
+                    [
+                        project_pipeline_iter.pipeline.code,
+                        f"Date={project_pipeline_iter.pipeline.time_created} "
+                        f"Description={project_pipeline_iter.pipeline.description}"
+                    ]
+                    if kind == COMPLETION_KIND_PIPELINE_CODES else
+                    [
+                        project_pipeline_iter.pipeline.id,
+                        f"Code: {project_pipeline_iter.pipeline.code} "
+                        f"Date: {project_pipeline_iter.pipeline.time_created} "
+                        f"Description: {project_pipeline_iter.pipeline.description}"
+                    ]
+                ),
+                call_with_retries(lambda: list_project_pipelines(project_id=project_id))
+            )
+        )
+
+    from libica.openapi.v2.api.project_data_api import ProjectDataApi
+
+    # Folder paths end with a '/', the root folder is just '/'
+    parent_folder_path = parent_folder_path.rstrip("/") + "/"
+
+    def _get_project_data_page(page_offset: int, page_size: int):
+        with ApiClient(get_libicav2_configuration()) as api_client:
+            return ProjectDataApi(api_client).get_project_data_list(
+                project_id,
+                parent_folder_path=parent_folder_path,
+                page_offset=str(page_offset),
+                page_size=str(page_size),
+                sort="path"
+            )
+
+    return list(
+        map(
+            lambda project_data_iter: [
+                project_data_iter.data.details.path,
+                project_data_iter.data.details.data_type
+            ],
+            get_first_paged_items(_get_project_data_page, COMPLETION_MAX_ENTRIES)
+        )
+    )
+
+
+def refresh_completion_cache(
+        tenant_name: str,
+        project_id: str,
+        kind: str,
+        parent_folder_path: Optional[str] = None
+) -> Dict:
+    """
+    Query the api and rewrite the completion cache,
+    only one process refreshes a given cache at a time, others return the cache as it stands
+    :param tenant_name:
+    :param project_id:
+    :param kind:
+    :param parent_folder_path:
+    :return:
+    """
+    import fcntl
+
+    from .plugin_helpers import write_file_atomically
+    from .tenant_helpers import tenant_context
+
+    completion_cache_path = get_completion_cache_path(tenant_name, project_id, kind, parent_folder_path)
+    completion_cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Files and folders of a parent folder share a single listing
+    if kind in COMPLETION_DATA_KINDS:
+        kind = COMPLETION_KIND_FILES_AND_FOLDERS
+
+    with open(completion_cache_path.with_suffix(".lock"), "a") as lock_file_h:
+        try:
+            fcntl.flock(lock_file_h, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another process is already refreshing this cache, wait for it to finish
+            fcntl.flock(lock_file_h, fcntl.LOCK_EX)
+            completion_cache = read_completion_cache(completion_cache_path)
+            if completion_cache is not None:
+                return completion_cache
+
+        with tenant_context(tenant_name):
+            completion_cache = {
+                "time_refreshed": time.time(),
+                "entries": sorted(get_completion_entries(project_id, kind, parent_folder_path)),
+            }
+
+        write_file_atomically(completion_cache_path, json.dumps(completion_cache).encode())
+
+    return completion_cache
+
+
+def main():
+    """
+    Usage:
+        python3 -m icav2_cli_plugins.utils.completion_helpers complete <kind> [<prefix>] [<cols>]
+        python3 -m icav2_cli_plugins.utils.completion_helpers refresh <kind> [<parent_folder_path>]
+
+    Completion never raises, a failed completion just prints nothing
+    :return:
+    """
+    if len(sys.argv) < 3 or sys.argv[1] not in ["complete", "refresh"] or sys.argv[2] not in COMPLETION_KINDS:
+        print(main.__doc__, file=sys.stderr)
+        sys.exit(1)
+
+    command, kind = sys.argv[1:3]
+
+    try:
+        if command == "complete":
+            completions = get_completions(
+                kind,
+                prefix=sys.argv[3] if len(sys.argv) > 3 else "",
+                cols=int(sys.argv[4]) if len(sys.argv) > 4 and sys.argv[4].isdigit() else None
+            )
+            if completions:
+                print(completions)
+        else:
+            tenant_name = get_completion_tenant_name()
+            project_id = get_completion_project_id(tenant_name) if tenant_name is not None else None
+            if project_id is None:
+                sys.exit(1)
+            refresh_completion_cache(
+                tenant_name,
+                project_id,
+                kind,
+                parent_folder_path=sys.argv[3] if len(sys.argv) > 3 else None
+            )
+    except Exception:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+
+"""
+Concurrency helpers
+
+Most of the icav2 endpoints we call are independent of one another (steps of an analysis, pipelines of a project etc.)
+so we issue them through a bounded thread pool rather than one after the other.
+"""
+
+# External imports
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, Future
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Iterable, List, Optional, Any, Iterator, Tuple, Dict, Hashable, TextIO
+
+# Wrapica imports
+from wrapica.libica_exceptions import ApiException
+
+# Local imports
+from .globals import (
+    ICAV2_CLI_PLUGINS_DEFAULT_MAX_WORKERS, ICAV2_CLI_PLUGINS_DEFAULT_MAX_RETRIES,
+    ICAV2_CLI_PLUGINS_DEFAULT_BACKOFF_SECONDS, ICAV2_RETRYABLE_STATUS_CODES
+)
+from .logger import get_logger
+
+# Get logger
+logger = get_logger()
+
+
+def run_concurrently(
+        func: Callable,
+        items: Iterable,
+        max_workers: Optional[int] = None
+) -> List[Any]:
+    """
+    Run func over each item in items through a bounded thread pool.
+    Results are returned in the same order as the input items.
+    If any call raises, the first exception is raised once all submitted calls have completed.
+
+    :param func: A function that takes a single item as input
+    :param items: The items to iterate over
+    :param max_workers: The maximum number of threads, defaults to ICAV2_CLI_PLUGINS_DEFAULT_MAX_WORKERS
+    :return: The list of results
+    """
+    items = list(items)
+
+    # No need to spin up a pool for a single item
+    if len(items) <= 1:
+        return list(map(func, items))
+
+    if max_workers is None:
+        max_workers = ICAV2_CLI_PLUGINS_DEFAULT_MAX_WORKERS
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def run_concurrently_as_completed(
+        func: Callable,
+        items: Iterable,
+        max_workers: Optional[int] = None
+) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+    """
+    Run func over each item in items through a bounded thread pool and yield results as they complete.
+
+    Unlike run_concurrently, exceptions are not raised but yielded back to the caller
+    so that one failure does not stop the remaining items from being processed.
+
+    Closing the generator early (i.e. breaking out of the loop) cancels any calls that have not yet started.
+
+    :param func: A function that takes a single item as input
+    :param items: The items to iterate over
+    :param max_workers: The maximum number of threads, defaults to ICAV2_CLI_PLUGINS_DEFAULT_MAX_WORKERS
+    :return: Yields tuples of (item, result, exception), one of result or exception will be None
+    """
+    if max_workers is None:
+        max_workers = ICAV2_CLI_PLUGINS_DEFAULT_MAX_WORKERS
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        future_to_item = {
+            executor.submit(func, item): item
+            for item in items
+        }
+        for future in as_completed(future_to_item):
+            item = future_to_item[future]
+            try:
+                yield item, future.result(), None
+            except Exception as exc:
+                yield item, None, exc
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def is_retryable_api_exception(exc: ApiException) -> bool:
+    """
+    Rate limited and transient server side errors are worth retrying, client errors are not
+    :param exc:
+    :return:
+    """
+    return getattr(exc, "status", None) in ICAV2_RETRYABLE_STATUS_CODES
+
+
+def call_with_retries(
+        func: Callable,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        retryable_status_codes: Optional[List[int]] = None
+) -> Any:
+    """
+    Call func (that takes no arguments), retrying with exponential backoff (and jitter)
+    if the call raises a retryable ApiException.
+    If the response carries a Retry-After header, we wait at least that long.
+
+    :param func: A function that takes no arguments, i.e lambda: abort_analysis(project_id, analysis_id)
+    :param max_retries: The maximum number of retries, defaults to ICAV2_CLI_PLUGINS_DEFAULT_MAX_RETRIES
+    :param backoff_seconds: The initial backoff, defaults to ICAV2_CLI_PLUGINS_DEFAULT_BACKOFF_SECONDS
+    :param retryable_status_codes: Override the statuses we retry on, defaults to ICAV2_RETRYABLE_STATUS_CODES.
+                                   Calls that are not safe to repeat (i.e launching an analysis) should only retry on 429
+    :return: The result of func
+    """
+    if max_retries is None:
+        max_retries = ICAV2_CLI_PLUGINS_DEFAULT_MAX_RETRIES
+    if backoff_seconds is None:
+        backoff_seconds = ICAV2_CLI_PLUGINS_DEFAULT_BACKOFF_SECONDS
+
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except ApiException as exc:
+            if retryable_status_codes is not None:
+                is_retryable = getattr(exc, "status", None) in retryable_status_codes
+            else:
+                is_retryable = is_retryable_api_exception(exc)
+            if not is_retryable or attempt >= max_retries:
+                raise
+
+            sleep_seconds = backoff_seconds * (2 ** attempt) + random.uniform(0, backoff_seconds)
+
+            # Respect the Retry-After header if provided
+            headers = getattr(exc, "headers", None)
+            if headers is not None and headers.get("Retry-After", None) is not None:
+                try:
+                    sleep_seconds = max(sleep_seconds, float(headers.get("Retry-After")))
+                except ValueError:
+                    pass
+
+            logger.debug(
+                f"Got status {exc.status}, retrying in {sleep_seconds:.1f} seconds "
+                f"(attempt {attempt + 1} of {max_retries})"
+            )
+            time.sleep(sleep_seconds)
+            attempt += 1
+
+
+class RateLimiter:
+    """
+    Space out calls shared across threads so that no more than calls_per_minute are started in any one minute.
+    A rate limiter with calls_per_minute set to None does not wait at all.
+    """
+
+    def __init__(self, calls_per_minute: Optional[int] = None):
+        self.interval_seconds: float = 60 / calls_per_minute if calls_per_minute else 0
+        self._next_call_time: float = 0
+        self._lock = Lock()
+
+    def wait(self):
+        """
+        Block until the caller is allowed to make the next call
+        """
+        if self.interval_seconds == 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            sleep_seconds = max(0.0, self._next_call_time - now)
+            self._next_call_time = max(now, self._next_call_time) + self.interval_seconds
+
+        if sleep_seconds > 0:
+            time.sleep(sleep_seconds)
+
+
+class Memoiser:
+    """
+    Thread-safe memoisation of a single argument function keyed by its (hashable) argument.
+
+    Concurrent callers for the same key wait on the first call rather than repeating it,
+    i.e. 500 runs writing to the same output folder only create it once.
+    Failed calls are not memoised so that a later caller may try again.
+    """
+
+    def __init__(self, func: Callable[[Hashable], Any]):
+        self.func = func
+        self._futures: Dict[Hashable, Future] = {}
+        self._lock = Lock()
+
+    def __call__(self, key: Hashable) -> Any:
+        with self._lock:
+            future = self._futures.get(key, None)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._futures[key] = future
+
+        if is_owner:
+            try:
+                future.set_result(self.func(key))
+            except Exception as exc:
+                with self._lock:
+                    _ = self._futures.pop(key, None)
+                future.set_exception(exc)
+
+        return future.result()
+
+
+class JsonlJournal:
+    """
+    Record the result of each item of a batch as one json object per line as each item completes,
+    so that an interrupted (or partially failed) batch can be resumed by skipping the items already recorded.
+
+    Entries are written to journal_path if set, otherwise to default_h (or dropped if that is also None).
+    Entries should only be written from one thread, i.e. the thread iterating over run_concurrently_as_completed.
+    """
+
+    def __init__(self, journal_path: Optional[Path] = None, default_h: Optional[TextIO] = None):
+        self.journal_path = journal_path
+        self.default_h = default_h
+        self._journal_h: Optional[TextIO] = None
+
+    def __enter__(self) -> 'JsonlJournal':
+        if self.journal_path is not None:
+            self._journal_h = open(self.journal_path, "a")
+        else:
+            self._journal_h = self.default_h
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.journal_path is not None and self._journal_h is not None:
+            self._journal_h.close()
+        self._journal_h = None
+
+    def write(self, entry: Dict):
+        """
+        Append an entry to the journal
+        :param entry:
+        :return:
+        """
+        if self._journal_h is None:
+            return
+        self._journal_h.write(json.dumps(entry) + "\n")
+        # Flush each line so that a killed batch can still be resumed
+        self._journal_h.flush()
+
+    @staticmethod
+    def get_error_str(exc: Optional[Exception]) -> Optional[str]:
+        """
+        The first line of an exception (or its class name if it has no message) to record in the journal
+        :param exc:
+        :return:
+        """
+        if exc is None:
+            return None
+        return str(exc).splitlines()[0] if str(exc) else exc.__class__.__name__
+
+    @staticmethod
+    def read(journal_path: Path) -> Iterator[Dict]:
+        """
+        Iterate over the entries of an existing journal
+        :param journal_path:
+        :return:
+        """
+        with open(journal_path, "r") as journal_h:
+            for line in journal_h:
+                if line.strip() == "":
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Partially written line, i.e the previous batch was killed mid-write
+                    continue
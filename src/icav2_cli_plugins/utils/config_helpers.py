@@ -6,15 +6,21 @@ Configuration helpers
 From collecting configuration from ~/.session.ica.yaml through ruamel to creating configuration object for libicav2
 """
 # External data
+import fcntl
 import os
+import threading
+import time
+import weakref
 from base64 import b64decode
 from collections import OrderedDict
+from contextlib import contextmanager
+from io import StringIO
 import json
 from ruamel.yaml import YAML
 from pathlib import Path
 from datetime import datetime
 from jwt import decode, InvalidTokenError
-from typing import Optional
+from typing import Optional, Iterator, Dict, List
 from urllib.parse import urlparse
 
 # Libica
@@ -24,8 +30,12 @@ from libica.openapi.v2 import Configuration
 from .globals import (
     ICAV2_CONFIG_FILE_PATH, ICAV2_SESSION_FILE_PATH, ICAV2_ACCESS_TOKEN_AUDIENCE,
     DEFAULT_ICAV2_BASE_URL, ICAV2_SESSION_FILE_ACCESS_TOKEN_KEY, ICAV2_SESSION_FILE_PROJECT_ID_KEY,
-    ICAV2_CONFIG_FILE_SERVER_URL_KEY, ICAV2_CLI_PLUGINS_TENANTS_HOME, ICAV2_CLI_PLUGINS_TENANT_CONFIG_FILE_PATH
+    ICAV2_CONFIG_FILE_SERVER_URL_KEY, ICAV2_CLI_PLUGINS_TENANTS_HOME, ICAV2_CLI_PLUGINS_TENANT_CONFIG_FILE_PATH,
+    ICAV2_CLI_PLUGINS_TENANT_SESSION_LOCK_FILE_PATH, ICAV2_ACCESS_TOKEN_DEFAULT_REFRESH_MARGIN_SECONDS,
+    ICAV2_ACCESS_TOKEN_REFRESH_MARGIN_ENV_VAR, ICAV2_ACCESS_TOKEN_REFRESH_RETRY_SECONDS,
+    ICAV2_CLI_PLUGINS_PERSIST_CONFIG_CACHE_ENV_VAR
 )
+from .plugin_helpers import write_file_atomically, get_cache_directory
 from .subprocess_handler import run_subprocess_proc
 from .logger import get_logger
 
@@ -34,6 +44,11 @@ logger = get_logger()
 
 # GLobals
 LIBICAV2_CONFIGURATION: Optional[Configuration] = None
+# Serialise token refreshes of a tenant between threads, the file lock serialises them between processes
+ACCESS_TOKEN_REFRESH_THREAD_LOCKS: Dict[str, threading.Lock] = {}
+ACCESS_TOKEN_REFRESH_THREAD_LOCKS_LOCK = threading.Lock()
+# Resolved tenant config and session files for this invocation, keyed by tenant name
+RESOLVED_TENANT_CONFIG_CACHE: Dict[str, Dict] = {}
 
 
 def get_config_file_path() -> Path:
@@ -66,6 +81,105 @@ def get_tenant_config_file_path(tenant_name: str, raise_if_not_found: bool = Tru
     return tenant_config_file_path
 
 
+def get_file_signature(file_path: Path) -> Optional[List[int]]:
+    """
+    A cheap signature of a file, its modification time, inode and size.
+    The inode is included since session files are replaced (rather than edited) when the access token is refreshed.
+    :param file_path:
+    :return: None if the file does not exist
+    """
+    try:
+        file_stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return [file_stat.st_mtime_ns, file_stat.st_ino, file_stat.st_size]
+
+
+def load_yaml_file_safe(file_path: Path) -> Dict:
+    """
+    Load a plain yaml file with the safe (C based where available) loader,
+    much faster than the round-trip loader, use the round-trip loader for files we write back to
+    :param file_path:
+    :return:
+    """
+    with open(file_path, "r") as file_h:
+        return YAML(typ="safe").load(file_h) or {}
+
+
+def get_resolved_tenant_config(tenant_name: str) -> Dict:
+    """
+    Get the contents of the tenant config file and tenant session file, loaded once per process.
+
+    The resolved config has the following keys
+      * config: the contents of the tenant config file
+      * session_file_path: the path of the tenant session file, from the server url in the config file
+      * session: the contents of the tenant session file, None if the session file does not exist
+      * config_file_signature / session_file_signature: used to reload the files once they change
+
+    If ICAV2_CLI_PLUGINS_PERSIST_CONFIG_CACHE is set, the resolved config is also written
+    as json under $ICAV2_CLI_PLUGINS_HOME/cache/config so that subsequent invocations need not parse the yaml at all.
+
+    :param tenant_name:
+    :return:
+    """
+    config_file_path = get_tenant_config_file_path(tenant_name)
+    config_file_signature = get_file_signature(config_file_path)
+
+    def _is_current(resolved_tenant_config_iter: Optional[Dict]) -> bool:
+        return (
+            resolved_tenant_config_iter is not None and
+            resolved_tenant_config_iter.get("config_file_signature") == config_file_signature and
+            resolved_tenant_config_iter.get("session_file_signature") == get_file_signature(
+                Path(resolved_tenant_config_iter["session_file_path"])
+            )
+        )
+
+    resolved_tenant_config = RESOLVED_TENANT_CONFIG_CACHE.get(tenant_name, None)
+    if _is_current(resolved_tenant_config):
+        return resolved_tenant_config
+
+    persisted_file_path: Optional[Path] = None
+    if os.environ.get(ICAV2_CLI_PLUGINS_PERSIST_CONFIG_CACHE_ENV_VAR, None) is not None:
+        persisted_file_path = get_cache_directory() / "config" / f"{tenant_name}.json"
+
+    if persisted_file_path is not None and persisted_file_path.is_file():
+        try:
+            with open(persisted_file_path, "r") as cache_h:
+                resolved_tenant_config = json.load(cache_h)
+            if _is_current(resolved_tenant_config):
+                RESOLVED_TENANT_CONFIG_CACHE[tenant_name] = resolved_tenant_config
+                return resolved_tenant_config
+        except Exception as exc:
+            logger.debug(f"Could not load cached config for tenant {tenant_name}, reloading: {exc}")
+
+    logger.debug(f"Reading in the config and session files for tenant {tenant_name}")
+    tenant_config_dict = load_yaml_file_safe(config_file_path)
+    server_url = tenant_config_dict.get(ICAV2_CONFIG_FILE_SERVER_URL_KEY, urlparse(DEFAULT_ICAV2_BASE_URL).netloc)
+    session_file_path = config_file_path.parent / f".session.{server_url.split('.')[0]}.yaml"
+
+    # Take the signature before reading so that a concurrent change is picked up on the next call
+    session_file_signature = get_file_signature(session_file_path)
+    try:
+        tenant_session_dict = load_yaml_file_safe(session_file_path)
+    except FileNotFoundError:
+        tenant_session_dict = None
+
+    resolved_tenant_config = {
+        "config": tenant_config_dict,
+        "session_file_path": str(session_file_path),
+        "session": tenant_session_dict,
+        "config_file_signature": config_file_signature,
+        "session_file_signature": session_file_signature,
+    }
+    RESOLVED_TENANT_CONFIG_CACHE[tenant_name] = resolved_tenant_config
+
+    if persisted_file_path is not None:
+        # The config holds the api key, keep the cache as private as the config file itself
+        write_file_atomically(persisted_file_path, json.dumps(resolved_tenant_config).encode(), mode=0o600)
+
+    return resolved_tenant_config
+
+
 def read_config_file(tenant_name: Optional[str] = None) -> OrderedDict:
     """
     Get the contents of the session file (~/.icav2/config.ica.yaml)
@@ -73,7 +187,7 @@ def read_config_file(tenant_name: Optional[str] = None) -> OrderedDict:
     """
 
     if tenant_name is not None:
-        config_file_path = get_tenant_config_file_path(tenant_name)
+        return OrderedDict(get_resolved_tenant_config(tenant_name)["config"])
     else:
         config_file_path = get_config_file_path()
 
@@ -111,30 +225,13 @@ def read_tenant_session_file(tenant_name: str) -> OrderedDict:
     :return:
     """
 
-    logger.debug("Reading in the tenant session file")
-    yaml = YAML()
-
-    tenant_session_file_path: Path = Path(
-        ICAV2_CLI_PLUGINS_TENANTS_HOME.format(
-            ICAV2_CLI_PLUGINS_HOME=os.environ["ICAV2_CLI_PLUGINS_HOME"],
-            tenant_name=tenant_name
-        )
-    ) / (
-        ".session.{server_url_prefix}.yaml".format(
-            server_url_prefix=urlparse(
-                get_icav2_base_url(tenant_name=tenant_name)
-            ).netloc.split(".")[0]
-        )
-    )
+    resolved_tenant_config = get_resolved_tenant_config(tenant_name)
 
-    if not tenant_session_file_path.is_file():
-        logger.error(f"Could not get file path {tenant_session_file_path}")
+    if resolved_tenant_config["session"] is None:
+        logger.error(f"Could not get file path {resolved_tenant_config['session_file_path']}")
         raise FileNotFoundError
 
-    with open(tenant_session_file_path, "r") as file_h:
-        data = yaml.load(file_h)
-
-    return data
+    return OrderedDict(resolved_tenant_config["session"])
 
 
 def get_access_token_from_session_file(refresh: bool = True) -> str:
@@ -142,6 +239,12 @@ def get_access_token_from_session_file(refresh: bool = True) -> str:
     Collect the contents of the access token
     :return:
     """
+    tenant_name = get_tenant(raise_if_not_found=False)
+    if tenant_name is not None:
+        if not refresh:
+            return read_tenant_session_file(tenant_name).get(ICAV2_SESSION_FILE_ACCESS_TOKEN_KEY)
+        return get_tenant_access_token_with_refresh(tenant_name)
+
     session_data: OrderedDict = read_session_file()
 
     access_token: str = session_data.get(ICAV2_SESSION_FILE_ACCESS_TOKEN_KEY, None)
@@ -257,11 +360,222 @@ def check_access_token_expiry(access_token: str) -> bool:
     return False
 
 
+def get_access_token_seconds_remaining(access_token: str) -> Optional[int]:
+    """
+    Get the number of seconds until an access token expires (negative if it has already expired)
+    :param access_token:
+    :return: None if the access token cannot be decoded
+    """
+    try:
+        return get_jwt_token_obj(access_token, ICAV2_ACCESS_TOKEN_AUDIENCE).get("exp") - int(time.time())
+    except InvalidTokenError:
+        return None
+
+
+def get_access_token_refresh_margin_seconds() -> int:
+    """
+    Access tokens are refreshed this many seconds ahead of their expiry,
+    set ICAV2_ACCESS_TOKEN_REFRESH_MARGIN_SECONDS to override the default of five minutes
+    :return:
+    """
+    refresh_margin_env = os.environ.get(ICAV2_ACCESS_TOKEN_REFRESH_MARGIN_ENV_VAR, None)
+
+    if refresh_margin_env is None:
+        return ICAV2_ACCESS_TOKEN_DEFAULT_REFRESH_MARGIN_SECONDS
+
+    try:
+        return int(refresh_margin_env)
+    except ValueError:
+        logger.warning(
+            f"Could not parse {ICAV2_ACCESS_TOKEN_REFRESH_MARGIN_ENV_VAR}='{refresh_margin_env}' as an integer, "
+            f"using the default of {ICAV2_ACCESS_TOKEN_DEFAULT_REFRESH_MARGIN_SECONDS} seconds"
+        )
+        return ICAV2_ACCESS_TOKEN_DEFAULT_REFRESH_MARGIN_SECONDS
+
+
+def get_tenant_session_file_path(tenant_name: str) -> Path:
+    """
+    Get the path of the tenant session file from the server url in the tenant config file,
+    this ignores the ICAV2_BASE_URL env var (which belongs to the current tenant)
+    :param tenant_name:
+    :return:
+    """
+    return Path(get_resolved_tenant_config(tenant_name)["session_file_path"])
+
+
+def get_access_token_refresh_thread_lock(tenant_name: str) -> threading.Lock:
+    """
+    Get the lock that serialises access token refreshes of a tenant between threads,
+    refreshes of different tenants do not wait on one another
+    :param tenant_name:
+    :return:
+    """
+    with ACCESS_TOKEN_REFRESH_THREAD_LOCKS_LOCK:
+        return ACCESS_TOKEN_REFRESH_THREAD_LOCKS.setdefault(tenant_name, threading.Lock())
+
+
+@contextmanager
+def tenant_session_file_lock(tenant_name: str) -> Iterator[None]:
+    """
+    Hold an advisory lock on the tenant session file,
+    so that only one thread (or process on this host) refreshes the access token at a time
+    :param tenant_name:
+    :return:
+    """
+    lock_file_path = Path(
+        ICAV2_CLI_PLUGINS_TENANT_SESSION_LOCK_FILE_PATH.format(
+            ICAV2_CLI_PLUGINS_TENANTS_HOME=ICAV2_CLI_PLUGINS_TENANTS_HOME.format(
+                ICAV2_CLI_PLUGINS_HOME=os.environ["ICAV2_CLI_PLUGINS_HOME"],
+                tenant_name=tenant_name
+            )
+        )
+    )
+
+    with get_access_token_refresh_thread_lock(tenant_name), open(lock_file_path, "a") as lock_file_h:
+        fcntl.flock(lock_file_h, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file_h, fcntl.LOCK_UN)
+
+
+def get_tenant_access_token_with_refresh(tenant_name: str, refresh_margin_seconds: Optional[int] = None) -> str:
+    """
+    Get an access token for a tenant that is valid for at least refresh_margin_seconds.
+
+    The access token in the tenant session file is used if it is still fresh,
+    otherwise a new access token is created from the tenant api key and written back to the tenant session file.
+
+    Refreshes happen under an advisory file lock and the session file is read again once the lock is held,
+    so when many processes notice an expiring token at once only the first creates a new token,
+    the rest pick up the token it wrote.
+
+    :param tenant_name:
+    :param refresh_margin_seconds: Defaults to get_access_token_refresh_margin_seconds()
+    :return:
+    """
+    if refresh_margin_seconds is None:
+        refresh_margin_seconds = get_access_token_refresh_margin_seconds()
+
+    tenant_session_file_path = get_tenant_session_file_path(tenant_name)
+
+    def _get_fresh_session_access_token() -> Optional[str]:
+        # The resolved config is reloaded whenever the session file has been replaced
+        tenant_session_dict = get_resolved_tenant_config(tenant_name)["session"]
+        if tenant_session_dict is None:
+            return None
+        access_token = tenant_session_dict.get(ICAV2_SESSION_FILE_ACCESS_TOKEN_KEY, None)
+        if access_token is None:
+            return None
+        if (get_access_token_seconds_remaining(access_token) or 0) <= refresh_margin_seconds:
+            return None
+        return access_token
+
+    # Fast path, no lock required
+    session_access_token = _get_fresh_session_access_token()
+    if session_access_token is not None:
+        return session_access_token
+
+    with tenant_session_file_lock(tenant_name):
+        # Another process may have refreshed the token while we waited for the lock
+        session_access_token = _get_fresh_session_access_token()
+        if session_access_token is not None:
+            logger.debug(f"Using the access token refreshed by another process for tenant {tenant_name}")
+            return session_access_token
+
+        logger.info(f"Refreshing the access token for tenant {tenant_name}")
+        tenant_config_dict = read_config_file(tenant_name=tenant_name)
+        access_token = create_access_token_from_api_key(
+            tenant_config_dict.get("x-api-key"),
+            base_url="https://{server_url}/ica/rest".format(
+                server_url=tenant_config_dict.get(
+                    ICAV2_CONFIG_FILE_SERVER_URL_KEY,
+                    urlparse(DEFAULT_ICAV2_BASE_URL).netloc
+                )
+            )
+        )
+
+        # Keep the other keys of the session file (i.e. the project id)
+        yaml = YAML()
+        tenant_session_yaml_object = OrderedDict()
+        if tenant_session_file_path.is_file():
+            with open(tenant_session_file_path, "r") as session_file_h:
+                tenant_session_yaml_object = yaml.load(session_file_h) or OrderedDict()
+        tenant_session_yaml_object[ICAV2_SESSION_FILE_ACCESS_TOKEN_KEY] = access_token
+
+        session_str_io = StringIO()
+        yaml.dump(tenant_session_yaml_object, session_str_io)
+        write_file_atomically(tenant_session_file_path, session_str_io.getvalue().encode(), mode=0o600)
+
+    return access_token
+
+
+def start_access_token_refresh_timer(configuration: Configuration, tenant_name: str):
+    """
+    Refresh the access token of a libica configuration in the background,
+    shortly before the token expires, so that long-running commands (i.e. watching an analysis) are not interrupted.
+
+    The ICAV2_ACCESS_TOKEN env var (read by wrapica) is updated too if it still holds the old token.
+    The timer is a daemon thread and stops once the configuration is no longer referenced.
+
+    :param configuration:
+    :param tenant_name:
+    :return:
+    """
+    configuration_ref = weakref.ref(configuration)
+
+    def _schedule(delay_seconds: float):
+        timer = threading.Timer(delay_seconds, _refresh)
+        timer.daemon = True
+        timer.start()
+
+    def _refresh():
+        configuration_obj = configuration_ref()
+        if configuration_obj is None:
+            return
+
+        old_access_token = configuration_obj.access_token
+        try:
+            access_token = get_tenant_access_token_with_refresh(tenant_name)
+        except Exception as exc:
+            logger.warning(
+                f"Could not refresh the access token for tenant {tenant_name} in the background, "
+                f"trying again in {ICAV2_ACCESS_TOKEN_REFRESH_RETRY_SECONDS} seconds: {exc}"
+            )
+            _schedule(ICAV2_ACCESS_TOKEN_REFRESH_RETRY_SECONDS)
+            return
+
+        configuration_obj.access_token = access_token
+        if os.environ.get("ICAV2_ACCESS_TOKEN", None) == old_access_token:
+            os.environ["ICAV2_ACCESS_TOKEN"] = access_token
+
+        _schedule_next(access_token)
+
+    def _schedule_next(access_token: str):
+        seconds_remaining = get_access_token_seconds_remaining(access_token)
+        if seconds_remaining is None:
+            return
+        # Never reschedule straight away, i.e. if the token lifetime is shorter than the refresh margin
+        _schedule(
+            max(
+                seconds_remaining - get_access_token_refresh_margin_seconds(),
+                ICAV2_ACCESS_TOKEN_REFRESH_RETRY_SECONDS
+            )
+        )
+
+    _schedule_next(configuration.access_token)
+
+
 def refresh_access_token() -> str:
     """
     Run standard command to get a new token in the session file
     :return:
     """
+    tenant_name = get_tenant(raise_if_not_found=False)
+    if tenant_name is not None:
+        # Refresh directly from the tenant api key rather than spawning the icav2 cli
+        return get_tenant_access_token_with_refresh(tenant_name)
+
     project_list_returncode, project_list_stdout, project_list_stderr = \
         run_subprocess_proc(["icav2", "projects", "list"], capture_output=True)
 
@@ -300,10 +614,20 @@ def set_libicav2_configuration():
 
     logger.debug("Setting the libicav2 configuration object")
 
-    host = get_icav2_base_url(tenant_name=get_tenant(raise_if_not_found=False))
+    tenant_name = get_tenant(raise_if_not_found=False)
+    host = get_icav2_base_url(tenant_name=tenant_name)
     access_token = os.environ.get("ICAV2_ACCESS_TOKEN", None)
 
-    if access_token is None or not check_access_token_expiry(access_token):
+    # Refresh ahead of expiry, so that a token does not expire part way through a command.
+    # Without a tenant we have no api key to refresh from, so a token that is still valid is used as is
+    if (
+            access_token is None or
+            (
+                tenant_name is not None and
+                (get_access_token_seconds_remaining(access_token) or 0) <= get_access_token_refresh_margin_seconds()
+            ) or
+            (tenant_name is None and not check_access_token_expiry(access_token))
+    ):
         access_token = get_access_token_from_session_file()
 
     LIBICAV2_CONFIGURATION = Configuration(
@@ -311,6 +635,9 @@ def set_libicav2_configuration():
         access_token=access_token
     )
 
+    if tenant_name is not None:
+        start_access_token_refresh_timer(LIBICAV2_CONFIGURATION, tenant_name)
+
 
 def get_libicav2_configuration() -> Configuration:
     if LIBICAV2_CONFIGURATION is None:
@@ -319,11 +646,14 @@ def get_libicav2_configuration() -> Configuration:
     return LIBICAV2_CONFIGURATION
 
 
-def create_access_token_from_api_key(api_key: str) -> str:
+def create_access_token_from_api_key(api_key: str, base_url: Optional[str] = None) -> str:
+    if base_url is None:
+        base_url = get_icav2_base_url(tenant_name=get_tenant(raise_if_not_found=False))
+
     get_api_key_returncode, get_api_key_stdout, get_api_key_stderr = run_subprocess_proc(
         [
             "curl", "--fail", "--silent", "--location", "--show-error",
-            "--url", f"{get_icav2_base_url(tenant_name=get_tenant(raise_if_not_found=False))}/api/tokens",
+            "--url", f"{base_url}/api/tokens",
             "--header", "Accept: application/vnd.illumina.v3+json",
             "--header", f"X-API-Key: {api_key}",
             "--data", ""
@@ -7,12 +7,12 @@ CWL Handlers
 # Standard imports
 import hashlib
 import re
-import subprocess
+import shutil
 from copy import deepcopy
+from io import StringIO
 from pathlib import Path
-from typing import Optional, List, Dict, Union, Tuple
+from typing import Optional, List, Dict, Union, Tuple, Any, Callable, TYPE_CHECKING
 import json
-import sys
 from zipfile import ZipFile
 from mdutils import MdUtils
 from urllib.parse import urlparse
@@ -21,6 +21,7 @@ from tempfile import TemporaryDirectory, NamedTemporaryFile
 
 # CWL Utils
 from cwl_utils.parser import load_document_by_uri, \
+    load_document_by_yaml, \
     Workflow, \
     WorkflowStep, \
     CommandLineTool
@@ -31,9 +32,15 @@ from cwl_utils.parser.latest import \
     shortname, \
     RecordSchema
 
+# Wrapica imports
+from wrapica.pipelines import download_pipeline_file, list_pipeline_files
+
 # Local imports
+from . import get_md5sum_from_file
+from .concurrency_helpers import run_concurrently, call_with_retries
 from .cwl_typing_helpers import InputEnumSchemaType, InputRecordSchemaType, InputArraySchemaType
 from .logger import get_logger
+from .plugin_helpers import get_cache_directory, write_file_atomically
 
 from .subprocess_handler import run_subprocess_proc
 from .config_helpers import get_libicav2_configuration
@@ -41,6 +48,140 @@ from .config_helpers import get_libicav2_configuration
 
 logger = get_logger()
 
+if TYPE_CHECKING:
+    from cwltool.context import LoadingContext
+
+# Parsed documents for this invocation, keyed by document type, uri and content hash
+CWL_DOCUMENT_CACHE: Dict[str, Any] = {}
+
+
+def get_cwl_document_cache_key(file_path: Path, document_type: str) -> str:
+    """
+    The cache key is the hash of the document contents alongside its uri,
+    we cannot key on contents alone as the ids of a parsed document are relative to its uri.
+    :param file_path:
+    :param document_type:
+    :return:
+    """
+    from importlib.metadata import version
+
+    hash_obj = hashlib.sha256()
+    hash_obj.update(f"{document_type}:{version('cwl-utils')}:{file_path.as_uri()}".encode())
+    with open(file_path, "rb") as file_h:
+        hash_obj.update(file_h.read())
+
+    return hash_obj.hexdigest()
+
+
+def get_cached_cwl_document(file_path: Path, document_type: str, loader: Callable[[Path], Any]) -> Any:
+    """
+    Load a document through loader, unless we've already seen a document with the same uri and contents.
+
+    Documents are only cached for this invocation, the key does not include the contents of any files
+    the document imports (which cannot change mid-invocation, but may between invocations).
+    Each caller gets its own copy of the document so that one caller's changes are not seen by another.
+
+    :param file_path:
+    :param document_type:
+    :param loader:
+    :return:
+    """
+    file_path = Path(file_path).resolve()
+    cache_key = get_cwl_document_cache_key(file_path, document_type)
+
+    if cache_key not in CWL_DOCUMENT_CACHE:
+        CWL_DOCUMENT_CACHE[cache_key] = loader(file_path)
+
+    return deepcopy(CWL_DOCUMENT_CACHE[cache_key])
+
+
+def load_cwl_document(file_path: Path) -> Union[Workflow, CommandLineTool]:
+    """
+    Memoised wrapper around cwl_utils' load_document_by_uri,
+    subworkflows and tools are often referenced by many steps of a workflow
+    :param file_path:
+    :return:
+    """
+    return get_cached_cwl_document(file_path, "cwl", load_document_by_uri)
+
+
+def load_schema_yaml(file_path: Path) -> Dict:
+    """
+    Memoised yaml load of a schema file
+    :param file_path:
+    :return:
+    """
+    def _load_yaml(yaml_file_path: Path) -> Dict:
+        with open(yaml_file_path, "r") as schema_h:
+            return yaml.YAML(typ="safe").load(schema_h)
+
+    return get_cached_cwl_document(file_path, "schema", _load_yaml)
+
+
+def get_pipeline_cwl_cache_directory(pipeline_id: str, time_modified: str) -> Path:
+    """
+    Pipeline cwl files are cached per pipeline, under a directory for the modification time of the pipeline
+    :param pipeline_id:
+    :param time_modified:
+    :return:
+    """
+    return (
+        get_cache_directory() / "pipelines" / pipeline_id / "cwl" /
+        re.sub(r"[^0-9A-Za-z]", "", time_modified)
+    )
+
+
+def get_cwl_obj_from_pipeline_id(pipeline_id: str, time_modified: str) -> Workflow:
+    """
+    Get the workflow object of a cwl pipeline.
+
+    The pipeline files are downloaded (concurrently) into the cache, unless they have already been downloaded
+    for this modification time of the pipeline, and the workflow is loaded through load_cwl_document.
+    Pipeline files cached for an older modification time of the pipeline are removed.
+
+    :param pipeline_id:
+    :param time_modified: The time the pipeline was last modified
+    :raises FileNotFoundError: If the pipeline does not have a top level workflow.cwl file
+    :return:
+    """
+    pipeline_cwl_dir = get_pipeline_cwl_cache_directory(pipeline_id, time_modified)
+    workflow_file = pipeline_cwl_dir / "workflow.cwl"
+
+    if workflow_file.is_file():
+        logger.debug(f"Using cached cwl files for pipeline {pipeline_id}")
+        return load_cwl_document(workflow_file)
+
+    # Download into a temporary directory alongside the cache directory,
+    # and then move it into place, so we never load a partially downloaded pipeline
+    pipeline_cwl_dir.parent.mkdir(parents=True, exist_ok=True)
+    with TemporaryDirectory(dir=pipeline_cwl_dir.parent, prefix=".tmp") as tmp_dir:
+        tmp_pipeline_cwl_dir = Path(tmp_dir) / "files"
+
+        def _download_pipeline_file(pipeline_file) -> None:
+            file_path = tmp_pipeline_cwl_dir / pipeline_file.name
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            call_with_retries(lambda: download_pipeline_file(pipeline_id, pipeline_file.id, file_path))
+
+        run_concurrently(_download_pipeline_file, call_with_retries(lambda: list_pipeline_files(pipeline_id)))
+
+        if not (tmp_pipeline_cwl_dir / "workflow.cwl").is_file():
+            raise FileNotFoundError(
+                f"Expected file 'workflow.cwl' in the top directory of pipeline {pipeline_id}, but it was not found"
+            )
+
+        try:
+            tmp_pipeline_cwl_dir.rename(pipeline_cwl_dir)
+        except OSError:
+            # Another invocation has already cached this pipeline, use theirs
+            pass
+
+    # Remove cwl files from older versions of the pipeline
+    for stale_pipeline_cwl_dir in pipeline_cwl_dir.parent.iterdir():
+        if not stale_pipeline_cwl_dir == pipeline_cwl_dir and not stale_pipeline_cwl_dir.name.startswith(".tmp"):
+            shutil.rmtree(stale_pipeline_cwl_dir, ignore_errors=True)
+
+    return load_cwl_document(workflow_file)
+
 
 class CWLSchema:
     """
@@ -194,10 +335,8 @@ class CWLSchema:
     def load_schema_from_uri(cls, uri_input):
         file_path: Path = Path(urlparse(uri_input).path)
 
-        yaml_handler = yaml.YAML()
-
-        with open(file_path, "r") as schema_h:
-            schema_obj = yaml_handler.load(schema_h)
+        # Copy since RecordSchema holds on to the dict we give it
+        schema_obj = deepcopy(load_schema_yaml(file_path))
 
         return cls(RecordSchema(schema_obj), file_path)
 
@@ -205,15 +344,20 @@ class CWLSchema:
 class ZippedCWLWorkflow:
     """
     Used for cwl files
+
+    The packed workflow, inputs template, overrides list, plot and html documentation are
+    cached under $ICAV2_CLI_PLUGINS_HOME/cache/cwl-workflows/<zip md5sum>/
+    so re-deploying the same zip (i.e the same release to multiple projects or tenants) skips the heavy lifting.
     """
 
-    def __init__(self, zipped_cwl_file_path: Path):
+    def __init__(self, zipped_cwl_file_path: Path, use_cache: bool = True):
         """
         Initialise a zip workflow by
         * Extracting
         * Packing into a zipped json
         * Imported as a CWL object
         :param zipped_cwl_file_path:
+        :param use_cache: Read from / write to the workflow artifacts cache
         """
         self.zipped_cwl_file_path: Path = zipped_cwl_file_path
 
@@ -223,6 +367,14 @@ class ZippedCWLWorkflow:
                          f"input parameter zipped cwl file path value '{self.zipped_cwl_file_path}' did not exist")
             raise FileNotFoundError
 
+        # Key the artifacts cache on the contents of the zip
+        self.zip_md5sum: str = get_md5sum_from_file(self.zipped_cwl_file_path)
+        self.artifacts_cache_dir: Optional[Path] = (
+            get_cache_directory() / "cwl-workflows" / self.zip_md5sum
+            if use_cache
+            else None
+        )
+
         # Unzip
         self.unzipped_temp_dir: TemporaryDirectory = TemporaryDirectory()
         with ZipFile(self.zipped_cwl_file_path, 'r') as zip_ref:
@@ -241,50 +393,236 @@ class ZippedCWLWorkflow:
         self.cwl_file_path = list(filter(lambda x: x.name == "workflow.cwl", workflow_file_list))[0]
         self.cwl_tool_files = list(filter(lambda x: x.name not in ["workflow.cwl", "params.xml"], workflow_file_list))
 
-        self.cwl_obj: Optional[Workflow] = load_document_by_uri(self.cwl_file_path)
-        self.cwl_inputs: Optional[List[WorkflowInputParameter]] = self.cwl_obj.inputs
-        
-        # Using cwltool --pack for now. See https://github.com/common-workflow-language/cwl-utils/issues/220
-        # og_sys_stderr = sys.stderr
-        # try:
-        #    # https://www.codeforests.com/2020/11/05/python-suppress-stdout-and-stderr/
-        #    devnull = open(os.devnull, "w")
-        #    sys.stderr = devnull
-        #    self.cwl_pack: Optional[Dict] = pack(str(self.cwl_file_path))
-        # finally:
-        #     sys.stderr = og_sys_stderr
-        # self.cwl_pack: Optional[Dict] = pack(str(self.cwl_file_path))
-        cwltool_pack_returncode, cwltool_pack_stdout, cwltool_pack_stderr = run_subprocess_proc(
-            [
-                "cwltool", "--pack", str(self.cwl_file_path)
-            ],
-            capture_output=True
-        )
+        # Using cwltool's packer for now. See https://github.com/common-workflow-language/cwl-utils/issues/220
+        # We load the workflow through cwltool once, in process, and reuse the loading context
+        # for the pack, the dot graph and the cwl_utils objects (inputs, steps, overrides), so the workflow tree is parsed once
+        # The workflow is only loaded through cwltool if an artifact is not already in the cache
+        self.cwltool_loading_context: Optional['LoadingContext'] = None
+        self.cwltool_uri: Optional[str] = None
+        self.cwl_obj: Optional[Workflow] = None
+        self.cwl_pack: Dict = self.get_cached_json_artifact("packed.json", self.get_cwl_pack_uncached)
+        self.cwl_dot: Optional[str] = None
+
+    def get_cached_artifact_path(self, artifact_name: str) -> Optional[Path]:
+        if self.artifacts_cache_dir is None:
+            return None
+        return self.artifacts_cache_dir / artifact_name
+
+    def get_cached_json_artifact(self, artifact_name: str, generator: Callable[[], Union[Dict, List]]) -> Union[Dict, List]:
+        """
+        Read a json artifact from the cache, otherwise generate it and write it to the cache
+        :param artifact_name:
+        :param generator:
+        :return:
+        """
+        artifact_path = self.get_cached_artifact_path(artifact_name)
+
+        if artifact_path is not None and artifact_path.is_file():
+            logger.debug(f"Using cached {artifact_name} for zip with md5sum {self.zip_md5sum}")
+            with open(artifact_path, "r") as artifact_h:
+                return json.load(artifact_h)
+
+        artifact = generator()
+
+        if artifact_path is not None:
+            write_file_atomically(artifact_path, json.dumps(artifact, indent=4).encode())
 
-        if not cwltool_pack_returncode == 0:
-            logger.error(f"Could not pack file {str(self.cwl_file_path)}")
-            raise ChildProcessError
+        return artifact
+
+    def get_cached_file_artifact(self, artifact_name: str, generator: Callable[[], Path]) -> Path:
+        """
+        Get a file artifact (i.e a png or html) from the cache, otherwise generate it and copy it into the cache.
+        The caller always gets its own (temporary) copy of the artifact, so moving or deleting it does not touch the cache
+        :param artifact_name:
+        :param generator: Returns the path to a newly generated file
+        :return:
+        """
+        artifact_path = self.get_cached_artifact_path(artifact_name)
 
-        self.cwl_pack = json.loads(cwltool_pack_stdout)
+        if artifact_path is not None and artifact_path.is_file():
+            logger.debug(f"Using cached {artifact_name} for zip with md5sum {self.zip_md5sum}")
+            artifact_copy_path = Path(NamedTemporaryFile(delete=False, suffix=artifact_path.suffix).name)
+            artifact_copy_path.write_bytes(artifact_path.read_bytes())
+            return artifact_copy_path
+
+        generated_file_path = generator()
+
+        if artifact_path is not None:
+            write_file_atomically(artifact_path, generated_file_path.read_bytes())
+
+        return generated_file_path
+
+    def load_cwltool_document(self):
+        if self.cwltool_loading_context is None:
+            self.cwltool_loading_context, self.cwltool_uri = load_cwltool_document(self.cwl_file_path)
+
+    def get_cwl_pack_uncached(self) -> Dict:
+        self.load_cwltool_document()
+        return pack_cwltool_document(self.cwltool_loading_context, self.cwltool_uri)
+
+    def get_cwl_obj_from_cwltool_document(self, uri: str) -> Union[Workflow, CommandLineTool]:
+        """
+        Get the cwl_utils object of a document in the workflow tree from the documents cwltool has already loaded
+        :param uri:
+        :return:
+        """
+        self.load_cwltool_document()
+        return get_cwl_obj_from_cwltool_document(self.cwltool_loading_context, uri)
 
     def get_cwl_obj(self) -> Workflow:
+        if self.cwl_obj is None:
+            self.load_cwltool_document()
+            self.cwl_obj = get_cwl_obj_from_cwltool_document(self.cwltool_loading_context, self.cwltool_uri)
         return self.cwl_obj
 
     def get_cwl_inputs_template_dict(self) -> Dict:
-        return create_template_from_workflow_inputs(self.cwl_obj.inputs)
+        return self.get_cached_json_artifact(
+            "inputs_template.json",
+            lambda: create_template_from_workflow_inputs(self.get_cwl_obj().inputs)
+        )
 
     def get_override_steps_dict(self) -> List:
-        return get_workflow_overrides_steps_dict(
-            workflow_steps=self.cwl_obj.steps,
-            calling_relative_workflow_file_path=Path(shortname(self.cwl_obj.id)),
-            calling_workflow_id=shortname(self.cwl_obj.id),
-            original_relative_directory=self.cwl_file_path.parent
+        return self.get_cached_json_artifact(
+            "overrides.json",
+            lambda: get_workflow_overrides_steps_dict(
+                workflow_steps=self.get_cwl_obj().steps,
+                calling_relative_workflow_file_path=Path(shortname(self.get_cwl_obj().id)),
+                calling_workflow_id=shortname(self.get_cwl_obj().id),
+                original_relative_directory=self.cwl_file_path.parent,
+                load_run_document=self.get_cwl_obj_from_cwltool_document
+            )
         )
 
     def get_md5sum_from_packed_dict(self) -> str:
         return hashlib.md5(json.dumps(self.cwl_pack, indent=4).encode()).hexdigest()
     # FIXME - this should be its own function outside of this class
 
+    def get_dot(self) -> str:
+        """
+        Get the dot graph of the workflow, reusing the cwltool loading context from the pack
+        :return:
+        """
+        if self.cwl_dot is None:
+            self.load_cwltool_document()
+            self.cwl_dot = get_dot_from_cwltool_document(self.cwltool_loading_context, self.cwltool_uri)
+        return self.cwl_dot
+
+    def get_plot_png(self, ratio_value: float) -> Path:
+        """
+        Get the plot of the workflow, from the cache if we've plotted this workflow (at this ratio) before
+        :param ratio_value:
+        :return:
+        """
+        return self.get_cached_file_artifact(
+            f"workflow.ratio_{ratio_value}.png",
+            lambda: generate_plot_png(self.cwl_pack, ratio_value, dot_str=self.get_dot())
+        )
+
+    def get_html_doc(self, title: str, ratio_value: float) -> Path:
+        """
+        Get the standalone html documentation of the workflow,
+        from the cache if we've rendered this workflow (with this title) before
+        :param title:
+        :param ratio_value:
+        :return:
+        """
+        def _generate_html_doc() -> Path:
+            cwl_obj = self.get_cwl_obj()
+            markdown_path = generate_markdown_doc(
+                title=title,
+                description=cwl_obj.doc,
+                label=cwl_obj.label,
+                cwl_inputs=cwl_obj.inputs,
+                cwl_steps=cwl_obj.steps,
+                cwl_outputs=cwl_obj.outputs,
+                workflow_image_page_path=self.get_plot_png(ratio_value),
+                workflow_md5sum=self.get_md5sum_from_packed_dict(),
+                input_json_template=self.get_cwl_inputs_template_dict(),
+                overrides_template=self.get_override_steps_dict()
+            )
+            html_path = generate_standalone_html_through_pandoc(markdown_path)
+            markdown_path.unlink()
+            return html_path
+
+        return self.get_cached_file_artifact(
+            f"{re.sub(r'[^A-Za-z0-9_.-]', '_', title)}.ratio_{ratio_value}.html",
+            _generate_html_doc
+        )
+
+
+def load_cwltool_document(cwl_file_path: Path) -> Tuple['LoadingContext', str]:
+    """
+    Load and validate a cwl document through cwltool, in process.
+    The loading context returned can be reused for packing and for generating the dot graph of the workflow.
+    :param cwl_file_path:
+    :return: The cwltool loading context and the uri of the document
+    """
+    # Import cwltool
+    # (this takes a few seconds which is why we don't do it at the top)
+    from cwltool.context import LoadingContext
+    from cwltool.load_tool import fetch_document, resolve_and_validate_document
+    from cwltool.workflow import default_make_tool
+
+    loading_context, workflow_obj, uri = fetch_document(
+        str(cwl_file_path),
+        LoadingContext(
+            {
+                # Required to build the tool object for the dot graph
+                "construct_tool_object": default_make_tool
+            }
+        )
+    )
+
+    return resolve_and_validate_document(loading_context, workflow_obj, uri)
+
+
+def pack_cwltool_document(loading_context: 'LoadingContext', uri: str) -> Dict:
+    """
+    Equivalent of 'cwltool --pack', using a loading context from load_cwltool_document
+    :param loading_context:
+    :param uri:
+    :return:
+    """
+    from cwltool.main import print_pack
+
+    return json.loads(print_pack(loading_context, uri))
+
+
+def get_cwl_obj_from_cwltool_document(loading_context: 'LoadingContext', uri: str) -> Union[Workflow, CommandLineTool]:
+    """
+    Build the cwl_utils object of a document from the copy cwltool has already fetched and validated,
+    rather than reading and parsing the file again.
+    Step run references are left as uris by cwl_utils, so only this document is loaded.
+    Falls back to loading the file if cwltool has not indexed the document
+    :param loading_context: From load_cwltool_document
+    :param uri:
+    :return:
+    """
+    document = loading_context.loader.idx.get(uri)
+
+    if document is None:
+        logger.debug(f"{uri} was not loaded by cwltool, loading through cwl_utils")
+        return load_cwl_document(Path(urlparse(uri).path))
+
+    # Copy since cwl_utils holds on to the document we give it
+    return load_document_by_yaml(deepcopy(document), uri)
+
+
+def get_dot_from_cwltool_document(loading_context: 'LoadingContext', uri: str) -> str:
+    """
+    Equivalent of 'cwltool --print-dot', using a loading context from load_cwltool_document
+    :param loading_context:
+    :param uri:
+    :return:
+    """
+    from cwltool.load_tool import make_tool
+    from cwltool.main import printdot
+
+    dot_h = StringIO()
+    printdot(make_tool(uri, loading_context), loading_context.loader.ctx, dot_h)
+
+    return dot_h.getvalue()
+
 def get_workflow_input_type(workflow_input: WorkflowInputParameter):
     if isinstance(workflow_input.type_, str):
         return get_workflow_input_type_from_str_type(workflow_input)
@@ -395,7 +733,8 @@ def create_template_from_workflow_inputs(workflow_inputs: List[WorkflowInputPara
 def get_workflow_overrides_steps_dict(workflow_steps: List[WorkflowStep],
                                       calling_relative_workflow_file_path: Path,
                                       calling_workflow_id: str,
-                                      original_relative_directory: Path) -> List:
+                                      original_relative_directory: Path,
+                                      load_run_document: Optional[Callable[[str], Union[Workflow, CommandLineTool]]] = None) -> List:
 
     """
     Get a list of steps that can be overridden
@@ -403,6 +742,8 @@ def get_workflow_overrides_steps_dict(workflow_steps: List[WorkflowStep],
     :param calling_relative_workflow_file_path:
     :param calling_workflow_id:
     :param original_relative_directory:
+    :param load_run_document: Loads the document of a step run uri,
+      i.e ZippedCWLWorkflow.get_cwl_obj_from_cwltool_document, defaults to reading the file through cwl_utils
     :return:
     """
 
@@ -423,7 +764,11 @@ def get_workflow_overrides_steps_dict(workflow_steps: List[WorkflowStep],
         step_id = f"{calling_relative_workflow_file_path}#{calling_workflow_id}/{step_name}"
 
         # Load step
-        run_cwl_obj = load_document_by_uri(run_path)
+        run_cwl_obj = (
+            load_run_document(workflow_step.run)
+            if load_run_document is not None
+            else load_cwl_document(run_path)
+        )
 
         # Just create the step ID
         if isinstance(run_cwl_obj, CommandLineTool):
@@ -437,7 +782,8 @@ def get_workflow_overrides_steps_dict(workflow_steps: List[WorkflowStep],
                     workflow_steps=run_cwl_obj.steps,
                     calling_relative_workflow_file_path=Path(relpath(run_path, original_relative_directory)),
                     calling_workflow_id=shortname(run_cwl_obj.id),
-                    original_relative_directory=original_relative_directory
+                    original_relative_directory=original_relative_directory,
+                    load_run_document=load_run_document
                 )
             )
 
@@ -446,34 +792,30 @@ def get_workflow_overrides_steps_dict(workflow_steps: List[WorkflowStep],
 
 def generate_plot_png(
         packed_json: Dict,
-        ratio_value: float
+        ratio_value: float,
+        dot_str: Optional[str] = None
 ) -> Path:
-
+    """
+    Generate a png of the workflow through graphviz
+    :param packed_json: The packed workflow
+    :param ratio_value: The graphviz ratio value
+    :param dot_str: The dot graph of the workflow, i.e ZippedCWLWorkflow.get_dot(),
+      if not provided, the dot graph is generated in process from the packed workflow
+    :return:
+    """
     # Initialise temp files
-    packed_file_temp = Path(NamedTemporaryFile(delete=False, suffix=".json").name)
     dot_file_temp = Path(NamedTemporaryFile(delete=False, suffix=".dot").name)
     plot_png_file = Path(NamedTemporaryFile(delete=False, suffix=".png").name)
 
-    # Dump packed file
-    with open(packed_file_temp, "w") as packed_file_temp_h:
-        packed_file_temp_h.write(json.dumps(packed_json))
-
     # Build dot file
-    build_dot_command_list = [
-        sys.executable,
-        "-m",
-        "cwltool", "--print-dot", str(packed_file_temp)
-    ]
-    with open(str(dot_file_temp), 'w') as write_h:
-        build_dot_returncode, _, build_dot_stderr = run_subprocess_proc(
-            build_dot_command_list,
-            stdout=write_h, stderr=subprocess.PIPE
-        )
+    if dot_str is None:
+        with NamedTemporaryFile("w", suffix=".json") as packed_file_temp_h:
+            packed_file_temp_h.write(json.dumps(packed_json))
+            packed_file_temp_h.flush()
+            dot_str = get_dot_from_cwltool_document(*load_cwltool_document(Path(packed_file_temp_h.name)))
 
-    if not build_dot_returncode == 0:
-        logger.error(f"Could not build dot file, got returncode {build_dot_returncode}")
-        logger.error(f"Stderr was {build_dot_stderr}")
-        raise ChildProcessError
+    with open(dot_file_temp, "w") as dot_file_temp_h:
+        dot_file_temp_h.write(dot_str)
 
     # Build png file
     dot_command = [
@@ -489,6 +831,9 @@ def generate_plot_png(
         capture_output=True
     )
 
+    # Clean up the dot file
+    dot_file_temp.unlink()
+
     if not dot_returncode == 0:
         logger.error("Could not build the png file command")
         raise ChildProcessError
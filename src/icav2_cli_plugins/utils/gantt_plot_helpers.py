@@ -6,21 +6,26 @@ Helpers to plot the gantt chart
 Inspiration from this gantt tutorial and relevant code
 https://towardsdatascience.com/gantt-charts-with-pythons-matplotlib-395b7af72d72
 https://gist.github.com/Thiagobc23/fc12c3c69fbb90ac64b594f2c3641fcf
+
+Matplotlib is only imported when a png is requested,
+svg, html and json outputs are generated directly from the workflow steps dataframe.
 """
 
 # External imports
+import json
 import re
 from pathlib import Path
-from typing import List
-import pytz
+from typing import List, Dict, TYPE_CHECKING
+from xml.sax.saxutils import escape
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.dates import DateFormatter, date2num
-from matplotlib.patches import Patch
-from datetime import datetime
+from datetime import datetime, timedelta
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 # Wrapica imports
-from wrapica.project_analysis import get_analysis_obj_from_analysis_id, AnalysisStep
+from wrapica.project_analysis import AnalysisStep
 
 STATUS_TO_COLOUR_MAP = {
     "FAILED": "#E71414",  # Bright Red
@@ -31,6 +36,23 @@ STATUS_TO_COLOUR_MAP = {
     "WAITING": "#C1C1C1"  # Grey
 }
 
+# Steps are queued shortly after their predecessor finishes, allow for some slack between the two timestamps
+CRITICAL_PATH_TOLERANCE = timedelta(seconds=5)
+
+GANTT_PLOT_OUTPUT_FORMATS = ["png", "svg", "html", "json"]
+
+# SVG layout (in pixels)
+SVG_WIDTH = 1600
+SVG_LABEL_MARGIN = 400
+SVG_TIME_LABEL_MARGIN = 120
+SVG_ROW_HEIGHT = 20
+SVG_TITLE_HEIGHT = 40
+SVG_AXIS_HEIGHT = 30
+SVG_LEGEND_HEIGHT = 40
+# Candidate x-axis tick intervals in minutes, we use the smallest that gives us at most SVG_MAX_TICKS ticks
+SVG_TICK_INTERVALS_MINUTES = [1, 5, 10, 15, 30, 60, 120, 240, 360, 720, 1440]
+SVG_MAX_TICKS = 12
+
 
 def time_delta_to_human_readable(total_seconds: int) -> str:
     """
@@ -41,6 +63,10 @@ def time_delta_to_human_readable(total_seconds: int) -> str:
     Returns:
 
     """
+    # Steps that have not yet started or finished have no duration
+    if pd.isnull(total_seconds):
+        return "--:--"
+
     hours, remainder = divmod(total_seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
 
@@ -233,11 +259,106 @@ def add_task_colour_column(workflow_steps_df: pd.DataFrame) -> pd.DataFrame:
     return workflow_steps_df
 
 
-def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, project_id: str, analysis_id: str):
+def add_critical_path_column(workflow_steps_df: pd.DataFrame) -> pd.DataFrame:
     """
+    Add a boolean 'task_is_critical' column, True if the step lies on the critical path of the analysis
 
     Args:
-        workflow_steps_df: A dataframe with the following columns
+        workflow_steps_df:
+          Contains the following columns
+            * task_id
+            * task_name
+            * task_status
+            * task_is_technical
+            * task_queue_date
+            * task_start_date
+            * task_end_date
+    Returns:
+        DataFrame with the following columns
+            * task_id
+            * task_name
+            * task_status
+            * task_is_technical
+            * task_queue_date
+            * task_start_date
+            * task_end_date
+            * task_is_critical
+    """
+    workflow_steps_df = workflow_steps_df.copy()
+
+    workflow_steps_df["task_is_critical"] = workflow_steps_df["task_id"].isin(
+        get_critical_path_task_ids(workflow_steps_df)
+    )
+
+    return workflow_steps_df
+
+
+def get_critical_path_task_ids(workflow_steps_df: pd.DataFrame) -> List[str]:
+    """
+    The analysis steps endpoint does not tell us which steps depend on which,
+    so we infer the critical path from the step timings alone.
+
+    Starting from the last step to finish, we walk backwards,
+    at each point choosing the step that finished last before the current step was queued,
+    (that is, the step that the current step was most likely waiting on).
+
+    Steps that have not yet started or finished are ignored.
+    Technical steps are ignored too, overarching technical steps (i.e. the Workflow Monitor) cover all of
+    the workflow steps, so walking back through them would jump straight over the workflow steps themselves.
+    If there are no (completed) non-technical steps, the technical steps are used instead.
+
+    Args:
+        workflow_steps_df:
+          Contains the following columns
+            * task_id
+            * task_is_technical
+            * task_queue_date
+            * task_start_date
+            * task_end_date
+
+    Returns:
+        The list of task ids on the critical path, in order of execution
+    """
+    completed_steps_df = workflow_steps_df.dropna(subset=["task_start_date", "task_end_date"])
+
+    non_technical_steps_df = completed_steps_df.loc[~completed_steps_df["task_is_technical"].astype(bool)]
+    if non_technical_steps_df.shape[0] > 0:
+        completed_steps_df = non_technical_steps_df
+
+    if completed_steps_df.shape[0] == 0:
+        return []
+
+    # Start with the last step to finish
+    current_step = completed_steps_df.loc[completed_steps_df["task_end_date"].idxmax()]
+    critical_path_task_ids = [current_step["task_id"]]
+
+    while True:
+        # The step became ready to run when it was queued
+        if pd.isnull(current_step["task_queue_date"]):
+            ready_date = current_step["task_start_date"]
+        else:
+            ready_date = current_step["task_queue_date"]
+
+        predecessor_steps_df = completed_steps_df.loc[
+            (completed_steps_df["task_end_date"] <= ready_date + CRITICAL_PATH_TOLERANCE) &
+            (~completed_steps_df["task_id"].isin(critical_path_task_ids))
+        ]
+
+        if predecessor_steps_df.shape[0] == 0:
+            break
+
+        current_step = predecessor_steps_df.loc[predecessor_steps_df["task_end_date"].idxmax()]
+        critical_path_task_ids.append(current_step["task_id"])
+
+    return list(reversed(critical_path_task_ids))
+
+
+def add_relative_time_columns(workflow_steps_df: pd.DataFrame, analysis_creation_time: datetime) -> pd.DataFrame:
+    """
+    Add in the time columns relative to the creation time of the analysis, required for plotting.
+
+    Args:
+        workflow_steps_df:
           Contains the following columns
             * task_id
             * task_name
@@ -248,18 +369,21 @@ def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, p
             * task_end_date
             * task_pending_td
             * task_duration_td
-        output_path: Path to the output png file
-        analysis_id: The workflow ID
+        analysis_creation_time: The time the analysis was created (the timeCreated attribute of the analysis)
+
     Returns:
-        None
+        DataFrame with the additional columns
+            * task_queue_td
+            * task_start_td
+            * task_end_td
+            * task_queue_tdn
+            * task_start_tdn
+            * task_end_tdn
+            * task_pending_tdn
+            * task_duration_tdn
     """
+    workflow_steps_df = workflow_steps_df.copy()
 
-    # Sort steps by task start date
-    workflow_steps_df = workflow_steps_df.copy().\
-        sort_values(by="task_queue_date", ascending=False).reset_index()
-
-    # Use timeCreated as the start of the analysis
-    analysis_creation_time = get_analysis_obj_from_analysis_id(project_id, analysis_id).time_created
     # Add in queue date td and start date td for date time
     # task queue date is the first one to start up
     workflow_steps_df["task_queue_td"] = workflow_steps_df["task_queue_date"] - analysis_creation_time
@@ -267,26 +391,146 @@ def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, p
     workflow_steps_df["task_end_td"] = workflow_steps_df["task_end_date"] - analysis_creation_time
 
     # Convert time deltas to numbers
-    zero_date = datetime.fromtimestamp(0, tz=pytz.utc)
-    workflow_steps_df["task_queue_tdn"] = workflow_steps_df["task_queue_td"].apply(lambda x: date2num(zero_date + x))
-    workflow_steps_df["task_start_tdn"] = workflow_steps_df["task_start_td"].apply(lambda x: date2num(zero_date + x))
-    workflow_steps_df["task_end_tdn"] = workflow_steps_df["task_end_td"].apply(lambda x: date2num(zero_date + x))
-    workflow_steps_df["task_end_tdn"] = workflow_steps_df["task_end_td"].apply(lambda x: date2num(zero_date + x))
-    workflow_steps_df["task_pending_tdn"] = workflow_steps_df["task_pending_td"].apply(lambda x: date2num(zero_date + x))
-    workflow_steps_df["task_duration_tdn"] = workflow_steps_df["task_duration_td"].apply(lambda x: date2num(zero_date + x))
-
-    # Part 1 - use fig to create a plot with two axes
-    # The second axes is merely a place holder so we have room for the legend at the bottom
-    # FIXME, use facecolor to enter darkmode if desired
-    fig: plt.Figure
-    ax: plt.Axes
-    ax1: plt.Axes
-    fig, (ax, ax1) = plt.subplots(2, figsize=(16, 6), gridspec_kw={'height_ratios': [6, 1]})
+    # Matplotlib date numbers are the (fractional) number of days since the unix epoch
+    # We compute these directly so that matplotlib is not required unless we are plotting a png
+    workflow_steps_df["task_queue_tdn"] = workflow_steps_df["task_queue_td"] / pd.Timedelta(days=1)
+    workflow_steps_df["task_start_tdn"] = workflow_steps_df["task_start_td"] / pd.Timedelta(days=1)
+    workflow_steps_df["task_end_tdn"] = workflow_steps_df["task_end_td"] / pd.Timedelta(days=1)
+    workflow_steps_df["task_pending_tdn"] = workflow_steps_df["task_pending_td"] / pd.Timedelta(days=1)
+    workflow_steps_df["task_duration_tdn"] = workflow_steps_df["task_duration_td"] / pd.Timedelta(days=1)
+
+    return workflow_steps_df
+
+
+def get_workflow_steps_summary_df(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Collect the pending and running time of every step of every analysis into a single long dataframe
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe,
+          each dataframe should have the task_pending_td, task_duration_td and task_is_critical columns
+
+    Returns:
+        DataFrame with the following columns
+            * analysis_id
+            * task_name
+            * task_status
+            * task_is_critical
+            * task_pending_seconds
+            * task_duration_seconds
+    """
+    return pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "analysis_id": analysis_id,
+                    "task_name": workflow_steps_df["task_name"],
+                    "task_status": workflow_steps_df["task_status"],
+                    "task_is_critical": workflow_steps_df["task_is_critical"],
+                    "task_pending_seconds": workflow_steps_df["task_pending_td"].dt.total_seconds(),
+                    "task_duration_seconds": workflow_steps_df["task_duration_td"].dt.total_seconds(),
+                }
+            )
+            for analysis_id, workflow_steps_df in workflow_steps_df_by_analysis_id.items()
+        ],
+        ignore_index=True
+    )
+
+
+def get_workflow_steps_comparison_df(
+        workflow_steps_summary_df: pd.DataFrame,
+        value_column: str = "task_duration_seconds"
+) -> pd.DataFrame:
+    """
+    Pivot the workflow steps summary such that each row is a step and each column is an analysis.
+    Values are in HH:MM format, steps on the critical path are suffixed with an asterisk.
+
+    Args:
+        workflow_steps_summary_df: The output of get_workflow_steps_summary_df
+        value_column: One of task_duration_seconds or task_pending_seconds
+
+    Returns:
+        DataFrame indexed by task_name with one column per analysis id
+    """
+    workflow_steps_summary_df = workflow_steps_summary_df.copy()
+
+    workflow_steps_summary_df["value"] = workflow_steps_summary_df.apply(
+        lambda x: (
+            time_delta_to_human_readable(x[value_column]) +
+            ("*" if x["task_is_critical"] else "")
+        ),
+        axis="columns"
+    )
+
+    # Keep the order of first appearance of each analysis and step
+    return workflow_steps_summary_df.pivot_table(
+        index="task_name",
+        columns="analysis_id",
+        values="value",
+        aggfunc="first",
+        sort=False
+    ).fillna("")
+
+
+def get_critical_path_summary_df(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    One row per analysis, summarising the wall time and critical path of the analysis
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe,
+          each dataframe should have the task_is_critical column
+
+    Returns:
+        DataFrame with the following columns
+            * analysis_id
+            * wall_time (HH:MM)
+            * critical_path_pending_time (HH:MM)
+            * critical_path_running_time (HH:MM)
+            * critical_path
+    """
+    critical_path_summary_list = []
+
+    for analysis_id, workflow_steps_df in workflow_steps_df_by_analysis_id.items():
+        critical_steps_df = workflow_steps_df.query("task_is_critical==True").sort_values(by="task_start_date")
+        critical_path_summary_list.append(
+            {
+                "analysis_id": analysis_id,
+                "wall_time": time_delta_to_human_readable(
+                    (
+                        workflow_steps_df["task_end_date"].max() - workflow_steps_df["task_queue_date"].min()
+                    ).total_seconds()
+                ),
+                "critical_path_pending_time": time_delta_to_human_readable(
+                    critical_steps_df["task_pending_td"].sum().total_seconds()
+                ),
+                "critical_path_running_time": time_delta_to_human_readable(
+                    critical_steps_df["task_duration_td"].sum().total_seconds()
+                ),
+                "critical_path": " > ".join(critical_steps_df["task_name"].tolist())
+            }
+        )
+
+    return pd.DataFrame(critical_path_summary_list)
+
+
+def _plot_workflow_steps_on_axes(ax: 'Axes', workflow_steps_df: pd.DataFrame):
+    """
+    Add the bars and labels of a single analysis to an axes
+
+    Args:
+        ax: The axes to plot on
+        workflow_steps_df: The workflow steps dataframe, with the relative time columns
+    """
+    from matplotlib.dates import DateFormatter
+
+    # Sort steps by task start date
+    workflow_steps_df = workflow_steps_df.copy(). \
+        sort_values(by="task_queue_date", ascending=False).reset_index(drop=True)
 
     # Add bars to include
     # Add in pending bars (hashed
     ax.barh(
-        workflow_steps_df["task_name"],
+        workflow_steps_df.index,
         workflow_steps_df["task_pending_tdn"],
         left=workflow_steps_df["task_queue_tdn"],
         color="grey",
@@ -295,11 +539,14 @@ def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, p
     )
 
     # Add in task duration bars
+    # Steps on the critical path are given a black outline
     ax.barh(
-        workflow_steps_df["task_name"],
+        workflow_steps_df.index,
         workflow_steps_df["task_duration_tdn"],
         left=workflow_steps_df["task_start_tdn"],
-        color=workflow_steps_df["task_colour"]
+        color=workflow_steps_df["task_colour"],
+        edgecolor=workflow_steps_df["task_is_critical"].apply(lambda x: "k" if x else "none"),
+        linewidth=1.5
     )
 
     # Create labels on left hand side of bar graph
@@ -320,9 +567,9 @@ def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, p
             x=row["task_end_tdn"],
             y=idx,
             s=" " +
-                 time_delta_to_human_readable(row["task_pending_td"].total_seconds()) +
-                 " / " +
-                 time_delta_to_human_readable(row["task_duration_td"].total_seconds()),
+              time_delta_to_human_readable(row["task_pending_td"].total_seconds()) +
+              " / " +
+              time_delta_to_human_readable(row["task_duration_td"].total_seconds()),
             va='center',
             ha='left',
             alpha=0.8,
@@ -343,14 +590,69 @@ def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, p
     ax.xaxis_date()
     ax.xaxis.set_major_formatter(DateFormatter("%H:%M"))
 
-    # Align x-axis
-    ax.set_xlim(date2num(zero_date), workflow_steps_df["task_end_tdn"].max())
-
-    # Set titles
-    fig.suptitle(f"Gantt Chart of analysis '{analysis_id}'")
     ax.set_ylabel("")
     ax.set_xlabel("Duration (HH:MM)")
 
+    # Remove yticks
+    ax.set_yticks([])
+
+
+def create_workflow_steps_figure(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame]) -> 'Figure':
+    """
+    Create a figure with one gantt chart per analysis, all sharing the same x-axis
+    so that the step timings of the analyses can be compared directly.
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe,
+          each dataframe should have the relative time, task_colour and task_is_critical columns
+
+    Returns:
+        The matplotlib figure
+    """
+    # Import matplotlib
+    # (the backend probing and font cache build take a few seconds which is why we don't do it at the top)
+    # We only ever write to file, so we force the non-interactive Agg backend
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Patch
+
+    num_analyses = len(workflow_steps_df_by_analysis_id)
+
+    # Part 1 - use fig to create a plot with one axes per analysis plus one more
+    # The last axes is merely a place holder so we have room for the legend at the bottom
+    # FIXME, use facecolor to enter darkmode if desired
+    fig: 'Figure'
+    fig, axes = plt.subplots(
+        num_analyses + 1,
+        figsize=(16, 5 * num_analyses + 1),
+        gridspec_kw={'height_ratios': [6] * num_analyses + [1]},
+        squeeze=False
+    )
+    axes = axes.flatten()
+    ax1: 'Axes' = axes[-1]
+
+    # Align x-axis across all analyses
+    x_max = max(
+        map(
+            lambda workflow_steps_df_iter: workflow_steps_df_iter["task_end_tdn"].max(),
+            workflow_steps_df_by_analysis_id.values()
+        )
+    )
+
+    ax: 'Axes'
+    for ax, (analysis_id, workflow_steps_df) in zip(axes[:-1], workflow_steps_df_by_analysis_id.items()):
+        _plot_workflow_steps_on_axes(ax, workflow_steps_df)
+        ax.set_xlim(0, x_max)
+        if num_analyses > 1:
+            ax.set_title(f"Analysis '{analysis_id}'")
+
+    # Set titles
+    if num_analyses == 1:
+        fig.suptitle(f"Gantt Chart of analysis '{list(workflow_steps_df_by_analysis_id.keys())[0]}'")
+    else:
+        fig.suptitle(f"Gantt Chart of {num_analyses} analyses")
+
     # Set legend elements
     legend_elements = list(
         map(
@@ -361,14 +663,18 @@ def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, p
             ),
             STATUS_TO_COLOUR_MAP.items()
         )
-    )
+    ) + [
+        Patch(
+            facecolor="none",
+            edgecolor="k",
+            linewidth=1.5,
+            label="CRITICAL PATH"
+        )
+    ]
 
-    legend = ax1.legend(handles=legend_elements, loc='center', ncol=len(STATUS_TO_COLOUR_MAP), frameon=False)
+    legend = ax1.legend(handles=legend_elements, loc='center', ncol=len(legend_elements), frameon=False)
     plt.setp(legend.get_texts(), color='k')
 
-    # Remove yticks
-    ax.set_yticks([])
-
     # Remove ax1
     ax1.spines['right'].set_visible(False)
     ax1.spines['left'].set_visible(False)
@@ -377,5 +683,347 @@ def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, p
     ax1.set_xticks([])
     ax1.set_yticks([])
 
+    return fig
+
+
+def plot_workflow_steps_df(workflow_steps_df: pd.DataFrame, output_path: Path, analysis_id: str):
+    """
+
+    Args:
+        workflow_steps_df: A dataframe with the following columns
+          Contains the following columns
+            * task_id
+            * task_name
+            * task_status
+            * task_is_technical
+            * task_queue_date
+            * task_start_date
+            * task_end_date
+            * task_pending_td
+            * task_duration_td
+            * task_colour
+            * task_is_critical
+          Along with the relative time columns from add_relative_time_columns
+        output_path: Path to the output png file
+        analysis_id: The workflow ID
+    Returns:
+        None
+    """
+    plot_workflow_steps_dfs(
+        workflow_steps_df_by_analysis_id={
+            analysis_id: workflow_steps_df
+        },
+        output_path=output_path
+    )
+
+
+def plot_workflow_steps_dfs(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame], output_path: Path):
+    """
+    Plot the workflow steps of one or more analyses, aligned on the same time axis
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe
+        output_path: Path to the output png file
+
+    Returns:
+        None
+    """
+    import matplotlib.pyplot as plt
+
+    fig = create_workflow_steps_figure(workflow_steps_df_by_analysis_id)
+
     # Plot figure
-    plt.savefig(output_path)
+    fig.savefig(output_path)
+    plt.close(fig)
+
+
+def _get_svg_tick_interval_seconds(x_max_seconds: float) -> int:
+    """
+    Get the smallest tick interval that gives us at most SVG_MAX_TICKS ticks along the x-axis
+    Args:
+        x_max_seconds: The length of the x-axis in seconds
+
+    Returns:
+        The tick interval in seconds
+    """
+    for tick_interval_minutes in SVG_TICK_INTERVALS_MINUTES:
+        if x_max_seconds / (tick_interval_minutes * 60) <= SVG_MAX_TICKS:
+            return tick_interval_minutes * 60
+    return SVG_TICK_INTERVALS_MINUTES[-1] * 60
+
+
+def workflow_steps_dfs_to_svg(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame]) -> str:
+    """
+    Render the gantt charts of one or more analyses as an svg string, aligned on the same time axis.
+    Mirrors the png output of create_workflow_steps_figure but is generated directly from the dataframes.
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe,
+          each dataframe should have the relative time, task_colour and task_is_critical columns
+
+    Returns:
+        The svg as a string
+    """
+    plot_width = SVG_WIDTH - SVG_LABEL_MARGIN - SVG_TIME_LABEL_MARGIN
+
+    # Align x-axis across all analyses
+    x_max_seconds = max(
+        map(
+            lambda workflow_steps_df_iter: workflow_steps_df_iter["task_end_td"].max().total_seconds(),
+            workflow_steps_df_by_analysis_id.values()
+        )
+    )
+    if pd.isnull(x_max_seconds) or x_max_seconds < 60:
+        x_max_seconds = 60
+
+    def x_pos(td: pd.Timedelta) -> float:
+        return SVG_LABEL_MARGIN + td.total_seconds() / x_max_seconds * plot_width
+
+    tick_interval_seconds = _get_svg_tick_interval_seconds(x_max_seconds)
+
+    svg_elements = [
+        "<defs>",
+        "<pattern id=\"pending-hatch\" patternUnits=\"userSpaceOnUse\" width=\"6\" height=\"6\" "
+        "patternTransform=\"rotate(45)\">",
+        "<rect width=\"6\" height=\"6\" fill=\"grey\" fill-opacity=\"0.5\"/>",
+        "<line x1=\"0\" y1=\"0\" x2=\"0\" y2=\"6\" stroke=\"black\" stroke-width=\"1\" stroke-opacity=\"0.5\"/>",
+        "</pattern>",
+        "</defs>"
+    ]
+
+    y_offset = 0
+    for analysis_id, workflow_steps_df in workflow_steps_df_by_analysis_id.items():
+        # Earliest steps at the top
+        workflow_steps_df = workflow_steps_df.sort_values(by="task_queue_date").reset_index(drop=True)
+
+        # Title
+        svg_elements.append(
+            f"<text x=\"{SVG_WIDTH / 2}\" y=\"{y_offset + 25}\" text-anchor=\"middle\" font-size=\"16\">"
+            f"Gantt Chart of analysis '{escape(analysis_id)}'</text>"
+        )
+        y_offset += SVG_TITLE_HEIGHT
+        block_height = workflow_steps_df.shape[0] * SVG_ROW_HEIGHT
+
+        # Grid lines and tick labels
+        for tick_seconds in range(0, int(x_max_seconds) + 1, tick_interval_seconds):
+            tick_x = x_pos(pd.Timedelta(seconds=tick_seconds))
+            svg_elements.append(
+                f"<line x1=\"{tick_x:.1f}\" y1=\"{y_offset}\" x2=\"{tick_x:.1f}\" y2=\"{y_offset + block_height}\" "
+                f"stroke=\"black\" stroke-opacity=\"0.4\" stroke-dasharray=\"4,4\"/>"
+            )
+            svg_elements.append(
+                f"<text x=\"{tick_x:.1f}\" y=\"{y_offset + block_height + 15}\" text-anchor=\"middle\" "
+                f"font-size=\"11\">{time_delta_to_human_readable(tick_seconds)}</text>"
+            )
+
+        for idx, row in workflow_steps_df.iterrows():
+            row_y = y_offset + idx * SVG_ROW_HEIGHT
+            bar_y = row_y + 3
+            bar_height = SVG_ROW_HEIGHT - 6
+
+            # Task name on the left hand side
+            svg_elements.append(
+                f"<text x=\"{SVG_LABEL_MARGIN - 6}\" y=\"{row_y + SVG_ROW_HEIGHT / 2}\" text-anchor=\"end\" "
+                f"dominant-baseline=\"middle\" font-size=\"11\">{escape(row['task_name'])}</text>"
+            )
+
+            # Pending bar
+            if not pd.isnull(row["task_queue_td"]) and not pd.isnull(row["task_start_td"]):
+                svg_elements.append(
+                    f"<rect x=\"{x_pos(row['task_queue_td']):.1f}\" y=\"{bar_y}\" "
+                    f"width=\"{max(x_pos(row['task_start_td']) - x_pos(row['task_queue_td']), 0):.1f}\" "
+                    f"height=\"{bar_height}\" fill=\"url(#pending-hatch)\"/>"
+                )
+
+            # Running bar, steps on the critical path are given a black outline
+            if not pd.isnull(row["task_start_td"]) and not pd.isnull(row["task_end_td"]):
+                svg_elements.append(
+                    f"<rect x=\"{x_pos(row['task_start_td']):.1f}\" y=\"{bar_y}\" "
+                    f"width=\"{max(x_pos(row['task_end_td']) - x_pos(row['task_start_td']), 0):.1f}\" "
+                    f"height=\"{bar_height}\" fill=\"{row['task_colour']}\"" +
+                    (" stroke=\"black\" stroke-width=\"1.5\"" if row["task_is_critical"] else "") +
+                    "/>"
+                )
+
+            # Pending / Running time on the right hand side
+            time_label_td = next(
+                filter(
+                    lambda td_iter: not pd.isnull(td_iter),
+                    [row["task_end_td"], row["task_start_td"], row["task_queue_td"], pd.Timedelta(0)]
+                )
+            )
+            svg_elements.append(
+                f"<text x=\"{x_pos(time_label_td) + 4:.1f}\" y=\"{row_y + SVG_ROW_HEIGHT / 2}\" "
+                f"dominant-baseline=\"middle\" font-size=\"11\" fill-opacity=\"0.8\">" +
+                time_delta_to_human_readable(row["task_pending_td"].total_seconds()) +
+                " / " +
+                time_delta_to_human_readable(row["task_duration_td"].total_seconds()) +
+                "</text>"
+            )
+
+        y_offset += block_height + SVG_AXIS_HEIGHT
+
+    # Legend
+    legend_items = list(STATUS_TO_COLOUR_MAP.items()) + [("CRITICAL PATH", "none")]
+    legend_item_width = SVG_WIDTH / len(legend_items)
+    for legend_index, (legend_label, legend_colour) in enumerate(legend_items):
+        legend_x = legend_index * legend_item_width + 20
+        svg_elements.append(
+            f"<rect x=\"{legend_x:.1f}\" y=\"{y_offset + 12}\" width=\"20\" height=\"14\" fill=\"{legend_colour}\"" +
+            (" stroke=\"black\" stroke-width=\"1.5\"" if legend_colour == "none" else "") +
+            "/>"
+        )
+        svg_elements.append(
+            f"<text x=\"{legend_x + 26:.1f}\" y=\"{y_offset + 24}\" font-size=\"12\">{legend_label}</text>"
+        )
+    y_offset += SVG_LEGEND_HEIGHT
+
+    return (
+        f"<svg xmlns=\"http://www.w3.org/2000/svg\" width=\"{SVG_WIDTH}\" height=\"{y_offset}\" "
+        f"viewBox=\"0 0 {SVG_WIDTH} {y_offset}\" font-family=\"sans-serif\">\n" +
+        "\n".join(svg_elements) +
+        "\n</svg>\n"
+    )
+
+
+def workflow_steps_dfs_to_dict(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame]) -> Dict:
+    """
+    Collect the step timings and critical path of each analysis as a json serialisable dictionary
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe
+
+    Returns:
+        Dictionary with the key 'analyses', a list of dictionaries with the following keys
+            * analysis_id
+            * critical_path (list of step names)
+            * steps (list of step dictionaries)
+    """
+    def datetime_or_none(date_obj) -> str:
+        return None if pd.isnull(date_obj) else date_obj.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def seconds_or_none(td_obj) -> float:
+        return None if pd.isnull(td_obj) else td_obj.total_seconds()
+
+    return {
+        "analyses": [
+            {
+                "analysis_id": analysis_id,
+                "critical_path": (
+                    workflow_steps_df.query("task_is_critical==True").
+                    sort_values(by="task_start_date")["task_name"].tolist()
+                ),
+                "steps": [
+                    {
+                        "task_id": row["task_id"],
+                        "task_name": row["task_name"],
+                        "task_status": row["task_status"],
+                        "task_is_technical": bool(row["task_is_technical"]),
+                        "task_is_critical": bool(row["task_is_critical"]),
+                        "task_queue_date": datetime_or_none(row["task_queue_date"]),
+                        "task_start_date": datetime_or_none(row["task_start_date"]),
+                        "task_end_date": datetime_or_none(row["task_end_date"]),
+                        "task_pending_seconds": seconds_or_none(row["task_pending_td"]),
+                        "task_duration_seconds": seconds_or_none(row["task_duration_td"]),
+                    }
+                    for _, row in workflow_steps_df.sort_values(by="task_queue_date").iterrows()
+                ]
+            }
+            for analysis_id, workflow_steps_df in workflow_steps_df_by_analysis_id.items()
+        ]
+    }
+
+
+def write_workflow_steps_svg(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame], output_path: Path):
+    """
+    Write the aligned gantt charts of one or more analyses to an svg file
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe
+        output_path: Path to the output svg file
+
+    Returns:
+        None
+    """
+    with open(output_path, "w") as svg_h:
+        svg_h.write(workflow_steps_dfs_to_svg(workflow_steps_df_by_analysis_id))
+
+
+def write_workflow_steps_json(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame], output_path: Path):
+    """
+    Write the step timings and critical path of one or more analyses to a json file
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe
+        output_path: Path to the output json file
+
+    Returns:
+        None
+    """
+    with open(output_path, "w") as json_h:
+        json.dump(workflow_steps_dfs_to_dict(workflow_steps_df_by_analysis_id), json_h, indent=2)
+        json_h.write("\n")
+
+
+def write_workflow_steps_html_report(workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame], output_path: Path):
+    """
+    Write out a standalone html report comprising
+      * the aligned gantt charts of each analysis (as an inline svg)
+      * the critical path summary of each analysis
+      * a step by step comparison of the running times and pending times across analyses
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe
+        output_path: Path to the output html file
+
+    Returns:
+        None
+    """
+    workflow_steps_summary_df = get_workflow_steps_summary_df(workflow_steps_df_by_analysis_id)
+
+    html_sections = [
+        "<h1>Gantt Chart Report</h1>",
+        workflow_steps_dfs_to_svg(workflow_steps_df_by_analysis_id),
+        "<h2>Critical Path Summary</h2>",
+        get_critical_path_summary_df(workflow_steps_df_by_analysis_id).to_html(index=False),
+        "<h2>Step Running Times (HH:MM, * = on critical path)</h2>",
+        get_workflow_steps_comparison_df(workflow_steps_summary_df, "task_duration_seconds").to_html(),
+        "<h2>Step Pending Times (HH:MM, * = on critical path)</h2>",
+        get_workflow_steps_comparison_df(workflow_steps_summary_df, "task_pending_seconds").to_html(),
+    ]
+
+    with open(output_path, "w") as html_h:
+        html_h.write(
+            "<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>Gantt Chart Report</title></head>\n<body>\n" +
+            "\n".join(html_sections) +
+            "\n</body>\n</html>\n"
+        )
+
+
+def write_workflow_steps_output(
+        workflow_steps_df_by_analysis_id: Dict[str, pd.DataFrame],
+        output_path: Path,
+        output_format: str
+):
+    """
+    Write the workflow steps of one or more analyses in the requested format.
+    Only the png format requires matplotlib.
+
+    Args:
+        workflow_steps_df_by_analysis_id: Dictionary of analysis id to the workflow steps dataframe
+        output_path: Path to the output file
+        output_format: One of GANTT_PLOT_OUTPUT_FORMATS
+
+    Returns:
+        None
+    """
+    if output_format == "png":
+        plot_workflow_steps_dfs(workflow_steps_df_by_analysis_id, output_path)
+    elif output_format == "svg":
+        write_workflow_steps_svg(workflow_steps_df_by_analysis_id, output_path)
+    elif output_format == "html":
+        write_workflow_steps_html_report(workflow_steps_df_by_analysis_id, output_path)
+    elif output_format == "json":
+        write_workflow_steps_json(workflow_steps_df_by_analysis_id, output_path)
+    else:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {GANTT_PLOT_OUTPUT_FORMATS}")
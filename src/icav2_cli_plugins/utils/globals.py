@@ -18,14 +18,38 @@ ICAV2_CONFIG_FILE_PATH = "{HOME}/.icav2/config.yaml"
 ICAV2_SESSION_FILE_PATH = "{HOME}/.icav2/.session.{server_url_prefix}.yaml"
 
 ICAV2_ACCESS_TOKEN_AUDIENCE = "ica"
+# Refresh access tokens this many seconds ahead of their expiry, override with the env var below
+ICAV2_ACCESS_TOKEN_DEFAULT_REFRESH_MARGIN_SECONDS = 300
+ICAV2_ACCESS_TOKEN_REFRESH_MARGIN_ENV_VAR = "ICAV2_ACCESS_TOKEN_REFRESH_MARGIN_SECONDS"
+# Wait this long before trying again if a background token refresh fails
+ICAV2_ACCESS_TOKEN_REFRESH_RETRY_SECONDS = 60
 
 LIBICAV2_DEFAULT_PAGE_SIZE = 1000
+# Offset based paging returns at most 200K rows, beyond this we must use cursor based paging
+LIBICAV2_MAX_OFFSET_PAGING_ROWS = 200000
 
 ICAV2_MAX_STEP_CHARACTERS = 23
 
+ICAV2_CLI_PLUGINS_DEFAULT_MAX_WORKERS = 8
+ICAV2_CLI_PLUGINS_DEFAULT_MAX_RETRIES = 5
+ICAV2_CLI_PLUGINS_DEFAULT_BACKOFF_SECONDS = 1
+# Rate limited (429) and transient server side errors are worth retrying
+ICAV2_RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+
 ICAV2_CLI_PLUGINS_HOME_ENV_VAR = "ICAV2_CLI_PLUGINS_HOME"
 ICAV2_CLI_PLUGINS_TENANTS_HOME = "{ICAV2_CLI_PLUGINS_HOME}/tenants/{tenant_name}"
 ICAV2_CLI_PLUGINS_TENANT_CONFIG_FILE_PATH = "{ICAV2_CLI_PLUGINS_TENANTS_HOME}/config.yaml"
+# Advisory lock held while refreshing the access token in a tenant session file
+ICAV2_CLI_PLUGINS_TENANT_SESSION_LOCK_FILE_PATH = "{ICAV2_CLI_PLUGINS_TENANTS_HOME}/.session.lock"
+# Set to persist resolved tenant config and session files under {ICAV2_CLI_PLUGINS_HOME}/cache/config between invocations
+ICAV2_CLI_PLUGINS_PERSIST_CONFIG_CACHE_ENV_VAR = "ICAV2_CLI_PLUGINS_PERSIST_CONFIG_CACHE"
+
+# Tenant index entries older than this are rescanned, override with the env var below
+ICAV2_CLI_PLUGINS_INDEX_DEFAULT_MAX_AGE_MINUTES = 10
+ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_ENV_VAR = "ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_MINUTES"
+
+# Pipelines without an (optional) schema input file are not re-queried for this long
+ICAV2_CLI_PLUGINS_PIPELINE_SCHEMA_MISSING_MARKER_TTL_SECONDS = 3600
 
 ICAV2_DEFAULT_ANALYSIS_STORAGE_SIZE = AnalysisStorageSize.SMALL
 
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+
+"""
+A local index of the tenant, so that questions like 'which projects contain pipeline X'
+or 'which projects is bundle Y linked to' don't need a full scan of every project each time they're asked.
+
+The index is built with 'icav2 tenants index build' and is also topped up by any command that has to scan projects
+that are not yet in the index.
+Project entries older than ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_MINUTES (default 10) minutes are rescanned when consulted,
+commands that consult the index also take a --live parameter to ignore the index and rescan every project.
+
+The index is stored per tenant under {ICAV2_CLI_PLUGINS_HOME}/cache/tenants/<tenant_name>/index.json
+and has the following structure
+
+{
+  "time_built": "<iso datetime>",  # The last time the index was built with 'icav2 tenants index build'
+  "projects": {
+    "<project_id>": {
+      "project_name": "<project_name>",
+      "time_updated": "<iso datetime>",
+      "pipelines": [
+        {
+          "pipeline_id": "<pipeline_id>",
+          "pipeline_code": "<pipeline_code>",
+          "is_bundle_linked": <bool>
+        }
+      ],
+      "bundles": [
+        {
+          "bundle_id": "<bundle_id>",
+          "bundle_name": "<bundle_name>"
+        }
+      ]
+    }
+  }
+}
+"""
+
+# External imports
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Callable, Iterator, Tuple
+
+# Wrapica imports
+from wrapica.bundle import list_bundles_in_project
+from wrapica.project import Project
+from wrapica.project_pipelines import ProjectPipeline, list_project_pipelines
+
+# Local imports
+from .concurrency_helpers import run_concurrently_as_completed, call_with_retries
+from .config_helpers import get_tenant
+from .globals import ICAV2_CLI_PLUGINS_INDEX_DEFAULT_MAX_AGE_MINUTES, ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_ENV_VAR
+from .logger import get_logger
+from .plugin_helpers import get_cache_directory, write_file_atomically
+
+# Set logger
+logger = get_logger()
+
+
+def get_tenant_index_path(tenant_name: Optional[str] = None) -> Path:
+    if tenant_name is None:
+        tenant_name = get_tenant(raise_if_not_found=False)
+    if tenant_name is None:
+        tenant_name = "default"
+    return get_cache_directory() / "tenants" / tenant_name / "index.json"
+
+
+def read_tenant_index(tenant_name: Optional[str] = None) -> Dict:
+    """
+    Read the tenant index, an empty index is returned if the index does not exist or cannot be read
+    :param tenant_name:
+    :return:
+    """
+    tenant_index_path = get_tenant_index_path(tenant_name)
+
+    if not tenant_index_path.is_file():
+        return {"projects": {}}
+
+    try:
+        with open(tenant_index_path, "r") as index_h:
+            tenant_index = json.load(index_h)
+    except json.JSONDecodeError:
+        logger.warning(f"Could not read tenant index at {tenant_index_path}, ignoring")
+        return {"projects": {}}
+
+    tenant_index.setdefault("projects", {})
+    return tenant_index
+
+
+def write_tenant_index(tenant_index: Dict, tenant_name: Optional[str] = None):
+    write_file_atomically(
+        get_tenant_index_path(tenant_name),
+        json.dumps(tenant_index, indent=2).encode()
+    )
+
+
+def get_utc_now_str() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def get_index_max_age_minutes() -> int:
+    """
+    Get the age (in minutes) beyond which a project entry in the tenant index is rescanned,
+    set ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_MINUTES to override the default of ten minutes
+    :return:
+    """
+    max_age_env = os.environ.get(ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_ENV_VAR, None)
+
+    if max_age_env is None:
+        return ICAV2_CLI_PLUGINS_INDEX_DEFAULT_MAX_AGE_MINUTES
+
+    try:
+        return int(max_age_env)
+    except ValueError:
+        logger.warning(
+            f"Could not parse {ICAV2_CLI_PLUGINS_INDEX_MAX_AGE_ENV_VAR}='{max_age_env}' as an integer, "
+            f"using the default of {ICAV2_CLI_PLUGINS_INDEX_DEFAULT_MAX_AGE_MINUTES} minutes"
+        )
+        return ICAV2_CLI_PLUGINS_INDEX_DEFAULT_MAX_AGE_MINUTES
+
+
+def get_index_entry_age_minutes(index_entry: Dict) -> Optional[float]:
+    """
+    Get the number of minutes since an index entry was last updated, None if we don't know when it was updated
+    :param index_entry:
+    :return:
+    """
+    if index_entry.get("time_updated", None) is None:
+        return None
+
+    return (
+        datetime.now(timezone.utc) - datetime.fromisoformat(index_entry["time_updated"])
+    ).total_seconds() / 60
+
+
+def is_index_entry_fresh(index_entry: Dict, max_age_minutes: Optional[int] = None) -> bool:
+    """
+    Check an index entry was updated within max_age_minutes
+    :param index_entry:
+    :param max_age_minutes: Defaults to get_index_max_age_minutes()
+    :return:
+    """
+    if max_age_minutes is None:
+        max_age_minutes = get_index_max_age_minutes()
+
+    age_minutes = get_index_entry_age_minutes(index_entry)
+
+    return age_minutes is not None and age_minutes < max_age_minutes
+
+
+def is_project_pipeline_bundle_linked(project_pipeline: ProjectPipeline) -> bool:
+    """
+    A project pipeline with bundle links has been linked to the project through a bundle
+    :param project_pipeline:
+    :return:
+    """
+    bundle_links = getattr(project_pipeline, "bundle_links", None)
+    if bundle_links is None:
+        return False
+    return len(getattr(bundle_links, "items", None) or []) > 0
+
+
+def scan_project_pipelines(project: Project) -> Dict:
+    """
+    List the pipelines in a project as an index entry
+    :param project:
+    :return:
+    """
+    project_pipelines: List[ProjectPipeline] = call_with_retries(
+        lambda: list_project_pipelines(project_id=project.id)
+    )
+    return {
+        "project_name": project.name,
+        "time_updated": get_utc_now_str(),
+        "pipelines": list(
+            map(
+                lambda project_pipeline_iter: {
+                    "pipeline_id": project_pipeline_iter.pipeline.id,
+                    "pipeline_code": project_pipeline_iter.pipeline.code,
+                    "is_bundle_linked": is_project_pipeline_bundle_linked(project_pipeline_iter)
+                },
+                project_pipelines
+            )
+        )
+    }
+
+
+def scan_project_bundles(project: Project) -> Dict:
+    """
+    List the bundles linked to a project as an index entry
+    :param project:
+    :return:
+    """
+    return {
+        "project_name": project.name,
+        "time_updated": get_utc_now_str(),
+        "bundles": list(
+            map(
+                lambda bundle_iter: {
+                    "bundle_id": bundle_iter.id,
+                    "bundle_name": bundle_iter.name
+                },
+                call_with_retries(
+                    lambda: list_bundles_in_project(project_id=project.id)
+                )
+            )
+        )
+    }
+
+
+def scan_project(project: Project) -> Dict:
+    """
+    Scan both the pipelines and bundles of a project
+    :param project:
+    :return:
+    """
+    return {
+        **scan_project_pipelines(project),
+        **scan_project_bundles(project)
+    }
+
+
+def iter_project_index_entries(
+        projects: List[Project],
+        index_key: str,
+        live: Optional[bool] = False,
+        max_workers: Optional[int] = None,
+        max_age_minutes: Optional[int] = None
+) -> Iterator[Tuple[Project, Dict]]:
+    """
+    Yield the index entry of each project, projects already in the index (with the index_key) are yielded first,
+    the remaining projects (and those with an entry older than max_age_minutes)
+    are then scanned concurrently and yielded as each scan completes.
+    The index is updated with any projects scanned, even if the caller stops iterating early.
+
+    :param projects: The projects to yield the index entries of
+    :param index_key: One of 'pipelines' or 'bundles'
+    :param live: Ignore the index and scan every project
+    :param max_workers: The number of projects to scan at once
+    :param max_age_minutes: Rescan projects with an entry older than this, defaults to get_index_max_age_minutes()
+    :return: Yields tuples of (project, project_index_entry)
+    """
+    scanner: Callable[[Project], Dict] = scan_project_pipelines if index_key == "pipelines" else scan_project_bundles
+
+    if max_age_minutes is None:
+        max_age_minutes = get_index_max_age_minutes()
+
+    tenant_index = read_tenant_index()
+
+    projects_to_scan = []
+    num_projects_from_index = 0
+    for project in projects:
+        project_index_entry = tenant_index["projects"].get(project.id, None)
+        if (
+            live or
+            project_index_entry is None or
+            index_key not in project_index_entry or
+            not is_index_entry_fresh(project_index_entry, max_age_minutes)
+        ):
+            projects_to_scan.append(project)
+            continue
+        if num_projects_from_index == 0:
+            logger.info(
+                f"Using tenant index entries updated within the last {max_age_minutes} minutes "
+                f"(index last built at {tenant_index.get('time_built', None)}), use --live to rescan all projects"
+            )
+        num_projects_from_index += 1
+        yield project, project_index_entry
+
+    if len(projects_to_scan) == 0:
+        return
+
+    logger.info(f"Scanning the {index_key} of {len(projects_to_scan)} projects")
+    try:
+        for project, project_index_entry, exc in run_concurrently_as_completed(
+            scanner,
+            projects_to_scan,
+            max_workers=max_workers
+        ):
+            if exc is not None:
+                logger.warning(f"Could not list the {index_key} in project '{project.name}': {exc}")
+                continue
+
+            # Keep any other keys we have for this project
+            tenant_index["projects"].setdefault(project.id, {}).update(project_index_entry)
+
+            yield project, tenant_index["projects"][project.id]
+    finally:
+        write_tenant_index(tenant_index)
+
+
+def project_index_entry_has_pipeline(
+        project_index_entry: Dict,
+        pipeline_id: str,
+        include_bundle_linked: Optional[bool] = False
+) -> bool:
+    return any(
+        map(
+            lambda pipeline_index_entry_iter: (
+                pipeline_index_entry_iter.get("pipeline_id") == pipeline_id and
+                (include_bundle_linked or not pipeline_index_entry_iter.get("is_bundle_linked"))
+            ),
+            project_index_entry.get("pipelines", [])
+        )
+    )
+
+
+def project_index_entry_has_bundle(project_index_entry: Dict, bundle_id: str) -> bool:
+    return any(
+        map(
+            lambda bundle_index_entry_iter: bundle_index_entry_iter.get("bundle_id") == bundle_id,
+            project_index_entry.get("bundles", [])
+        )
+    )
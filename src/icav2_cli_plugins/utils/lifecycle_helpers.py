@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""
+Lifecycle helpers
+
+Bulk status transitions (release, deprecate) of bundles and pipelines.
+
+Transitions are applied concurrently, rate limited, and recorded in a journal (jsonl) as each transition completes,
+so that an interrupted (or partially failed) run can be resumed from the journal without repeating
+transitions that have already been applied.
+
+Each line of the journal has the following structure
+
+{"id": "<bundle_or_pipeline_id>", "name": "<bundle_name_or_pipeline_code>", "transition": "<release|deprecate>", "error": null}
+"""
+
+# External imports
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+# Local imports
+from .concurrency_helpers import run_concurrently_as_completed, call_with_retries, RateLimiter, JsonlJournal
+from .logger import get_logger
+
+# Set logger
+logger = get_logger()
+
+
+def get_completed_ids_from_journal(journal_path: Path, transition: str) -> Set[str]:
+    """
+    Collect the ids of objects whose transition has already been applied successfully
+    :param journal_path:
+    :param transition:
+    :return:
+    """
+    return set(
+        map(
+            lambda journal_entry_iter: journal_entry_iter["id"],
+            filter(
+                lambda journal_entry_iter: (
+                    journal_entry_iter.get("transition") == transition and
+                    journal_entry_iter.get("error", None) is None
+                ),
+                JsonlJournal.read(journal_path)
+            )
+        )
+    )
+
+
+def print_lifecycle_targets(targets: List[Dict]):
+    """
+    Preview the objects to transition as a table, each target has the keys id, name and status (plus any others)
+    :param targets:
+    :return:
+    """
+    from tabulate import tabulate
+
+    print(tabulate(targets, headers="keys"))
+
+
+def apply_lifecycle_transition(
+        targets: List[Dict],
+        transition: str,
+        transition_func: Callable[[str], None],
+        journal_path: Optional[Path] = None,
+        max_workers: Optional[int] = None,
+        max_calls_per_minute: Optional[int] = None
+) -> bool:
+    """
+    Apply a status transition to each target concurrently
+
+    :param targets: The objects to transition, each target has the keys id and name
+    :param transition: One of 'release' or 'deprecate'
+    :param transition_func: Applies the transition to an object id
+    :param journal_path: Optional, append the result of each transition to this journal
+    :param max_workers:
+    :param max_calls_per_minute:
+    :return: True if any transition failed
+    """
+    rate_limiter = RateLimiter(max_calls_per_minute)
+
+    def _transition(target: Dict):
+        rate_limiter.wait()
+        # Rate limited calls are retried, other transient errors are not since transitions may not be idempotent
+        call_with_retries(
+            lambda: transition_func(target["id"]),
+            retryable_status_codes=[429]
+        )
+
+    num_failed = 0
+    with JsonlJournal(journal_path) as journal:
+        for num_completed, (target, _, exc) in enumerate(
+            run_concurrently_as_completed(
+                _transition,
+                targets,
+                max_workers=max_workers
+            ),
+            start=1
+        ):
+            if exc is not None:
+                num_failed += 1
+                logger.error(f"[{num_completed}/{len(targets)}] Could not {transition} '{target['name']}' ({target['id']}): {exc}")
+            else:
+                logger.info(f"[{num_completed}/{len(targets)}] Successfully applied {transition} to '{target['name']}' ({target['id']})")
+
+            journal.write(
+                {
+                    "id": target["id"],
+                    "name": target["name"],
+                    "transition": transition,
+                    "error": JsonlJournal.get_error_str(exc)
+                }
+            )
+
+    if num_failed > 0:
+        logger.error(f"Could not {transition} {num_failed} of {len(targets)} objects")
+        return True
+    return False
@@ -1,8 +1,19 @@
 #!/usr/bin/env python
+import re
+import shutil
+import time
+import zipfile
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Callable
+
+# Wrapica
+from wrapica.libica_exceptions import ApiException
 
 # Utils
+from .globals import ICAV2_CLI_PLUGINS_PIPELINE_SCHEMA_MISSING_MARKER_TTL_SECONDS
 from .logger import get_logger
+from .plugin_helpers import get_cache_directory, write_file_atomically
 from .subprocess_handler import run_subprocess_proc
 
 # Set logger
@@ -35,3 +46,159 @@ def download_nf_core_pipeline_to_zip(
         raise ChildProcessError
 
 
+def get_nf_core_pipeline_cache_directory(pipeline_name: str, pipeline_revision: str) -> Path:
+    """
+    nf-core pipeline downloads are cached per pipeline and revision
+    :param pipeline_name:
+    :param pipeline_revision:
+    :return:
+    """
+    return (
+        get_cache_directory() / "nf-core" / pipeline_name /
+        re.sub(r"[^0-9A-Za-z._-]", "_", pipeline_revision)
+    )
+
+
+def get_cached_nf_core_pipeline_zip(
+        pipeline_name: str,
+        pipeline_revision: str,
+        use_cache: bool = True
+) -> Path:
+    """
+    Get the zipped nf-core pipeline from the cache, otherwise download it with nf-core into the cache.
+
+    The cached zip should be treated as read-only, copy it before modifying it.
+
+    :param pipeline_name:
+    :param pipeline_revision:
+    :param use_cache: If False, always download the pipeline (and refresh the cache), i.e if the revision is a branch
+    :return: The path to the zip file in the cache
+    """
+    pipeline_zip_path = get_nf_core_pipeline_cache_directory(pipeline_name, pipeline_revision) / f"{pipeline_name}.zip"
+
+    if use_cache and pipeline_zip_path.is_file() and zipfile.is_zipfile(pipeline_zip_path):
+        logger.info(f"Using cached nf-core pipeline {pipeline_name} at revision {pipeline_revision}")
+        return pipeline_zip_path
+
+    with TemporaryDirectory() as tmp_dir:
+        tmp_pipeline_zip_path = Path(tmp_dir) / f"{pipeline_name}.zip"
+        download_nf_core_pipeline_to_zip(
+            pipeline_name=pipeline_name,
+            pipeline_revision=pipeline_revision,
+            output_zip_path=tmp_pipeline_zip_path
+        )
+        write_file_atomically(pipeline_zip_path, tmp_pipeline_zip_path.read_bytes())
+
+    return pipeline_zip_path
+
+
+def get_pipeline_schema_cache_directory(pipeline_id: str, time_modified: str) -> Path:
+    """
+    Schema files are cached per pipeline, under a directory for the modification time of the pipeline
+    :param pipeline_id:
+    :param time_modified:
+    :return:
+    """
+    return (
+        get_cache_directory() / "pipelines" / pipeline_id / "schemas" /
+        re.sub(r"[^0-9A-Za-z]", "", time_modified)
+    )
+
+
+def is_missing_pipeline_file_exception(exc: Exception) -> bool:
+    """
+    The schema downloaders raise StopIteration when the pipeline does not have the file,
+    the file may also have been removed between listing and downloading it (a 404).
+    Anything else (i.e an expired token, being rate limited or a server side error) does not tell us the file is missing
+    :param exc:
+    :return:
+    """
+    return (
+        isinstance(exc, StopIteration) or
+        (isinstance(exc, ApiException) and getattr(exc, "status", None) == 404)
+    )
+
+
+def get_cached_pipeline_schema_file(
+        pipeline_id: str,
+        time_modified: str,
+        file_name: str,
+        downloader: Callable[[str, Path], None],
+        is_optional: bool = False
+) -> Path:
+    """
+    Get a schema file for a pipeline from the cache, otherwise download it into the cache.
+    Schema files cached for an older modification time of the pipeline are removed.
+
+    If an optional file (i.e schema_input.json) is missing from the pipeline, we write an empty <file_name>.missing marker
+    so that the pipeline is not re-queried for the file on every invocation,
+    the marker expires after ICAV2_CLI_PLUGINS_PIPELINE_SCHEMA_MISSING_MARKER_TTL_SECONDS.
+    Any other failure to download the file is raised as is and is not cached.
+
+    :param pipeline_id:
+    :param time_modified: The time the pipeline was last modified
+    :param file_name: The name of the file in the cache, i.e nextflow_schema.json
+    :param downloader: Downloads the file for a pipeline id to a path
+    :param is_optional: The pipeline may not have this file, cache that it is missing
+    :raises FileNotFoundError: If the pipeline does not have the file, now or on a recent invocation
+    :return: The path to the file in the cache
+    """
+    schema_cache_dir = get_pipeline_schema_cache_directory(pipeline_id, time_modified)
+    schema_file_path = schema_cache_dir / file_name
+    schema_file_missing_marker_path = schema_cache_dir / f"{file_name}.missing"
+
+    if schema_file_path.is_file():
+        logger.debug(f"Using cached {file_name} for pipeline {pipeline_id}")
+        return schema_file_path
+
+    if (
+        is_optional and
+        schema_file_missing_marker_path.is_file() and
+        time.time() - schema_file_missing_marker_path.stat().st_mtime < ICAV2_CLI_PLUGINS_PIPELINE_SCHEMA_MISSING_MARKER_TTL_SECONDS
+    ):
+        raise FileNotFoundError(
+            f"Pipeline {pipeline_id} does not have {file_name} (cached for this pipeline modification time)"
+        )
+
+    try:
+        with TemporaryDirectory() as tmp_dir:
+            tmp_schema_file_path = Path(tmp_dir) / file_name
+            downloader(pipeline_id, tmp_schema_file_path)
+            write_file_atomically(schema_file_path, tmp_schema_file_path.read_bytes())
+    except Exception as exc:
+        if not is_missing_pipeline_file_exception(exc):
+            raise
+        if is_optional:
+            write_file_atomically(schema_file_missing_marker_path, b"")
+        raise FileNotFoundError(f"Pipeline {pipeline_id} does not have {file_name}") from exc
+    else:
+        schema_file_missing_marker_path.unlink(missing_ok=True)
+    finally:
+        # Remove schema files from older versions of the pipeline
+        for stale_schema_cache_dir in schema_cache_dir.parent.iterdir():
+            if not stale_schema_cache_dir == schema_cache_dir:
+                shutil.rmtree(stale_schema_cache_dir, ignore_errors=True)
+
+    return schema_file_path
+
+    if schema_file_missing_marker_path.is_file():
+        raise FileNotFoundError(
+            f"Could not get {file_name} for pipeline {pipeline_id} (cached failure for this pipeline modification time)"
+        )
+
+    try:
+        with TemporaryDirectory() as tmp_dir:
+            tmp_schema_file_path = Path(tmp_dir) / file_name
+            downloader(pipeline_id, tmp_schema_file_path)
+            write_file_atomically(schema_file_path, tmp_schema_file_path.read_bytes())
+    except Exception as exc:
+        write_file_atomically(schema_file_missing_marker_path, b"")
+        raise FileNotFoundError(f"Could not get {file_name} for pipeline {pipeline_id}: {exc}") from exc
+    finally:
+        # Remove schema files from older versions of the pipeline
+        for stale_schema_cache_dir in schema_cache_dir.parent.iterdir():
+            if not stale_schema_cache_dir == schema_cache_dir:
+                shutil.rmtree(stale_schema_cache_dir, ignore_errors=True)
+
+    return schema_file_path
+
@@ -4,12 +4,16 @@
 Helpers for pipeline functions
 """
 # External imports
+import json
 from pathlib import Path
+from typing import Dict, Optional
 from deepdiff import DeepDiff
 from ruamel.yaml import YAML
 
 # Utils
+from . import get_md5sum_from_file
 from .logger import get_logger
+from .plugin_helpers import get_cache_directory, write_file_atomically
 
 # Set logger
 logger = get_logger()
@@ -36,3 +40,94 @@ def compare_yaml_files(path_a: Path, path_b: Path) -> DeepDiff:
         yaml_b_dict = yaml_b.load(path_b_h)
 
     return DeepDiff(yaml_a_dict, yaml_b_dict)
+
+
+def get_md5sums_from_directory(directory: Path) -> Dict[str, str]:
+    """
+    Get the md5sum of every file in a directory
+    Args:
+        directory:
+
+    Returns:
+        Dictionary of the relative path of each file (as a string) to its md5sum
+    """
+    return dict(
+        map(
+            lambda file_iter: (str(file_iter.relative_to(directory)), get_md5sum_from_file(file_iter)),
+            filter(
+                lambda file_iter: file_iter.is_file(),
+                directory.rglob("*")
+            )
+        )
+    )
+
+
+def get_pipeline_files_manifest_path(pipeline_id: str) -> Path:
+    return get_cache_directory() / "pipelines" / pipeline_id / "files.json"
+
+
+def read_pipeline_files_manifest(pipeline_id: str) -> Optional[Dict]:
+    """
+    Read the manifest of a pipeline's files, written after the last update (or download) of the pipeline
+    The ICAv2 API does not provide checksums of pipeline files, so we keep our own
+
+    Args:
+        pipeline_id:
+
+    Returns:
+        Dictionary with the keys 'time_modified' (of the pipeline)
+        and 'files' (a dictionary of file name to file id and md5sum), or None if there is no manifest
+    """
+    manifest_path = get_pipeline_files_manifest_path(pipeline_id)
+
+    if not manifest_path.is_file():
+        return None
+
+    try:
+        with open(manifest_path, "r") as manifest_h:
+            return json.load(manifest_h)
+    except json.JSONDecodeError:
+        logger.debug(f"Could not read pipeline files manifest {manifest_path}, ignoring")
+        return None
+
+
+def write_pipeline_files_manifest(pipeline_id: str, time_modified: str, files: Dict[str, Dict[str, str]]):
+    """
+    Write the manifest of a pipeline's files
+    Args:
+        pipeline_id:
+        time_modified: The modification time of the pipeline, the manifest is not trusted if this has changed
+        files: Dictionary of file name to a dictionary with the keys 'id' and 'md5sum'
+
+    Returns:
+
+    """
+    write_file_atomically(
+        get_pipeline_files_manifest_path(pipeline_id),
+        json.dumps(
+            {
+                "time_modified": time_modified,
+                "files": files
+            },
+            indent=2
+        ).encode()
+    )
+
+
+def delete_pipeline_files_manifest(pipeline_id: str):
+    get_pipeline_files_manifest_path(pipeline_id).unlink(missing_ok=True)
+
+
+def deprecate_project_pipeline(project_id: str, pipeline_id: str):
+    """
+    Deprecate a pipeline, wrapica does not (yet) provide a deprecate function, so we call the libica endpoint directly
+    :param project_id:
+    :param pipeline_id:
+    :return:
+    """
+    from libica.openapi.v2 import ApiClient
+    from libica.openapi.v2.api.project_pipeline_api import ProjectPipelineApi
+    from .config_helpers import get_libicav2_configuration
+
+    with ApiClient(get_libicav2_configuration()) as api_client:
+        ProjectPipelineApi(api_client).deprecate_project_pipeline(project_id, pipeline_id)
@@ -30,3 +30,27 @@ def get_tenants_directory():
 
 def get_default_tenant_file_path():
     return get_tenants_directory() / "default_tenant.txt"
+
+
+def get_cache_directory():
+    return get_icav2_plugins_home_dir() / "cache"
+
+
+def write_file_atomically(file_path: Path, contents: bytes, mode: int = 0o666):
+    """
+    Write to a temp file alongside the destination then rename into place,
+    so that a concurrent invocation reading from the cache never sees a partially written file.
+    The temp file is created with mode (less the umask) before anything is written to it,
+    so files holding secrets are never readable by others, not even briefly
+    :param file_path:
+    :param contents:
+    :param mode: The permissions of the file, i.e. 0o600 for files holding an api key or access token
+    :return:
+    """
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+    # Remove any temp file left behind by a killed process with the same pid, so that we create it with our mode
+    temp_file_path.unlink(missing_ok=True)
+    with os.fdopen(os.open(temp_file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode), "wb") as file_h:
+        file_h.write(contents)
+    temp_file_path.replace(file_path)
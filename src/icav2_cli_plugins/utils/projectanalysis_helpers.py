@@ -9,6 +9,7 @@ from datetime import datetime, timezone
 from typing import List, Dict
 
 # Wrapica imports
+from wrapica.enums import ProjectAnalysisStatus
 from wrapica.project_analysis import AnalysisStep
 
 # Local imports
@@ -17,6 +18,29 @@ from .logger import get_logger
 # Get logger
 logger = get_logger()
 
+# Analyses in any of these states may still change state (and may be aborted)
+NON_TERMINAL_ANALYSIS_STATUSES = [
+    ProjectAnalysisStatus.REQUESTED,
+    ProjectAnalysisStatus.QUEUED,
+    ProjectAnalysisStatus.INITIALIZING,
+    ProjectAnalysisStatus.PREPARING_INPUTS,
+    ProjectAnalysisStatus.IN_PROGRESS,
+    ProjectAnalysisStatus.GENERATING_OUTPUTS,
+    ProjectAnalysisStatus.AWAITING_INPUT
+]
+
+# How often to poll an analysis depending on its current state
+# Short-lived states are polled often, long-lived states less so
+ANALYSIS_STATUS_POLL_INTERVAL_SECONDS = {
+    ProjectAnalysisStatus.REQUESTED: 10,
+    ProjectAnalysisStatus.QUEUED: 30,
+    ProjectAnalysisStatus.INITIALIZING: 10,
+    ProjectAnalysisStatus.PREPARING_INPUTS: 15,
+    ProjectAnalysisStatus.IN_PROGRESS: 60,
+    ProjectAnalysisStatus.GENERATING_OUTPUTS: 15,
+    ProjectAnalysisStatus.AWAITING_INPUT: 60
+}
+
 
 def filter_analysis_steps(workflow_steps: List[AnalysisStep], show_technical_steps=False) -> List[Dict]:
     # Filter steps
@@ -61,3 +85,12 @@ def sort_analysis_steps(workflow_steps):
             else datetime.now(timezone.utc)
         )
     )
+
+
+def is_terminal_analysis_status(status: str) -> bool:
+    """
+    An analysis is in a terminal state if it is not in one of the NON_TERMINAL_ANALYSIS_STATUSES
+    :param status:
+    :return:
+    """
+    return ProjectAnalysisStatus(status) not in NON_TERMINAL_ANALYSIS_STATUSES
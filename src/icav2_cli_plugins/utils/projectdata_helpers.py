@@ -6,20 +6,26 @@ List of useful functions for cli helpers in ICAv2
 * list_data_non_recursively()
 * find_data()
 * get_file_download_url()
+* get_icav2_locations_from_inputs()
+* validate_icav2_locations()
 """
 
 # External imports
 import os
 from subprocess import SubprocessError
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union, Tuple
 from pathlib import Path
+from urllib.parse import urlparse
 import math
 
 # Wrapica imports
-from wrapica.project_data import ProjectData
+from wrapica.enums import DataType
+from wrapica.project import coerce_project_id_or_name_to_project_obj
+from wrapica.project_data import ProjectData, list_project_data_non_recursively
 from wrapica.user import get_user_obj_from_user_id
 
 # Local imports
+from .concurrency_helpers import run_concurrently_as_completed, call_with_retries, Memoiser
 from .logger import get_logger
 from .subprocess_handler import run_subprocess_proc
 
@@ -294,3 +300,142 @@ AWS_REGION={aws_env_vars.get("region")} \\
 
 
 
+
+
+def get_icav2_locations_from_inputs(
+        inputs: Union[Dict, List, str],
+        key_path: str = "inputs"
+) -> List[Dict]:
+    """
+    Walk an analysis inputs dict (including nested records and arrays) and collect every icav2:// location.
+
+    CWL File and Directory objects tell us the data type we expect to find,
+    bare strings (i.e. nextflow inputs or samplesheet rows) are expected to be folders only if they end in a '/'.
+
+    :param inputs: The inputs dict (or a nested value of it)
+    :param key_path: The path to this value in the inputs dict, used for reporting
+    :return: A list of dicts with the keys 'key', 'location' and 'data_type' (None if either is fine)
+    """
+    locations = []
+
+    if isinstance(inputs, dict):
+        cwl_class = inputs.get("class", None)
+        location = inputs.get("location", None)
+        if (
+                cwl_class in ["File", "Directory"] and
+                isinstance(location, str) and
+                location.startswith("icav2://")
+        ):
+            locations.append(
+                {
+                    "key": f"{key_path}.location",
+                    "location": location,
+                    "data_type": DataType.FILE if cwl_class == "File" else DataType.FOLDER
+                }
+            )
+        for key, value in inputs.items():
+            if cwl_class in ["File", "Directory"] and key == "location":
+                continue
+            locations.extend(get_icav2_locations_from_inputs(value, f"{key_path}.{key}"))
+
+    elif isinstance(inputs, list):
+        for index, value in enumerate(inputs):
+            locations.extend(get_icav2_locations_from_inputs(value, f"{key_path}[{index}]"))
+
+    elif isinstance(inputs, str) and inputs.startswith("icav2://"):
+        locations.append(
+            {
+                "key": key_path,
+                "location": inputs,
+                "data_type": DataType.FOLDER if inputs.endswith("/") else None
+            }
+        )
+
+    return locations
+
+
+def validate_icav2_locations(
+        locations: List[Dict],
+        max_workers: Optional[int] = None
+) -> List[Dict]:
+    """
+    Check that every icav2:// location exists and is of the expected data type.
+
+    Rather than resolving each location one by one, locations are grouped by their parent folder
+    and each parent folder is listed once, these listings are run concurrently.
+
+    :param locations: The output of get_icav2_locations_from_inputs
+    :param max_workers: The number of folders to list at once
+    :return: The locations that failed validation, each with an additional 'error' key
+    """
+    # Resolve each project name or id once
+    project_id_memoiser = Memoiser(
+        lambda project_name_or_id: call_with_retries(
+            lambda: coerce_project_id_or_name_to_project_obj(project_name_or_id).id
+        )
+    )
+
+    # Group locations by their parent folder
+    locations_by_parent_folder: Dict[Tuple[str, str], List[Dict]] = {}
+    for location in locations:
+        location_uri_obj = urlparse(location["location"])
+        location_path = Path(location_uri_obj.path)
+        locations_by_parent_folder.setdefault(
+            (location_uri_obj.netloc, str(location_path.parent).rstrip("/") + "/"),
+            []
+        ).append(location)
+
+    def _list_parent_folder(parent_folder: Tuple[str, str]) -> Dict[str, DataType]:
+        project_name_or_id, parent_folder_path = parent_folder
+        project_id = project_id_memoiser(project_name_or_id)
+        return dict(
+            map(
+                lambda project_data_iter: (
+                    project_data_iter.data.details.name,
+                    DataType(project_data_iter.data.details.data_type)
+                ),
+                call_with_retries(
+                    lambda: list_project_data_non_recursively(
+                        project_id=project_id,
+                        parent_folder_path=Path(parent_folder_path)
+                    )
+                )
+            )
+        )
+
+    invalid_locations = []
+    for (project_name_or_id, parent_folder_path), data_types_by_name, exc in run_concurrently_as_completed(
+        _list_parent_folder,
+        list(locations_by_parent_folder.keys()),
+        max_workers=max_workers
+    ):
+        for location in locations_by_parent_folder[(project_name_or_id, parent_folder_path)]:
+            if exc is not None:
+                invalid_locations.append(
+                    {
+                        **location,
+                        "error": f"Could not list parent folder '{parent_folder_path}' in project '{project_name_or_id}'"
+                    }
+                )
+                continue
+
+            data_name = Path(urlparse(location["location"]).path).name
+            if data_name not in data_types_by_name:
+                invalid_locations.append(
+                    {
+                        **location,
+                        "error": "Does not exist"
+                    }
+                )
+            elif location["data_type"] is not None and not data_types_by_name[data_name] == location["data_type"]:
+                invalid_locations.append(
+                    {
+                        **location,
+                        "error": (
+                            f"Expected a {location['data_type'].value.lower()} "
+                            f"but found a {data_types_by_name[data_name].value.lower()}"
+                        )
+                    }
+                )
+
+    return invalid_locations
@@ -6,13 +6,26 @@ Help out tenant commands
 
 # External imports
 import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator
+from urllib.error import HTTPError, URLError
 from urllib.parse import urlparse
-from ruamel.yaml import YAML
+from urllib.request import Request, urlopen
+from jwt import InvalidTokenError
 
 # Local imports
-from .config_helpers import get_icav2_base_url
+from . import config_helpers, is_uuid_format
+from .config_helpers import (
+    get_icav2_base_url, get_tenant_config_file_path,
+    get_jwt_token_obj, get_tenant_access_token_with_refresh, get_resolved_tenant_config, load_yaml_file_safe
+)
+from .globals import (
+    ICAV2_SESSION_FILE_ACCESS_TOKEN_KEY, ICAV2_SESSION_FILE_PROJECT_ID_KEY, ICAV2_ACCESS_TOKEN_AUDIENCE
+)
 from .logger import get_logger
 from .subprocess_handler import run_subprocess_proc
 
@@ -26,10 +39,7 @@ def get_tenant_api_key_from_config_file(tenant_config_file: Path) -> str:
     Returns:
 
     """
-    yaml = YAML()
-
-    with open(tenant_config_file, "r") as file_h:
-        return yaml.load(file_h).get("x-api-key")
+    return load_yaml_file_safe(tenant_config_file).get("x-api-key")
 
 
 def get_server_url_from_config_file(tenant_config_file: Path) -> str:
@@ -38,13 +48,10 @@ def get_server_url_from_config_file(tenant_config_file: Path) -> str:
     Returns:
 
     """
-    yaml = YAML()
-
-    with open(tenant_config_file, "r") as file_h:
-        return yaml.load(file_h).get(
-            "server-url",
-            urlparse(get_icav2_base_url(tenant_name=tenant_config_file.parent.name)).netloc
-        )
+    return load_yaml_file_safe(tenant_config_file).get(
+        "server-url",
+        urlparse(get_icav2_base_url(tenant_name=tenant_config_file.parent.name)).netloc
+    )
 
 
 def get_session_file_path_from_config_file(tenant_config_file: Path) -> Path:
@@ -115,3 +122,202 @@ def get_tenant_id_from_project_list(base_url, access_token) -> Optional[str]:
 
     logger.warning("No project had the tenantId attribute.")
     return None
+
+
+def get_tenant_base_url(tenant_name: str) -> str:
+    """
+    Get the base url of a tenant from its config file,
+    unlike get_icav2_base_url, this ignores the ICAV2_BASE_URL env var (which belongs to the current tenant)
+    :param tenant_name:
+    :return:
+    """
+    return f"https://{get_server_url_from_config_file(get_tenant_config_file_path(tenant_name))}/ica/rest"
+
+
+def get_tenant_access_token(tenant_name: str) -> str:
+    """
+    Get a valid access token for a tenant, from the tenant session file if the token there has not expired,
+    otherwise create a new access token from the tenant api key
+    :param tenant_name:
+    :return:
+    """
+    return get_tenant_access_token_with_refresh(tenant_name)
+
+
+@contextmanager
+def tenant_context(tenant_name: str) -> Iterator[None]:
+    """
+    Temporarily switch the environment (and so the wrapica / libica configuration) over to another tenant.
+    The environment is process wide, so tenants must be switched one at a time (not from within threads)
+
+    :param tenant_name:
+    :return:
+    """
+    env_keys = ["ICAV2_TENANT_NAME", "ICAV2_BASE_URL", "ICAV2_ACCESS_TOKEN", "ICAV2_PROJECT_ID"]
+    original_env = {
+        env_key: os.environ.get(env_key, None)
+        for env_key in env_keys
+    }
+    original_libicav2_configuration = config_helpers.LIBICAV2_CONFIGURATION
+
+    try:
+        os.environ["ICAV2_TENANT_NAME"] = tenant_name
+        os.environ["ICAV2_BASE_URL"] = get_tenant_base_url(tenant_name)
+        os.environ["ICAV2_ACCESS_TOKEN"] = get_tenant_access_token(tenant_name)
+        os.environ.pop("ICAV2_PROJECT_ID", None)
+        config_helpers.LIBICAV2_CONFIGURATION = None
+        yield
+    finally:
+        for env_key, env_value in original_env.items():
+            if env_value is None:
+                os.environ.pop(env_key, None)
+            else:
+                os.environ[env_key] = env_value
+        config_helpers.LIBICAV2_CONFIGURATION = original_libicav2_configuration
+
+
+def get_project_ids_from_project_names_or_ids_curl(
+        base_url: str,
+        project_name_or_id_list: List[str],
+        access_token: str
+) -> Dict[str, str]:
+    """
+    Resolve project names to project ids, i.e within a tenant other than the current tenant,
+    the project list is only fetched once (and only if any of the projects are given by name)
+    :param base_url:
+    :param project_name_or_id_list:
+    :param access_token:
+    :return: Dictionary of project name (or id) to project id
+    """
+    project_id_map = {
+        project_name_or_id: project_name_or_id
+        for project_name_or_id in project_name_or_id_list
+        if is_uuid_format(project_name_or_id)
+    }
+
+    project_names = list(filter(lambda project_iter: project_iter not in project_id_map, project_name_or_id_list))
+    if len(project_names) == 0:
+        return project_id_map
+
+    project_id_by_name = dict(
+        map(
+            lambda project_iter: (project_iter.get("name"), project_iter.get("id")),
+            get_project_list_curl(base_url, access_token)
+        )
+    )
+
+    for project_name in project_names:
+        if project_name not in project_id_by_name:
+            logger.error(f"Could not find project '{project_name}'")
+            raise ValueError
+        project_id_map[project_name] = project_id_by_name[project_name]
+
+    return project_id_map
+
+
+def get_access_token_expiry(access_token: Optional[str]) -> Optional[datetime]:
+    """
+    Decode the expiry of an access token locally (without calling the api)
+    :param access_token:
+    :return: None if there is no access token or the token cannot be decoded
+    """
+    if access_token is None:
+        return None
+    try:
+        return datetime.fromtimestamp(
+            get_jwt_token_obj(access_token, ICAV2_ACCESS_TOKEN_AUDIENCE).get("exp"),
+            tz=timezone.utc
+        )
+    except InvalidTokenError:
+        return None
+
+
+def probe_tenant_latency(base_url: str, access_token: Optional[str] = None, timeout_seconds: int = 10) -> Optional[float]:
+    """
+    Time a cheap request against the tenant's server (listing the regions)
+    Any http response (including unauthorised) counts as the server being reachable
+    :param base_url:
+    :param access_token:
+    :param timeout_seconds:
+    :return: The latency in milliseconds, or None if the server could not be reached
+    """
+    request = Request(
+        f"{base_url}/api/regions",
+        headers=dict(
+            filter(
+                lambda header_iter: header_iter[1] is not None,
+                {
+                    "Accept": "application/vnd.illumina.v3+json",
+                    "Authorization": f"Bearer {access_token}" if access_token is not None else None,
+                }.items()
+            )
+        )
+    )
+
+    start_time = time.monotonic()
+    try:
+        with urlopen(request, timeout=timeout_seconds) as response_h:
+            response_h.read()
+    except HTTPError:
+        pass
+    except (URLError, TimeoutError, OSError) as exc:
+        logger.debug(f"Could not reach {base_url}: {exc}")
+        return None
+
+    return round((time.monotonic() - start_time) * 1000, 1)
+
+
+def get_tenant_status(
+        tenant_name: str,
+        refresh_within_seconds: Optional[int] = None,
+        probe: bool = True
+) -> Dict:
+    """
+    Collect the status of a tenant, the expiry of the stored access token, the latency of the tenant's server
+    and the default project of the tenant.
+
+    :param tenant_name:
+    :param refresh_within_seconds: If set, refresh the stored access token (from the tenant api key)
+                                   if it has expired or expires within this many seconds
+    :param probe: Probe the latency of the tenant's server
+    :return:
+    """
+    base_url = get_tenant_base_url(tenant_name)
+    tenant_session_dict = get_resolved_tenant_config(tenant_name)["session"] or {}
+
+    access_token = tenant_session_dict.get(ICAV2_SESSION_FILE_ACCESS_TOKEN_KEY, None)
+    token_expiry = get_access_token_expiry(access_token)
+
+    is_refreshed = False
+    if refresh_within_seconds is not None:
+        # Only refreshes if the token expires within the margin
+        refreshed_access_token = get_tenant_access_token_with_refresh(
+            tenant_name,
+            refresh_margin_seconds=refresh_within_seconds
+        )
+        is_refreshed = not refreshed_access_token == access_token
+        access_token = refreshed_access_token
+        token_expiry = get_access_token_expiry(access_token)
+
+    if token_expiry is not None:
+        token_seconds_remaining = int((token_expiry - datetime.now(timezone.utc)).total_seconds())
+    else:
+        token_seconds_remaining = None
+
+    return {
+        "name": tenant_name,
+        "server_url": urlparse(base_url).netloc,
+        "token_expiry": token_expiry.isoformat(timespec="seconds") if token_expiry is not None else None,
+        "token_minutes_remaining": (
+            max(0, token_seconds_remaining // 60) if token_seconds_remaining is not None else None
+        ),
+        "token_refreshed": is_refreshed,
+        "latency_ms": (
+            probe_tenant_latency(
+                base_url,
+                access_token=access_token if token_seconds_remaining is not None and token_seconds_remaining > 0 else None
+            )
+            if probe else None
+        ),
+        "default_project_id": tenant_session_dict.get(ICAV2_SESSION_FILE_PROJECT_ID_KEY, None),
+    }
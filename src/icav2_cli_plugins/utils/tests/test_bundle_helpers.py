@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""
+Test collecting the top level data of a bundle in the bundle helpers
+"""
+import unittest
+
+from types import SimpleNamespace
+from typing import List
+from unittest.mock import patch
+
+from icav2_cli_plugins.utils.bundle_helpers import iter_top_level_bundle_data
+
+# Some globals
+BUNDLE_ID = "bundle.1234"
+PROJECT_ID = "project-1234"
+OTHER_PROJECT_ID = "project-5678"
+BUNDLE_HELPERS_MODULE = "icav2_cli_plugins.utils.bundle_helpers"
+
+
+def get_bundle_data(path: str, project_id: str = PROJECT_ID) -> SimpleNamespace:
+    return SimpleNamespace(
+        data=SimpleNamespace(
+            details=SimpleNamespace(
+                owning_project_id=project_id,
+                path=path,
+                data_type="FOLDER" if path.endswith("/") else "FILE"
+            )
+        )
+    )
+
+
+def get_paths(bundle_data_list: List[SimpleNamespace]) -> List[str]:
+    return list(
+        map(
+            lambda bundle_data_iter: bundle_data_iter.data.details.path,
+            bundle_data_list
+        )
+    )
+
+
+def get_bundle_data_pages(bundle_data_list: List[SimpleNamespace]):
+    """
+    Mock get_bundle_data_page_by_path over a list of bundle data (already sorted by path)
+    """
+    def _get_bundle_data_page_by_path(bundle_id: str, page_offset: int, page_size_iter: int):
+        return SimpleNamespace(
+            items=bundle_data_list[page_offset:page_offset + page_size_iter],
+            total_item_count=len(bundle_data_list)
+        )
+
+    return _get_bundle_data_page_by_path
+
+
+# Sorted by path, as returned by the api
+BUNDLE_DATA_LIST = [
+    get_bundle_data("/outputs/report.html"),
+    get_bundle_data("/references/"),
+    get_bundle_data("/references/hg38/"),
+    get_bundle_data("/references/hg38/genome.fa"),
+    get_bundle_data("/references/hg38/genome.fa", project_id=OTHER_PROJECT_ID),
+    get_bundle_data("/references_old/genome.fa"),
+]
+
+
+@patch(f"{BUNDLE_HELPERS_MODULE}.LIBICAV2_DEFAULT_PAGE_SIZE", 2)
+class TestIterTopLevelBundleData(unittest.TestCase):
+    @patch(f"{BUNDLE_HELPERS_MODULE}.iter_bundle_data_by_cursor")
+    @patch(f"{BUNDLE_HELPERS_MODULE}.get_bundle_data_page_by_path")
+    def test_nested_data_is_dropped_across_pages(self, mock_get_bundle_data_page_by_path, mock_iter_bundle_data_by_cursor):
+        mock_get_bundle_data_page_by_path.side_effect = get_bundle_data_pages(BUNDLE_DATA_LIST)
+
+        self.assertEqual(
+            get_paths(list(iter_top_level_bundle_data(BUNDLE_ID))),
+            [
+                "/outputs/report.html",
+                "/references/",
+                # The same path in another project is not within the folder
+                "/references/hg38/genome.fa",
+                "/references_old/genome.fa",
+            ]
+        )
+
+        # The last page of data is full, so paging stops at the (empty) page after it
+        self.assertEqual(
+            list(map(lambda call_iter: call_iter.args[1], mock_get_bundle_data_page_by_path.call_args_list)),
+            [0, 2, 4, 6]
+        )
+        mock_iter_bundle_data_by_cursor.assert_not_called()
+
+    @patch(f"{BUNDLE_HELPERS_MODULE}.LIBICAV2_MAX_OFFSET_PAGING_ROWS", 4)
+    @patch(f"{BUNDLE_HELPERS_MODULE}.filter_bundle_data_to_top_level_only", side_effect=lambda bundle_data_list: bundle_data_list[:1])
+    @patch(f"{BUNDLE_HELPERS_MODULE}.iter_bundle_data_by_cursor", side_effect=lambda bundle_id: iter(BUNDLE_DATA_LIST))
+    @patch(f"{BUNDLE_HELPERS_MODULE}.get_bundle_data_page_by_path")
+    def test_large_bundles_use_cursor_paging(
+            self,
+            mock_get_bundle_data_page_by_path,
+            mock_iter_bundle_data_by_cursor,
+            mock_filter_bundle_data_to_top_level_only
+    ):
+        mock_get_bundle_data_page_by_path.side_effect = get_bundle_data_pages(BUNDLE_DATA_LIST)
+
+        self.assertEqual(
+            get_paths(list(iter_top_level_bundle_data(BUNDLE_ID))),
+            ["/outputs/report.html"]
+        )
+
+        # Offset paging stops after the first page
+        mock_get_bundle_data_page_by_path.assert_called_once()
+        mock_iter_bundle_data_by_cursor.assert_called_once_with(BUNDLE_ID)
+        self.assertEqual(
+            get_paths(mock_filter_bundle_data_to_top_level_only.call_args.args[0]),
+            get_paths(BUNDLE_DATA_LIST)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+"""
+Test the diff of a bundle yaml against the live bundle in the bundles apply command
+"""
+import unittest
+
+from types import SimpleNamespace
+from typing import List, Optional
+from unittest.mock import patch
+
+from icav2_cli_plugins.subcommands.bundles.bundles_apply import BundlesApply
+
+# Some globals
+BUNDLE_ID = "bundle.1234"
+PROJECT_ID = "project-1234"
+OTHER_PROJECT_ID = "project-5678"
+BUNDLES_APPLY_MODULE = "icav2_cli_plugins.subcommands.bundles.bundles_apply"
+
+
+def get_data(data_id: str, path: str, project_id: str = PROJECT_ID) -> dict:
+    return {
+        "data_id": data_id,
+        "project_id": project_id,
+        "path": path,
+    }
+
+
+def get_data_obj(path: str, project_id: str = PROJECT_ID) -> SimpleNamespace:
+    return SimpleNamespace(
+        details=SimpleNamespace(
+            owning_project_id=project_id,
+            path=path
+        )
+    )
+
+
+def get_pipeline_obj(pipeline_id: str) -> SimpleNamespace:
+    return SimpleNamespace(pipeline=SimpleNamespace(id=pipeline_id))
+
+
+def get_bundles_apply_obj(
+        desired_pipeline_ids: List[str],
+        desired_data_ids: List[str],
+        no_remove: Optional[bool] = False
+) -> BundlesApply:
+    # Skip the docopt parsing and argument checks, set the resolved arguments directly
+    bundles_apply_obj = BundlesApply.__new__(BundlesApply)
+    bundles_apply_obj.bundle_obj = SimpleNamespace(id=BUNDLE_ID)
+    bundles_apply_obj.desired_pipeline_ids = desired_pipeline_ids
+    bundles_apply_obj.desired_data_ids = desired_data_ids
+    bundles_apply_obj.no_remove = no_remove
+    bundles_apply_obj.max_workers = None
+    return bundles_apply_obj
+
+
+# A folder, its (nested) contents and a file outside of the folder
+LIVE_DATA_LIST = [
+    get_data("fol.folder", "/references/"),
+    get_data("fil.nested", "/references/hg38/genome.fa"),
+    get_data("fol.nested", "/references/hg38/"),
+    get_data("fil.sibling", "/references_old/genome.fa"),
+    get_data("fil.outside", "/outputs/report.html"),
+]
+
+
+@patch(f"{BUNDLES_APPLY_MODULE}.list_pipelines_in_bundle", return_value=[get_pipeline_obj("pipeline-a")])
+@patch(f"{BUNDLES_APPLY_MODULE}.get_bundle_all_data", return_value=LIVE_DATA_LIST)
+class TestGetBundleDiff(unittest.TestCase):
+    def test_nested_folder_contents_are_kept(self, mock_get_bundle_all_data, mock_list_pipelines_in_bundle):
+        bundle_diff = get_bundles_apply_obj(
+            desired_pipeline_ids=["pipeline-b"],
+            desired_data_ids=["fol.folder"]
+        ).get_bundle_diff()
+
+        self.assertEqual(bundle_diff["add"], {"pipelines": ["pipeline-b"], "data": []})
+        # The contents of /references/ are kept, /references_old/ is not within /references/
+        self.assertEqual(
+            bundle_diff["remove"],
+            {"pipelines": ["pipeline-a"], "data": ["fil.outside", "fil.sibling"]}
+        )
+
+        # The live data list is always collected fresh
+        mock_get_bundle_all_data.assert_called_once()
+        self.assertEqual(mock_get_bundle_all_data.call_args.kwargs, {"use_cache": False})
+
+    def test_nested_folder_contents_are_removed(self, mock_get_bundle_all_data, mock_list_pipelines_in_bundle):
+        bundle_diff = get_bundles_apply_obj(
+            desired_pipeline_ids=["pipeline-a"],
+            desired_data_ids=["fil.outside"]
+        ).get_bundle_diff()
+
+        self.assertEqual(bundle_diff["add"], {"pipelines": [], "data": []})
+        self.assertEqual(
+            bundle_diff["remove"],
+            {"pipelines": [], "data": ["fil.nested", "fil.sibling", "fol.folder", "fol.nested"]}
+        )
+
+    def test_no_remove(self, mock_get_bundle_all_data, mock_list_pipelines_in_bundle):
+        bundle_diff = get_bundles_apply_obj(
+            desired_pipeline_ids=["pipeline-b"],
+            desired_data_ids=["fil.new"],
+            no_remove=True
+        ).get_bundle_diff()
+
+        self.assertEqual(bundle_diff["add"], {"pipelines": ["pipeline-b"], "data": ["fil.new"]})
+        self.assertEqual(bundle_diff["remove"], {"pipelines": [], "data": []})
+
+    @patch(
+        f"{BUNDLES_APPLY_MODULE}.coerce_data_id_path_or_icav2_uri_to_data_obj",
+        return_value=get_data_obj("/references/hg38/")
+    )
+    def test_folder_to_add_keeps_its_contents(
+            self,
+            mock_coerce_data_obj,
+            mock_get_bundle_all_data,
+            mock_list_pipelines_in_bundle
+    ):
+        # The folder is not yet in the bundle (i.e. it has been added since we collected the data list)
+        live_data_list = list(filter(lambda data_iter: data_iter["data_id"] != "fol.nested", LIVE_DATA_LIST))
+        mock_get_bundle_all_data.return_value = live_data_list
+
+        bundle_diff = get_bundles_apply_obj(
+            desired_pipeline_ids=["pipeline-a"],
+            desired_data_ids=["fol.nested"]
+        ).get_bundle_diff()
+
+        mock_coerce_data_obj.assert_called_once_with("fol.nested")
+        self.assertEqual(bundle_diff["add"], {"pipelines": [], "data": ["fol.nested"]})
+        self.assertEqual(
+            bundle_diff["remove"],
+            {"pipelines": [], "data": ["fil.outside", "fil.sibling", "fol.folder"]}
+        )
+
+
+class TestIsInFolder(unittest.TestCase):
+    def test_nested_data_is_in_folder(self):
+        self.assertTrue(
+            BundlesApply.is_in_folder(PROJECT_ID, "/references/hg38/genome.fa", {(PROJECT_ID, "/references/")})
+        )
+
+    def test_nested_folder_is_in_folder(self):
+        self.assertTrue(
+            BundlesApply.is_in_folder(PROJECT_ID, "/references/hg38/", {(PROJECT_ID, "/references/")})
+        )
+
+    def test_folder_is_not_in_itself(self):
+        self.assertFalse(
+            BundlesApply.is_in_folder(PROJECT_ID, "/references/", {(PROJECT_ID, "/references/")})
+        )
+
+    def test_sibling_with_common_prefix_is_not_in_folder(self):
+        self.assertFalse(
+            BundlesApply.is_in_folder(PROJECT_ID, "/references_old/genome.fa", {(PROJECT_ID, "/references/")})
+        )
+
+    def test_folder_of_another_project(self):
+        self.assertFalse(
+            BundlesApply.is_in_folder(OTHER_PROJECT_ID, "/references/hg38/genome.fa", {(PROJECT_ID, "/references/")})
+        )
+
+
+class TestGetDesiredFolderPaths(unittest.TestCase):
+    @patch(
+        f"{BUNDLES_APPLY_MODULE}.coerce_data_id_path_or_icav2_uri_to_data_obj",
+        return_value=get_data_obj("/new_references/", project_id=OTHER_PROJECT_ID)
+    )
+    def test_get_desired_folder_paths(self, mock_coerce_data_obj):
+        live_data_by_id = dict(
+            map(
+                lambda data_iter: (data_iter["data_id"], data_iter),
+                LIVE_DATA_LIST
+            )
+        )
+
+        desired_folder_paths = get_bundles_apply_obj(
+            desired_pipeline_ids=[],
+            desired_data_ids=["fol.folder", "fil.outside", "fol.new"]
+        ).get_desired_folder_paths(live_data_by_id, ["fol.new"])
+
+        # Files are not folders, folders to add are looked up
+        mock_coerce_data_obj.assert_called_once_with("fol.new")
+        self.assertEqual(
+            desired_folder_paths,
+            {(PROJECT_ID, "/references/"), (OTHER_PROJECT_ID, "/new_references/")}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
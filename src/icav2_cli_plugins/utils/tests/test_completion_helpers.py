@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+"""
+Test the prefix lookups and paging of the completion helpers
+"""
+import unittest
+
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from icav2_cli_plugins.utils.completion_helpers import (
+    get_matching_entries, get_parent_folder_path_and_name_prefix, get_first_paged_items
+)
+
+# Sorted by completion, as stored in the completion cache
+COMPLETION_ENTRIES = [
+    ["/data/", "FOLDER"],
+    ["/data/sample_1.bam", "FILE"],
+    ["/data/sample_10.bam", "FILE"],
+    ["/data/sample_2.bam", "FILE"],
+    ["/data_old/", "FOLDER"],
+    ["/references/", "FOLDER"],
+]
+
+
+class TestGetMatchingEntries(unittest.TestCase):
+    def test_prefix(self):
+        self.assertEqual(
+            get_matching_entries(COMPLETION_ENTRIES, "/data/sample_1"),
+            [["/data/sample_1.bam", "FILE"], ["/data/sample_10.bam", "FILE"]]
+        )
+
+    def test_prefix_matches_the_first_entry(self):
+        self.assertEqual(
+            get_matching_entries(COMPLETION_ENTRIES, "/data"),
+            COMPLETION_ENTRIES[:5]
+        )
+
+    def test_prefix_matches_the_last_entry(self):
+        self.assertEqual(
+            get_matching_entries(COMPLETION_ENTRIES, "/ref"),
+            [["/references/", "FOLDER"]]
+        )
+
+    def test_empty_prefix(self):
+        self.assertEqual(get_matching_entries(COMPLETION_ENTRIES, ""), COMPLETION_ENTRIES)
+
+    def test_no_matches(self):
+        self.assertEqual(get_matching_entries(COMPLETION_ENTRIES, "/data/sample_3"), [])
+        self.assertEqual(get_matching_entries(COMPLETION_ENTRIES, "/zzz"), [])
+        self.assertEqual(get_matching_entries([], "/data"), [])
+
+
+class TestGetParentFolderPathAndNamePrefix(unittest.TestCase):
+    def test_get_parent_folder_path_and_name_prefix(self):
+        for prefix, expected in [
+            ("", ("/", "")),
+            ("sam", ("/", "sam")),
+            ("/", ("/", "")),
+            ("/data/", ("/data/", "")),
+            ("/data/sam", ("/data/", "sam")),
+            ("data/sam", ("/data/", "sam")),
+        ]:
+            with self.subTest(prefix=prefix):
+                self.assertEqual(get_parent_folder_path_and_name_prefix(prefix), expected)
+
+
+@patch("icav2_cli_plugins.utils.globals.LIBICAV2_DEFAULT_PAGE_SIZE", 2)
+class TestGetFirstPagedItems(unittest.TestCase):
+    @staticmethod
+    def get_page_func(num_items: int) -> MagicMock:
+        return MagicMock(
+            side_effect=lambda page_offset, page_size: SimpleNamespace(
+                items=list(range(num_items))[page_offset:page_offset + page_size]
+            )
+        )
+
+    def test_stops_at_max_items(self):
+        get_page = self.get_page_func(10)
+
+        self.assertEqual(get_first_paged_items(get_page, max_items=5), [0, 1, 2, 3, 4])
+
+        # The last page is only as large as it needs to be
+        self.assertEqual(
+            list(map(lambda call_iter: call_iter.args, get_page.call_args_list)),
+            [(0, 2), (2, 2), (4, 1)]
+        )
+
+    def test_stops_at_the_last_page(self):
+        get_page = self.get_page_func(3)
+
+        self.assertEqual(get_first_paged_items(get_page, max_items=5), [0, 1, 2])
+        self.assertEqual(get_page.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
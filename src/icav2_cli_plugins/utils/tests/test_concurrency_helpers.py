@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+"""
+Test the retries, memoisation and rate limiting in the concurrency helpers
+"""
+import unittest
+
+from threading import Event
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+from wrapica.libica_exceptions import ApiException
+
+from icav2_cli_plugins.utils.concurrency_helpers import (
+    call_with_retries, Memoiser, RateLimiter, run_concurrently, run_concurrently_as_completed
+)
+
+# Some globals
+CONCURRENCY_HELPERS_MODULE = "icav2_cli_plugins.utils.concurrency_helpers"
+
+
+def get_api_exception(status: int, retry_after: str = None) -> ApiException:
+    api_exception = ApiException(status=status)
+    api_exception.headers = {"Retry-After": retry_after} if retry_after is not None else None
+    return api_exception
+
+
+@patch(f"{CONCURRENCY_HELPERS_MODULE}.time.sleep")
+class TestCallWithRetries(unittest.TestCase):
+    def test_retries_retryable_status(self, mock_sleep):
+        func = MagicMock(side_effect=[get_api_exception(503), get_api_exception(429), "result"])
+
+        self.assertEqual(call_with_retries(func, backoff_seconds=1), "result")
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_does_not_retry_client_errors(self, mock_sleep):
+        func = MagicMock(side_effect=get_api_exception(404))
+
+        with self.assertRaises(ApiException):
+            call_with_retries(func)
+
+        func.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_retryable_status_codes_override(self, mock_sleep):
+        # Calls that are not safe to repeat only retry when rate limited
+        func = MagicMock(side_effect=[get_api_exception(503), "result"])
+
+        with self.assertRaises(ApiException):
+            call_with_retries(func, retryable_status_codes=[429])
+
+        func.assert_called_once()
+
+    def test_gives_up_after_max_retries(self, mock_sleep):
+        func = MagicMock(side_effect=get_api_exception(503))
+
+        with self.assertRaises(ApiException):
+            call_with_retries(func, max_retries=2)
+
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_respects_retry_after(self, mock_sleep):
+        func = MagicMock(side_effect=[get_api_exception(429, retry_after="30"), "result"])
+
+        self.assertEqual(call_with_retries(func, backoff_seconds=1), "result")
+        self.assertGreaterEqual(mock_sleep.call_args.args[0], 30)
+
+
+class TestMemoiser(unittest.TestCase):
+    def test_concurrent_callers_share_a_call(self):
+        is_called = Event()
+        func = MagicMock(side_effect=lambda key: is_called.wait(5) and f"result-{key}")
+        memoiser = Memoiser(func)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(memoiser, "key") for _ in range(4)]
+            is_called.set()
+            results = list(map(lambda future_iter: future_iter.result(), futures))
+
+        self.assertEqual(results, ["result-key"] * 4)
+        func.assert_called_once_with("key")
+
+        # Later callers use the memoised result
+        self.assertEqual(memoiser("key"), "result-key")
+        func.assert_called_once_with("key")
+
+    def test_failed_calls_are_not_memoised(self):
+        func = MagicMock(side_effect=[ValueError("failed"), "result"])
+        memoiser = Memoiser(func)
+
+        with self.assertRaises(ValueError):
+            memoiser("key")
+
+        self.assertEqual(memoiser("key"), "result")
+        self.assertEqual(func.call_count, 2)
+
+
+@patch(f"{CONCURRENCY_HELPERS_MODULE}.time.sleep")
+@patch(f"{CONCURRENCY_HELPERS_MODULE}.time.monotonic", return_value=100.0)
+class TestRateLimiter(unittest.TestCase):
+    def test_calls_are_spaced_out(self, mock_monotonic, mock_sleep):
+        rate_limiter = RateLimiter(calls_per_minute=60)
+
+        for _ in range(3):
+            rate_limiter.wait()
+
+        # The first call goes straight away, the next calls wait one and then two seconds
+        self.assertEqual(list(map(lambda call_iter: call_iter.args[0], mock_sleep.call_args_list)), [1.0, 2.0])
+
+    def test_no_rate_limit(self, mock_monotonic, mock_sleep):
+        rate_limiter = RateLimiter()
+
+        for _ in range(3):
+            rate_limiter.wait()
+
+        mock_sleep.assert_not_called()
+
+
+class TestRunConcurrently(unittest.TestCase):
+    def test_results_are_in_order(self):
+        self.assertEqual(run_concurrently(lambda x: x * 2, range(10), max_workers=4), list(range(0, 20, 2)))
+
+    def test_as_completed_yields_exceptions(self):
+        def _func(item: int) -> int:
+            if item == 2:
+                raise ValueError(item)
+            return item
+
+        results = dict(
+            map(
+                lambda result_iter: (result_iter[0], result_iter[1:]),
+                run_concurrently_as_completed(_func, range(4), max_workers=2)
+            )
+        )
+
+        self.assertEqual(results[1], (1, None))
+        self.assertIsNone(results[2][0])
+        self.assertIsInstance(results[2][1], ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
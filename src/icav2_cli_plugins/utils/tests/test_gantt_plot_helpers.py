@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+Test the critical path inference in the gantt plot helpers
+"""
+import unittest
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from icav2_cli_plugins.utils.gantt_plot_helpers import get_critical_path_task_ids
+
+# Some globals
+ANALYSIS_START = datetime(2024, 1, 1, 0, 0, 0)
+
+
+def get_step(task_id: str, is_technical: bool, queue_minute: int, start_minute: int, end_minute: int) -> dict:
+    return {
+        "task_id": task_id,
+        "task_is_technical": is_technical,
+        "task_queue_date": ANALYSIS_START + timedelta(minutes=queue_minute),
+        "task_start_date": ANALYSIS_START + timedelta(minutes=start_minute),
+        "task_end_date": ANALYSIS_START + timedelta(minutes=end_minute),
+    }
+
+
+class TestCriticalPath(unittest.TestCase):
+    def test_critical_path_follows_workflow_steps(self):
+        workflow_steps_df = pd.DataFrame(
+            [
+                get_step("setup", True, 0, 0, 10),
+                get_step("workflow_monitor", True, 5, 5, 105),
+                get_step("align", False, 10, 10, 50),
+                get_step("qc", False, 10, 10, 30),
+                get_step("call", False, 50, 50, 100),
+                get_step("finalize", True, 100, 100, 110),
+            ]
+        )
+
+        # The workflow monitor covers every workflow step and ends last,
+        # the path must still run through the workflow steps rather than jump over them
+        self.assertEqual(
+            get_critical_path_task_ids(workflow_steps_df),
+            ["align", "call"]
+        )
+
+    def test_critical_path_of_technical_steps_only(self):
+        workflow_steps_df = pd.DataFrame(
+            [
+                get_step("setup", True, 0, 0, 10),
+                get_step("finalize", True, 10, 10, 20),
+            ]
+        )
+
+        self.assertEqual(
+            get_critical_path_task_ids(workflow_steps_df),
+            ["setup", "finalize"]
+        )
+
+    def test_critical_path_ignores_unfinished_steps(self):
+        workflow_steps_df = pd.DataFrame(
+            [
+                get_step("align", False, 0, 0, 10),
+                {
+                    **get_step("call", False, 10, 10, 10),
+                    "task_end_date": None,
+                },
+            ]
+        )
+
+        self.assertEqual(
+            get_critical_path_task_ids(workflow_steps_df),
+            ["align"]
+        )
+
+    def test_critical_path_of_no_completed_steps(self):
+        workflow_steps_df = pd.DataFrame(
+            [
+                {
+                    **get_step("align", False, 0, 0, 0),
+                    "task_start_date": None,
+                    "task_end_date": None,
+                },
+            ]
+        )
+
+        self.assertEqual(get_critical_path_task_ids(workflow_steps_df), [])
+
+
+if __name__ == "__main__":
+    unittest.main()